@@ -0,0 +1,45 @@
+# accounts/backends.py
+"""
+Auth backend yang menyimpan User + Profile-nya di cache (core/cache.py).
+base.html membaca user.profile.photo di setiap halaman, jadi keduanya
+diambil dengan satu query (select_related) lalu dipakai ulang antar request.
+Cache dihapus oleh signal di accounts/models.py saat User/Profile disimpan
+atau dihapus.
+
+Hanya aktif dengan cache bersama (CACHE_BACKEND 'file' / 'db'): dengan locmem
+tiap worker punya salinan sendiri, jadi ganti password / nonaktifkan user di
+satu worker tidak sampai ke worker lain. QuerySet.update() tidak memicu
+signal; TTL pendek membatasi berapa lama salinan lama bisa dipakai.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.cache import Namespace
+
+identity = Namespace('identity', ttl=60)
+
+
+def forget_user(user_id):
+    identity.delete('user', user_id)
+
+
+def identity_cache_enabled():
+    return not isinstance(identity.cache, LocMemCache)
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        if identity_cache_enabled():
+            user = identity.get_or_compute(('user', user_id), lambda: self._load_user(user_id))
+        else:
+            user = self._load_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    def _load_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            # Profile ikut di-join; user tanpa Profile → user.profile tetap tanpa query
+            return UserModel._default_manager.select_related('profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
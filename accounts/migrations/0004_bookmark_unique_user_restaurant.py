@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:29
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_bookmarks(apps, schema_editor):
+    # Sisakan bookmark paling awal untuk tiap (user, restaurant) sebelum constraint dipasang
+    Bookmark = apps.get_model('accounts', 'Bookmark')
+    duplicates = (
+        Bookmark.objects.values('user_id', 'restaurant_id')
+        .annotate(first_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for dup in duplicates:
+        Bookmark.objects.filter(
+            user_id=dup['user_id'], restaurant_id=dup['restaurant_id']
+        ).exclude(id=dup['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_bookmark_bookmark_user_created_idx'),
+        ('restaurants', '0005_restaurant_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_bookmarks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bookmark',
+            constraint=models.UniqueConstraint(fields=('user', 'restaurant'), name='bookmark_user_restaurant_uniq'),
+        ),
+    ]
@@ -1,22 +1,36 @@
 from django.db import models
 from django.contrib.auth.models import User
 from restaurants.models import Restaurant
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from core.images import discard_renditions, process_upload, schedule_renditions
+
+from .backends import forget_user
+
 
 class Bookmark(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
-class Meta:
-    unique_together = ('user', 'restaurant')
+    class Meta:
+        constraints = [
+            # Satu user hanya bisa menyimpan restoran yang sama sekali
+            models.UniqueConstraint(fields=['user', 'restaurant'], name='bookmark_user_restaurant_uniq'),
+        ]
+        indexes = [
+            # Tab "Saved" di explore: filter per user, urut terbaru disimpan
+            models.Index(fields=['user', '-created_at'], name='bookmark_user_created_idx'),
+        ]
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(max_length=500, blank=True, null=True)
     photo = models.ImageField(upload_to='profile_photos/', blank=True, null=True)
+    # Ukuran asli, diisi pipeline gambar (core/images.py) saat upload
+    photo_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     location = models.CharField(max_length=100, blank=True, null=True)
 
     def __str__(self):
@@ -26,4 +40,31 @@ class Profile(models.Model):
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        Profile.objects.get_or_create(user=instance)
\ No newline at end of file
+        Profile.objects.get_or_create(user=instance)
+
+
+# User/Profile berubah → buang salinan di cache auth (accounts/backends.py)
+@receiver([post_save, post_delete], sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def forget_cached_profile(sender, instance, **kwargs):
+    forget_user(instance.user_id)
+
+
+# Foto profil baru → EXIF dibuang; rendition + ukuran dibuat di background (core/images.py)
+@receiver(pre_save, sender=Profile)
+def process_profile_photo(sender, instance, **kwargs):
+    process_upload(instance, 'photo')
+
+
+@receiver(post_save, sender=Profile)
+def schedule_profile_renditions(sender, instance, **kwargs):
+    schedule_renditions(instance, 'photo')
+
+
+@receiver(post_delete, sender=Profile)
+def delete_profile_renditions(sender, instance, **kwargs):
+    discard_renditions(instance, 'photo')
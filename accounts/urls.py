@@ -10,4 +10,5 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('profile/', views.profile, name='profile'),
     path('bookmark/toggle/<int:resto_id>/', views.toggle_bookmark, name='toggle_bookmark'),
+    path('bookmark/toggle/<int:resto_id>/json/', views.toggle_bookmark_json, name='toggle_bookmark_json'),
 ]
\ No newline at end of file
@@ -1,11 +1,13 @@
 # accounts/views.py
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_POST
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib import messages
 from restaurants.models import Restaurant
-from .models import Bookmark
 from django.contrib.auth.decorators import login_required
+from core.utils import toggle_user_bookmark
 from .forms import ProfileForm, ProfileExtraForm
 def register(request):
     if request.method == 'POST':
@@ -46,22 +48,40 @@ def logout_view(request):
     messages.info(request, 'You have successfully logged out.')
     return redirect('core:home')
 
+@login_required
 def toggle_bookmark(request, resto_id):
-    resto = get_object_or_404(Restaurant, id=resto_id)
-    bookmark, created = Bookmark.objects.get_or_create(user=request.user, restaurant=resto)
-    
-    if not created:
-        bookmark.delete()
-        messages.info(request, 'Restaurant removed from your saved list.')
-    else:
+    try:
+        saved = toggle_user_bookmark(request.user, resto_id)
+    except Restaurant.DoesNotExist:
+        raise Http404('Restaurant not found.')
+
+    if saved:
         messages.success(request, 'Restaurant saved! ❤️')
+    else:
+        messages.info(request, 'Restaurant removed from your saved list.')
     
     # Kembali ke halaman sebelumnya
     return redirect(request.META.get('HTTP_REFERER', 'core:home'))
+
+
+@require_POST
+def toggle_bookmark_json(request, resto_id):
+    # Versi AJAX: tanpa redirect / render ulang halaman
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Login required.'}, status=401)
+    try:
+        saved = toggle_user_bookmark(request.user, resto_id)
+    except Restaurant.DoesNotExist:
+        return JsonResponse({'error': 'Restaurant not found.'}, status=404)
+    return JsonResponse({'restaurant_id': resto_id, 'bookmarked': saved})
+
 def profile(request):
-    # Ensure profile exists
+    # Ensure profile exists (biasanya sudah ikut di-join oleh CachedModelBackend)
     from .models import Profile
-    profile_obj, created = Profile.objects.get_or_create(user=request.user)
+    try:
+        profile_obj = request.user.profile
+    except Profile.DoesNotExist:
+        profile_obj, created = Profile.objects.get_or_create(user=request.user)
     
     if request.method == 'POST':
         user_form = ProfileForm(request.POST, instance=request.user)
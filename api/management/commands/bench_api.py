@@ -0,0 +1,70 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from restaurants.models import Restaurant
+
+
+class Command(BaseCommand):
+    help = "Benchmark throughput endpoint /api/ (in-process, pakai data di database saat ini)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Jumlah request per endpoint")
+        parser.add_argument("--restaurant", type=int, default=None, help="ID restoran untuk endpoint detail")
+        parser.add_argument("--host", default="localhost", help="Host header (harus ada di ALLOWED_HOSTS)")
+        parser.add_argument("--gzip", action="store_true", help="Kirim Accept-Encoding: gzip")
+
+    def handle(self, *args, **opts):
+        resto_id = opts["restaurant"] or Restaurant.objects.order_by("id").values_list("id", flat=True).first()
+        if resto_id is None:
+            self.stderr.write(self.style.ERROR("Belum ada restoran di database."))
+            return
+
+        endpoints = [
+            ("list", "/api/restaurants/"),
+            ("list sparse", "/api/restaurants/?fields=id,name"),
+            ("detail", f"/api/restaurants/{resto_id}/"),
+            ("menus", f"/api/restaurants/{resto_id}/menus/"),
+            ("reviews", f"/api/restaurants/{resto_id}/reviews/"),
+            ("ratings", f"/api/restaurants/{resto_id}/ratings/"),
+        ]
+        headers = {"HTTP_ACCEPT_ENCODING": "gzip"} if opts["gzip"] else {}
+        client = Client(HTTP_HOST=opts["host"])
+        n = opts["requests"]
+
+        self.stdout.write(f"{'endpoint':<14}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'bytes':>9}{'304 ms':>9}")
+        for label, url in endpoints:
+            # warm-up + hitung query (harus konstan, tidak tergantung jumlah data)
+            with CaptureQueriesContext(connection) as ctx:
+                first = client.get(url, **headers)
+            # query_log di-reset tiap request_started, jadi hitung sekarang
+            query_count = len(ctx.captured_queries)
+            if first.status_code != 200:
+                self.stderr.write(self.style.ERROR(f"{url} -> {first.status_code}"))
+                continue
+
+            timings = []
+            started = time.perf_counter()
+            for _ in range(n):
+                t0 = time.perf_counter()
+                client.get(url, **headers)
+                timings.append((time.perf_counter() - t0) * 1000)
+            elapsed = time.perf_counter() - started
+
+            # revalidasi dengan ETag → 304
+            revalidate = []
+            for _ in range(min(n, 50)):
+                t0 = time.perf_counter()
+                client.get(url, HTTP_IF_NONE_MATCH=first["ETag"], **headers)
+                revalidate.append((time.perf_counter() - t0) * 1000)
+
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f"{label:<14}{n / elapsed:>10.1f}{statistics.median(timings):>10.2f}{p95:>10.2f}"
+                f"{query_count:>9}{len(first.content):>9}{statistics.median(revalidate):>9.2f}"
+            )
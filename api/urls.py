@@ -0,0 +1,13 @@
+# api/urls.py
+from django.urls import path
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('restaurants/', views.restaurant_list, name='restaurant_list'),
+    path('restaurants/<int:restaurant_id>/', views.restaurant_detail, name='restaurant_detail'),
+    path('restaurants/<int:restaurant_id>/menus/', views.restaurant_menus, name='restaurant_menus'),
+    path('restaurants/<int:restaurant_id>/reviews/', views.restaurant_reviews, name='restaurant_reviews'),
+    path('restaurants/<int:restaurant_id>/ratings/', views.restaurant_ratings, name='restaurant_ratings'),
+]
@@ -0,0 +1,297 @@
+# api/views.py
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Avg, Count
+from django.http import JsonResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+
+from core.conditional import catalogue_version, conditional_response, make_etag, set_conditional_headers
+from core.pagination import CursorPaginator
+from restaurants.models import Restaurant, Menu
+from reviews.models import Review, ReviewReply
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+CACHE_MAX_AGE = 60
+
+# Nama field di API -> kolom / ekspresi di ORM
+RESTAURANT_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'address': 'address',
+    'latitude': 'latitude',
+    'longitude': 'longitude',
+    'description': 'description',
+    'photo': 'photo',
+    'avg_rating': Avg('review__rating'),
+    'review_count': Count('review'),
+    'updated_at': 'updated_at',
+}
+RESTAURANT_DEFAULT_FIELDS = ('id', 'name', 'address', 'latitude', 'longitude', 'avg_rating', 'review_count')
+
+MENU_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'price': 'price',
+    'description': 'description',
+    'photo': 'photo',
+}
+MENU_DEFAULT_FIELDS = ('id', 'name', 'price', 'description', 'photo')
+
+REVIEW_FIELDS = {
+    'id': 'id',
+    'user': 'user__username',
+    'rating': 'rating',
+    'comment': 'comment',
+    'photo': 'photo',
+    'created_at': 'created_at',
+}
+REVIEW_DEFAULT_FIELDS = ('id', 'user', 'rating', 'comment', 'photo', 'created_at', 'replies')
+
+
+class FieldError(ValueError):
+    pass
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, encoder=DjangoJSONEncoder, json_dumps_params={'separators': (',', ':')})
+
+
+def _error(message, status=400):
+    return _json({'error': message}, status=status)
+
+
+def _requested_fields(request, allowed, default):
+    """
+    Sparse fieldset: ?fields=id,name → hanya kolom itu yang di-SELECT
+    """
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(default)
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise FieldError(f"Field tidak dikenal: {', '.join(unknown)}. Pilihan: {', '.join(allowed)}")
+    return list(dict.fromkeys(fields))
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        return PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _values_queryset(queryset, mapping, fields, extra=()):
+    """
+    .values() dengan alias nama API; agregat hanya dihitung kalau diminta
+    """
+    columns, annotations = [], {}
+    for name in fields:
+        source = mapping.get(name)
+        if source is None:
+            continue
+        if isinstance(source, str):
+            columns.append(source)
+        else:
+            annotations[name] = source
+    columns.extend(c for c in extra if c not in columns)
+    return queryset.values(*columns, **annotations)
+
+
+def _row_to_dict(row, mapping, fields):
+    data = {}
+    for name in fields:
+        source = mapping.get(name)
+        if source is None:
+            continue
+        value = row[source] if isinstance(source, str) else row[name]
+        if name == 'photo':
+            value = default_storage.url(value) if value else None
+        elif name == 'avg_rating' and value is not None:
+            value = round(value, 2)
+        data[name] = value
+    return data
+
+
+def _finish(response, etag, last_modified):
+    # Data publik dan read-only: boleh di-cache shared cache sebentar
+    return set_conditional_headers(response, etag, last_modified, public=True, max_age=CACHE_MAX_AGE)
+
+
+def _restaurant_version(restaurant_id):
+    return Restaurant.objects.filter(pk=restaurant_id).values('id', 'version', 'updated_at').first()
+
+
+@require_GET
+@gzip_page
+def restaurant_list(request):
+    try:
+        fields = _requested_fields(request, RESTAURANT_FIELDS, RESTAURANT_DEFAULT_FIELDS)
+    except FieldError as e:
+        return _error(str(e))
+
+    version, last_modified = catalogue_version()
+    etag = make_etag('api:restaurants', version, request.GET.urlencode())
+    not_modified = conditional_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    qs = Restaurant.objects.all()
+    query = request.GET.get('q')
+    if query:
+        qs = qs.filter(name__icontains=query)
+
+    qs = _values_queryset(qs, RESTAURANT_FIELDS, fields, extra=('name', 'id'))
+    page = CursorPaginator(qs, _page_size(request), ordering=('name', 'id')).page(request.GET.get('cursor'))
+
+    response = _json({
+        'results': [_row_to_dict(row, RESTAURANT_FIELDS, fields) for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+    return _finish(response, etag, last_modified)
+
+
+@require_GET
+@gzip_page
+def restaurant_detail(request, restaurant_id):
+    try:
+        fields = _requested_fields(request, RESTAURANT_FIELDS, RESTAURANT_FIELDS.keys())
+    except FieldError as e:
+        return _error(str(e))
+
+    current = _restaurant_version(restaurant_id)
+    if current is None:
+        return _error('Restoran tidak ditemukan.', status=404)
+
+    etag = make_etag('api:restaurant', current['id'], current['version'], current['updated_at'], request.GET.urlencode())
+    not_modified = conditional_response(request, etag, current['updated_at'])
+    if not_modified is not None:
+        return not_modified
+
+    # Rating dihitung dari distribusi (satu query), bukan join + GROUP BY
+    plain_fields = [f for f in fields if f not in ('avg_rating', 'review_count')]
+    row = _values_queryset(Restaurant.objects.filter(pk=restaurant_id), RESTAURANT_FIELDS, plain_fields).first()
+    data = _row_to_dict(row, RESTAURANT_FIELDS, plain_fields)
+
+    ratings = _rating_summary(restaurant_id)
+    if 'avg_rating' in fields:
+        data['avg_rating'] = ratings['average']
+    if 'review_count' in fields:
+        data['review_count'] = ratings['count']
+
+    menus = Menu.objects.filter(restaurant_id=restaurant_id).order_by('name', 'id')
+    data['menus'] = [
+        _row_to_dict(m, MENU_FIELDS, MENU_DEFAULT_FIELDS)
+        for m in _values_queryset(menus, MENU_FIELDS, MENU_DEFAULT_FIELDS)
+    ]
+    data['ratings'] = ratings['distribution']
+
+    return _finish(_json(data), etag, current['updated_at'])
+
+
+@require_GET
+@gzip_page
+def restaurant_menus(request, restaurant_id):
+    try:
+        fields = _requested_fields(request, MENU_FIELDS, MENU_DEFAULT_FIELDS)
+    except FieldError as e:
+        return _error(str(e))
+
+    current = _restaurant_version(restaurant_id)
+    if current is None:
+        return _error('Restoran tidak ditemukan.', status=404)
+
+    etag = make_etag('api:menus', current['id'], current['version'], current['updated_at'], request.GET.urlencode())
+    not_modified = conditional_response(request, etag, current['updated_at'])
+    if not_modified is not None:
+        return not_modified
+
+    qs = _values_queryset(Menu.objects.filter(restaurant_id=restaurant_id), MENU_FIELDS, fields, extra=('name', 'id'))
+    page = CursorPaginator(qs, _page_size(request), ordering=('name', 'id')).page(request.GET.get('cursor'))
+
+    response = _json({
+        'results': [_row_to_dict(row, MENU_FIELDS, fields) for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+    return _finish(response, etag, current['updated_at'])
+
+
+@require_GET
+@gzip_page
+def restaurant_reviews(request, restaurant_id):
+    try:
+        fields = _requested_fields(request, list(REVIEW_FIELDS) + ['replies'], REVIEW_DEFAULT_FIELDS)
+    except FieldError as e:
+        return _error(str(e))
+
+    current = _restaurant_version(restaurant_id)
+    if current is None:
+        return _error('Restoran tidak ditemukan.', status=404)
+
+    etag = make_etag('api:reviews', current['id'], current['version'], current['updated_at'],
+                     request.GET.urlencode())
+    not_modified = conditional_response(request, etag, current['updated_at'])
+    if not_modified is not None:
+        return not_modified
+
+    qs = _values_queryset(
+        Review.objects.filter(restaurant_id=restaurant_id), REVIEW_FIELDS, fields, extra=('created_at', 'id')
+    )
+    page = CursorPaginator(qs, _page_size(request), ordering=('-created_at', '-id')).page(request.GET.get('cursor'))
+    results = [_row_to_dict(row, REVIEW_FIELDS, fields) for row in page]
+
+    if 'replies' in fields and results:
+        # Semua reply untuk review di halaman ini dalam satu query
+        replies = {}
+        reply_rows = ReviewReply.objects.filter(
+            review_id__in=[row['id'] for row in page]
+        ).order_by('created_at', 'id').values('review_id', 'id', 'user__username', 'reply_text', 'created_at')
+        for reply in reply_rows:
+            replies.setdefault(reply['review_id'], []).append({
+                'id': reply['id'],
+                'user': reply['user__username'],
+                'text': reply['reply_text'],
+                'created_at': reply['created_at'],
+            })
+        for row, data in zip(page, results):
+            data['replies'] = replies.get(row['id'], [])
+
+    response = _json({
+        'results': results,
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+    return _finish(response, etag, current['updated_at'])
+
+
+def _rating_summary(restaurant_id):
+    counts = dict(
+        Review.objects.filter(restaurant_id=restaurant_id).values_list('rating').annotate(n=Count('id')).order_by()
+    )
+    total = sum(counts.values())
+    average = round(sum(r * n for r, n in counts.items()) / total, 2) if total else None
+    return {
+        'average': average,
+        'count': total,
+        'distribution': {str(star): counts.get(star, 0) for star in range(1, 6)},
+    }
+
+
+@require_GET
+@gzip_page
+def restaurant_ratings(request, restaurant_id):
+    current = _restaurant_version(restaurant_id)
+    if current is None:
+        return _error('Restoran tidak ditemukan.', status=404)
+
+    etag = make_etag('api:ratings', current['id'], current['version'], current['updated_at'])
+    not_modified = conditional_response(request, etag, current['updated_at'])
+    if not_modified is not None:
+        return not_modified
+
+    return _finish(_json(_rating_summary(restaurant_id)), etag, current['updated_at'])
@@ -0,0 +1,82 @@
+"""
+Konfigurasi koneksi SQLite: WAL + PRAGMA tuning di setiap koneksi baru,
+koneksi persisten, dan (opsional) koneksi baca terpisah + router-nya.
+
+Dengan WAL, pembaca tidak menunggu penulis (dan sebaliknya); busy_timeout
+membuat penulis yang bentrok menunggu dulu, bukan langsung
+"database is locked".
+"""
+from django.db import connections
+
+# Nilai default; bisa dioverride per panggilan sqlite_databases(pragmas=...)
+PRAGMAS = {
+    'journal_mode': 'WAL',         # persisten di file DB; pembaca & penulis tidak saling blok
+    'synchronous': 'NORMAL',       # aman untuk WAL (hanya checkpoint yang fsync)
+    'busy_timeout': 5000,          # ms menunggu lock sebelum error
+    'cache_size': -20000,          # negatif = KiB → ~20 MB page cache per koneksi
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+CONN_MAX_AGE = 600  # detik; koneksi dipakai ulang antar request
+
+
+def init_command(pragmas):
+    return ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items())
+
+
+def sqlite_databases(name, read_connection=False, pragmas=None, conn_max_age=CONN_MAX_AGE):
+    """
+    DATABASES untuk settings.py. `read_connection=True` menambah alias
+    'reader' (file yang sama, PRAGMA query_only) untuk ReadWriteRouter.
+    """
+    pragmas = {**PRAGMAS, **(pragmas or {})}
+    default = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Detik; lapisan sqlite3 Python (busy_timeout di atas untuk koneksi SQLite-nya)
+            'timeout': pragmas['busy_timeout'] / 1000,
+            'init_command': init_command(pragmas),
+        },
+    }
+    databases = {'default': default}
+    if read_connection:
+        # journal_mode tidak diulang: hanya penulis yang boleh mengubahnya
+        reader_pragmas = {k: v for k, v in pragmas.items() if k != 'journal_mode'}
+        reader_pragmas['query_only'] = 'ON'
+        databases['reader'] = {
+            **default,
+            'OPTIONS': {**default['OPTIONS'], 'init_command': init_command(reader_pragmas)},
+            # Test: pakai database test 'default', bukan membuat database sendiri
+            'TEST': {'MIRROR': 'default'},
+        }
+    return databases
+
+
+class ReadWriteRouter:
+    """
+    Baca → 'reader', tulis → 'default'. Di dalam transaksi (atomic) pada
+    'default', baca tetap ke 'default' supaya melihat tulisan yang belum commit.
+    """
+    read_alias = 'reader'
+    write_alias = 'default'
+
+    def db_for_read(self, model, **hints):
+        if self.read_alias not in connections.databases:
+            return None
+        if connections[self.write_alias].in_atomic_block:
+            return self.write_alias
+        return self.read_alias
+
+    def db_for_write(self, model, **hints):
+        return self.write_alias
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Dua alias ini file database yang sama
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == self.write_alias
@@ -41,9 +41,12 @@ INSTALLED_APPS = [
     'accounts',
     'restaurants',
     'reviews',
+    'api',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,12 +79,52 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# SQLite dengan WAL + PRAGMA tuning + koneksi persisten (config/database.py).
+# SQLITE_READ_CONNECTION = True: baca lewat koneksi 'reader' terpisah (query_only)
+SQLITE_READ_CONNECTION = False
+
+from config.database import sqlite_databases
+
+DATABASES = sqlite_databases(BASE_DIR / 'db.sqlite3', read_connection=SQLITE_READ_CONNECTION)
+DATABASE_ROUTERS = ['config.database.ReadWriteRouter'] if SQLITE_READ_CONNECTION else []
+
+
+# Cache (dipakai lewat core/cache.py)
+# 'locmem' = per proses (default, 1 worker); untuk banyak worker pakai cache bersama:
+# 'file' = folder var/cache, 'db' = tabel di SQLite (jalankan `manage.py createcachetable` dulu)
+CACHE_BACKEND = 'locmem'
+
+CACHES = {
+    'locmem': {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'peekmap',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    },
+    'file': {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'var' / 'cache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    },
+    'db': {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache_table',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    },
+}[CACHE_BACKEND]
+
+# Session dibaca dari cache, tulis tetap ke DB, tapi hanya dengan cache bersama:
+# dengan locmem, logout di satu worker tidak menghapus salinan session di worker lain
+SESSION_ENGINE = ('django.contrib.sessions.backends.db' if CACHE_BACKEND == 'locmem'
+                  else 'django.contrib.sessions.backends.cached_db')
+
+# User + Profile satu query; di-cache antar request hanya dengan cache bersama (accounts/backends.py)
+AUTHENTICATION_BACKENDS = ['accounts.backends.CachedModelBackend']
 
 
 # Password validation
@@ -127,4 +170,49 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 import os
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+
+# Instrumentasi per request (core.middleware.QueryInstrumentationMiddleware)
+# Turunkan sample rate di production, mis. 0.05 = 5% request
+INSTRUMENTATION_SAMPLE_RATE = 1.0
+SLOW_QUERY_THRESHOLD_MS = 100
+N_PLUS_ONE_THRESHOLD = 3
+
+# Metrik Prometheus di /metrics (core.metrics); tiap worker menulis ke folder ini
+METRICS_DIR = BASE_DIR / 'var' / 'metrics'
+# Hanya IP ini yang boleh scrape /metrics
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Job background (core/tasks.py) dijalankan `manage.py run_worker`.
+# True = job langsung dijalankan saat enqueue (dev tanpa worker)
+TASKS_EAGER = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        # Retry/gagal tulis karena database terkunci (core.writes)
+        'core.writes': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        # Retry/gagal job background (core.tasks, manage.py run_worker)
+        'core.tasks': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
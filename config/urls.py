@@ -25,6 +25,7 @@ urlpatterns = [
     path('accounts/', include('accounts.urls')),  # login, register
     path('restaurants/', include('restaurants.urls')),
     path('reviews/', include('reviews.urls')),
+    path('api/', include('api.urls')),  # JSON read-only untuk mobile
 ]
 
 # Tambahkan ini agar file media bisa diakses
@@ -0,0 +1,146 @@
+# core/cache.py
+"""
+API cache proyek di atas django.core.cache:
+
+  restaurants = Namespace('restaurants', ttl=300, stale_ttl=600)
+  data = restaurants.get_or_compute(('top', page), lambda: ...)
+  restaurants.invalidate()          # semua key di namespace langsung basi
+
+Key diberi versi per namespace (invalidate = naikkan versi, tanpa scan key).
+Nilai disimpan dengan soft TTL: lewat soft TTL nilai lama masih dipakai
+(stale-while-revalidate) sementara satu worker menghitung ulang; hanya
+pemegang lock (single-flight) yang menghitung, jadi tidak ada stampede.
+Hit/miss/stale per namespace tercatat di metrik (core.metrics).
+"""
+import hashlib
+import re
+import time
+
+from django.core.cache import caches
+
+from .metrics import record_cache
+
+DEFAULT_TTL = 300
+LOCK_TIMEOUT = 30        # detik; lock dilepas otomatis kalau worker mati saat menghitung
+WAIT_INTERVAL = 0.05     # detik; polling saat menunggu worker lain selesai menghitung
+MAX_KEY_LENGTH = 200     # batas aman (memcached 250)
+
+_MISSING = object()
+
+
+# Potongan key yang dipakai apa adanya; sisanya (termasuk yang berisi ':' pemisah
+# key, spasi, atau '#') di-hash dengan awalan '#', jadi ('a:b',) ≠ ('a', 'b')
+_SAFE_PART = re.compile(r'[\w.,=/-]+', re.ASCII)
+
+
+def _key_part(part):
+    text = str(part)
+    if _SAFE_PART.fullmatch(text):
+        return text
+    return '#' + hashlib.sha1(text.encode()).hexdigest()
+
+
+class Namespace:
+    def __init__(self, name, ttl=DEFAULT_TTL, stale_ttl=0, alias='default'):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    # --- versi namespace -------------------------------------------------
+    def _version_key(self):
+        return f'ns:{self.name}:version'
+
+    def version(self):
+        # Nilai awal = waktu (ms), bukan 1: kalau key versi ter-evict, versi
+        # baru tetap lebih besar dari semua versi lama → entry lama tidak hidup lagi
+        key = self._version_key()
+        version = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, int(time.time() * 1000), timeout=None)
+            version = self.cache.get(key)
+        return version
+
+    def invalidate(self):
+        key = self._version_key()
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, int(time.time() * 1000), timeout=None)
+            return self.cache.get(key)
+
+    def key(self, *parts):
+        key = ':'.join([self.name, f'v{self.version()}', *(_key_part(p) for p in parts)])
+        if len(key) > MAX_KEY_LENGTH:
+            key = f'{self.name}:h:{hashlib.sha1(key.encode()).hexdigest()}'
+        return key
+
+    # --- get / set biasa -------------------------------------------------
+    def get(self, *parts, default=None):
+        entry = self.cache.get(self.key(*parts), _MISSING)
+        record_cache(self.name, 'miss' if entry is _MISSING else 'hit')
+        return default if entry is _MISSING else entry[0]
+
+    def set(self, *parts, value, ttl=None):
+        self._store(self.key(*parts), value, self.ttl if ttl is None else ttl, self.stale_ttl)
+
+    def delete(self, *parts):
+        self.cache.delete(self.key(*parts))
+
+    def _store(self, key, value, ttl, stale_ttl):
+        # (nilai, soft_expires_at); hard TTL = ttl + stale_ttl
+        self.cache.set(key, (value, time.time() + ttl), timeout=ttl + stale_ttl)
+
+    # --- single-flight + stale-while-revalidate --------------------------
+    def get_or_compute(self, parts, compute, ttl=None, stale_ttl=None):
+        """
+        Ambil nilai `parts` dari cache; kalau tidak ada / basi, panggil compute().
+        Hanya satu worker yang menghitung per key: yang lain memakai nilai
+        basi (kalau masih ada) atau menunggu hasilnya.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        parts = parts if isinstance(parts, (tuple, list)) else (parts,)
+        key = self.key(*parts)
+        lock_key = f'{key}!lock'  # '!' tidak pernah ada di key biasa: tidak bentrok dengan key(..., 'lock')
+
+        entry = self.cache.get(key, _MISSING)
+        if entry is not _MISSING:
+            value, soft_expires_at = entry
+            if time.time() < soft_expires_at:
+                record_cache(self.name, 'hit')
+                return value
+            # Basi: satu worker menghitung ulang, sisanya langsung pakai nilai lama
+            if not self.cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+                record_cache(self.name, 'stale')
+                return value
+            record_cache(self.name, 'stale')
+            return self._recompute(key, lock_key, compute, ttl, stale_ttl)
+
+        record_cache(self.name, 'miss')
+        if self.cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            return self._recompute(key, lock_key, compute, ttl, stale_ttl)
+
+        # Worker lain sedang menghitung: tunggu hasilnya, jangan ikut menghitung
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            entry = self.cache.get(key, _MISSING)
+            if entry is not _MISSING:
+                return entry[0]
+            if self.cache.get(lock_key) is None:
+                break  # pemegang lock gagal; hitung sendiri
+        return self._recompute(key, lock_key, compute, ttl, stale_ttl, locked=False)
+
+    def _recompute(self, key, lock_key, compute, ttl, stale_ttl, locked=True):
+        try:
+            value = compute()
+            self._store(key, value, ttl, stale_ttl)
+            return value
+        finally:
+            if locked:
+                self.cache.delete(lock_key)
@@ -0,0 +1,149 @@
+# core/columnar.py
+"""
+Tahap clean (raw → clean) dalam bentuk vektor + format antara kolomnar.
+
+Normalisasi koordinat/rating/harga dikerjakan per kolom (pandas), lalu tabel hasil
+disimpan sebagai .npz: satu array bertipe per kolom + metadata schema. Import
+berikutnya tinggal memuat array-nya (lihat TableReader), tanpa parse string lagi.
+"""
+import json
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_VERSION = 1
+SCHEMA_KEY = "__schema__"
+
+# Jabodetabek, longgar: di luar kotak ini koordinat dianggap rusak
+JAKARTA_BOUNDS = {"latitude": (-6.8, -5.9), "longitude": (106.4, 107.2)}
+# Jumlah digit sebelum koma, untuk membaca format ringkas "-6.234.567"
+INTEGER_DIGITS = {"latitude": 1, "longitude": 3}
+
+# Harga rupiah: "Rp 25.000", "25,5k", "18rb", "25000"
+_AMOUNT = r"(\d{1,3}(?:[.,]\d{3})+|\d+(?:[.,]\d{1,2})?)"
+PRICE_RE = rf"(?i)^\s*(rp\.?)?\s*{_AMOUNT}\s*(k|rb|ribu)?\s*$"
+# Harga di ujung nama menu ("Nasi Goreng - Rp 25.000"); wajib ada Rp atau k/rb supaya "Paket 2" aman
+TRAILING_PRICE_RE = rf"(?i)\s*[-–:@(]?\s*(rp\.?)?\s*{_AMOUNT}\s*(k|rb|ribu)?\)?\s*$"
+MAX_PRICE = Decimal("99999999.99")  # DecimalField(max_digits=10, decimal_places=2)
+
+
+class ColumnarError(Exception):
+    pass
+
+
+def normalize_coordinates(values, axis):
+    """
+    Series/list koordinat → Series float. Angka biasa dipakai apa adanya;
+    format ringkas/rusak ("-6.234.567", "6200000") dibaca ulang dari digitnya
+    sesuai jumlah digit bulat `axis`. Yang tetap di luar JAKARTA_BOUNDS → NaN.
+    """
+    raw = pd.Series(values, dtype=object)
+    text = raw.astype(str).str.strip().str.replace(",", ".", regex=False)
+    parsed = pd.to_numeric(text.where(raw.notna()), errors="coerce")
+
+    low, high = JAKARTA_BOUNDS[axis]
+    retry = ~parsed.between(low, high) & raw.notna()
+    if retry.any():
+        digits = text[retry].str.replace(r"\D", "", regex=True)
+        scale = 10.0 ** (digits.str.len() - INTEGER_DIGITS[axis]).clip(lower=0)
+        compact = pd.to_numeric(digits, errors="coerce") / scale
+        negative = text[retry].str.startswith("-")
+        parsed[retry] = compact.where(~negative, -compact)
+
+    return parsed.where(parsed.between(low, high)).astype("float64")
+
+
+def normalize_ratings(values):
+    """
+    Rating → float 1..5 (dibulatkan); yang tidak terbaca jadi NaN
+    """
+    text = pd.Series(values, dtype=object).astype(str).str.strip().str.replace(",", ".", regex=False)
+    rating = pd.to_numeric(text, errors="coerce").round()
+    return rating.where(rating.between(1, 5)).astype("float64")
+
+
+def _amounts(numbers, suffix):
+    # "25.000" / "25,000" = ribuan; "25,5" / "25.5" = desimal; akhiran k/rb/ribu = × 1000
+    numbers = numbers.astype(str)
+    grouped = numbers.str.fullmatch(r"\d{1,3}(?:[.,]\d{3})+")
+    plain = numbers.str.replace(",", ".", regex=False)
+    value = pd.to_numeric(plain.where(~grouped, numbers.str.replace(r"[.,]", "", regex=True)), errors="coerce")
+    return value * np.where(suffix.notna(), 1000, 1)
+
+
+def _to_decimal(amounts):
+    # Satu-satunya langkah per elemen: float (sudah dibulatkan) → Decimal
+    rounded = amounts.round(2)
+    return pd.Series([None if v != v or v < 0 or v > MAX_PRICE else Decimal(f"{v:.2f}")
+                      for v in rounded.tolist()], index=amounts.index, dtype=object)
+
+
+def normalize_prices(values):
+    """
+    Kolom harga → Series Decimal (2 desimal); yang tidak terbaca jadi None
+    """
+    text = pd.Series(values, dtype=object).astype(str)
+    parts = text.str.extract(PRICE_RE)
+    return _to_decimal(_amounts(parts[1], parts[2]))
+
+
+def split_menu_prices(items):
+    """
+    Pisahkan harga di ujung nama menu. Return (nama tanpa harga, Series Decimal/None).
+    """
+    items = pd.Series(items, dtype=object).astype(str)
+    parts = items.str.extract(TRAILING_PRICE_RE)
+    has_price = parts[1].notna() & (parts[0].notna() | parts[2].notna())
+    prices = _to_decimal(_amounts(parts[1].fillna("0"), parts[2]).where(has_price))
+    names = items.where(~has_price, items.str.replace(TRAILING_PRICE_RE, "", regex=True)).str.strip()
+    return names, prices
+
+
+def _column_array(series):
+    if pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=bool)
+    if pd.api.types.is_integer_dtype(series):
+        return series.to_numpy(dtype="int64")
+    if pd.api.types.is_float_dtype(series):
+        return series.to_numpy(dtype="float64")
+    if pd.api.types.is_datetime64_any_dtype(series):
+        # Waktu disimpan UTC tanpa zona, presisi mikrodetik (NaT untuk kosong)
+        if series.dt.tz is not None:
+            series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+        return series.to_numpy(dtype="datetime64[us]")
+    # Teks: unicode numpy biasa (tanpa pickle); kosong = ""
+    return np.array(series.fillna("").astype(str).tolist(), dtype=str)
+
+
+def write_table(path, frame, table):
+    """
+    Simpan DataFrame sebagai .npz: satu array per kolom + metadata schema
+    """
+    arrays = {f"c{i}": _column_array(frame[col]) for i, col in enumerate(frame.columns)}
+    schema = {
+        "version": SCHEMA_VERSION,
+        "table": table,
+        "rows": len(frame),
+        "columns": [str(col) for col in frame.columns],
+        "dtypes": [arrays[f"c{i}"].dtype.str for i in range(len(frame.columns))],
+    }
+    arrays[SCHEMA_KEY] = np.array(json.dumps(schema))
+    np.savez_compressed(path, **arrays)
+
+
+def read_table(path, table=None):
+    """
+    Return (schema, {kolom: array}). Versi schema yang tidak dikenal → ColumnarError.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if SCHEMA_KEY not in data.files:
+            raise ColumnarError(f"{path}: bukan file kolomnar (schema tidak ada)")
+        schema = json.loads(str(data[SCHEMA_KEY]))
+        if schema.get("version") != SCHEMA_VERSION:
+            raise ColumnarError(f"{path}: schema versi {schema.get('version')}, "
+                                f"yang didukung {SCHEMA_VERSION}; jalankan ulang tahap clean")
+        if table is not None and schema.get("table") != table:
+            raise ColumnarError(f"{path}: berisi tabel {schema.get('table')!r}, bukan {table!r}")
+        columns = {col: data[f"c{i}"] for i, col in enumerate(schema["columns"])}
+    return schema, columns
@@ -0,0 +1,88 @@
+# core/conditional.py
+import hashlib
+from calendar import timegm
+
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """
+    Gabungkan potongan versi jadi satu ETag pendek
+    """
+    raw = ':'.join(str(p) for p in parts)
+    return hashlib.md5(raw.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+def _timestamp(dt):
+    return timegm(dt.utctimetuple()) if dt else None
+
+
+def catalogue_version():
+    """
+    Versi global katalog: waktu perubahan restoran terakhir + jumlah restoran.
+    Setiap perubahan menu/review/reply ikut menyentuh Restaurant.updated_at,
+    jadi satu agregat ini cukup untuk semua tab listing.
+    """
+    from restaurants.models import Restaurant
+
+    agg = Restaurant.objects.aggregate(last=Max('updated_at'), total=Count('id'))
+    return f"{_timestamp(agg['last'])}.{agg['total']}", agg['last']
+
+
+def user_bookmark_version(user):
+    """
+    Versi bookmark milik user (status ❤️ di kartu restoran)
+    """
+    if not user.is_authenticated:
+        return '0'
+    from accounts.models import Bookmark
+
+    agg = Bookmark.objects.filter(user=user).aggregate(last=Max('id'), total=Count('id'))
+    return f"{agg['last']}.{agg['total']}"
+
+
+def csrf_version(request):
+    """
+    Untuk halaman yang me-render {% csrf_token %}: secret CSRF berganti saat
+    login/logout, dan 304 akan menyajikan form lama dengan token basi (POST → 403)
+    """
+    get_token(request)
+    return request.META.get('CSRF_COOKIE', '')
+
+
+def conditional_response(request, etag, last_modified=None):
+    """
+    Balas 304 kalau If-None-Match / If-Modified-Since masih cocok, sebelum
+    view menjalankan query yang berat. Kembalikan None kalau harus render.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    # Flash message hanya muncul sekali, jangan sampai tertelan oleh 304
+    if len(get_messages(request)):
+        return None
+    # Halaman user yang login berbeda per user; Last-Modified saja tidak cukup
+    if request.user.is_authenticated:
+        last_modified = None
+    return get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=_timestamp(last_modified),
+    )
+
+
+def set_conditional_headers(response, etag, last_modified=None, **cache_control):
+    """
+    Pasang ETag/Last-Modified. Default-nya browser dipaksa revalidasi setiap
+    kali (private, no-cache); `cache_control` untuk mengganti kebijakan itu.
+    """
+    if response.status_code != 200:
+        return response
+    response.headers['ETag'] = quote_etag(etag)
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(_timestamp(last_modified))
+    patch_cache_control(response, **(cache_control or {'private': True, 'no_cache': True}))
+    return response
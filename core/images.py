@@ -0,0 +1,247 @@
+# core/images.py
+"""
+Pipeline gambar upload (foto restoran, menu, review, profil):
+
+- EXIF dibuang dari file asli (lokasi GPS dll), orientasi kamera diterapkan dulu
+- rendition tetap (thumb, card, hero) dibuat dalam WebP dan JPEG di
+  renditions/<path asli>/<nama>.<ext> oleh job background (core/tasks.py),
+  lalu ukuran asli dicatat di photo_width / photo_height
+- rendition file lama dihapus saat foto diganti, dikosongkan, atau objeknya dihapus
+
+Rendition dari sebelum path memakai nama file lengkap (dengan ekstensi) tidak
+ditemukan lagi; buat ulang dengan `manage.py build_renditions --force`.
+
+Path rendition bisa dihitung dari nama file + ukuran asli saja, jadi template
+tag {% picture %} (core/templatetags/images.py) tidak perlu query atau baca file.
+"""
+import io
+import logging
+import os
+import posixpath
+
+from django.apps import apps
+from django.db import transaction
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .tasks import enqueue, task
+from .writes import run_write
+
+logger = logging.getLogger('core.images')
+
+# nama → kotak maksimum (lebar, tinggi); gambar tidak pernah diperbesar
+RENDITIONS = {
+    'thumb': (160, 160),
+    'card': (480, 480),
+    'hero': (1280, 1280),
+}
+# (ekstensi, format Pillow, mime, opsi save)
+FORMATS = (
+    ('webp', 'WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+RENDITION_DIR = 'renditions'
+
+# Format asli yang di-encode ulang tanpa EXIF; lainnya (mis. GIF animasi) dibiarkan
+REENCODE = {'JPEG': {'quality': 90, 'optimize': True}, 'PNG': {'optimize': True}, 'WEBP': {'quality': 90}}
+
+IMAGE_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError)
+
+
+def rendition_size(width, height, name):
+    box_w, box_h = RENDITIONS[name]
+    scale = min(1.0, box_w / width, box_h / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def rendition_name(original, name, ext):
+    # Nama lengkap (dengan ekstensi): foto.jpg dan foto.png tidak berbagi folder
+    return posixpath.join(RENDITION_DIR, original, f'{name}.{ext}')
+
+
+def _open(fieldfile):
+    if fieldfile._committed:
+        with fieldfile.storage.open(fieldfile.name, 'rb') as f:
+            data = f.read()
+    else:
+        # File upload jangan ditutup: TemporaryUploadedFile terhapus saat close()
+        upload = fieldfile.file
+        upload.seek(0)
+        data = upload.read()
+        upload.seek(0)
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def _flatten(image):
+    # JPEG tanpa alpha: transparan → latar putih
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _encode(image, fmt, options):
+    if fmt == 'JPEG':
+        image = _flatten(image)
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)  # tanpa exif= → metadata tidak ikut
+    return buffer.getvalue()
+
+
+def strip_metadata(fieldfile):
+    """
+    Encode ulang file upload (belum disimpan) tanpa EXIF. Mengembalikan Image
+    yang sudah diputar sesuai orientasi EXIF.
+    """
+    image = _open(fieldfile)
+    fmt = image.format
+    if fmt == 'MPO':
+        # Foto kamera ponsel sering MPO (JPEG + frame tambahan, EXIF di tiap frame):
+        # perlakukan sebagai JPEG, simpan frame pertama saja
+        fmt = 'JPEG'
+        image.seek(0)
+    animated = fmt != 'JPEG' and getattr(image, 'is_animated', False)
+    image = ImageOps.exif_transpose(image)  # hasilnya salinan satu frame
+    if fmt in REENCODE and not animated:
+        name = os.path.basename(fieldfile.name)
+        fieldfile.file = ContentFile(_encode(image, fmt, REENCODE[fmt]), name=name)
+    return image
+
+
+def build_renditions(storage, original, image):
+    """
+    Tulis semua rendition untuk file `original` (nama di storage) dari `image`.
+    Rendition lama dengan nama sama ditimpa.
+    """
+    for name in RENDITIONS:
+        resized = image.resize(rendition_size(*image.size, name), Image.LANCZOS)
+        for ext, fmt, _, options in FORMATS:
+            path = rendition_name(original, name, ext)
+            if storage.exists(path):
+                storage.delete(path)
+            storage.save(path, ContentFile(_encode(resized, fmt, options)))
+
+
+def delete_renditions(storage, original):
+    for name in RENDITIONS:
+        for ext, _, _, _ in FORMATS:
+            path = rendition_name(original, name, ext)
+            if storage.exists(path):
+                storage.delete(path)
+
+
+def discard_renditions(instance, field='photo', original=None):
+    """
+    Hapus rendition `original` (default: file di `field` sekarang) setelah
+    transaksi commit; kalau rollback, rendition lama masih dipakai.
+    """
+    fieldfile = getattr(instance, field)
+    original = original or fieldfile.name
+    if original:
+        storage = fieldfile.storage
+        transaction.on_commit(lambda: delete_renditions(storage, original))
+
+
+def _replaced_name(instance, field):
+    # Nama file di DB kalau berbeda dari yang akan disimpan (foto diganti / dikosongkan)
+    fieldfile = getattr(instance, field)
+    if instance._state.adding or instance.pk is None or (fieldfile and fieldfile._committed):
+        return None
+    old = type(instance)._default_manager.filter(pk=instance.pk).values_list(field, flat=True).first()
+    return old if old and old != fieldfile.name else None
+
+
+def process_upload(instance, field='photo'):
+    """
+    Dipanggil dari pre_save: kalau ada file baru di `field`, buang EXIF dan
+    simpan file. Rendition + ukuran dibuat di background (schedule_renditions
+    dari post_save); sampai selesai, template menampilkan file asli.
+    File yang bukan gambar valid disimpan apa adanya (tanpa rendition).
+    Rendition file yang diganti / dikosongkan ikut dihapus.
+    """
+    fieldfile = getattr(instance, field)
+    replaced = _replaced_name(instance, field)
+    if replaced:
+        discard_renditions(instance, field, replaced)
+    if not fieldfile or fieldfile._committed:
+        return
+    setattr(instance, f'{field}_width', None)
+    setattr(instance, f'{field}_height', None)
+    try:
+        strip_metadata(fieldfile)
+    except IMAGE_ERRORS as e:
+        logger.warning('%s.%s: bukan gambar valid (%s), rendition dilewati',
+                       type(instance).__name__, field, e)
+        return
+    # Simpan sekarang supaya nama final (setelah rename storage) diketahui
+    fieldfile.save(os.path.basename(fieldfile.name), fieldfile.file, save=False)
+    instance.__dict__.setdefault('_renditions_pending', set()).add(field)
+
+
+def schedule_renditions(instance, field='photo'):
+    """
+    Dipanggil dari post_save: antrekan pembuatan rendition untuk upload baru
+    """
+    pending = instance.__dict__.get('_renditions_pending')
+    if not pending or field not in pending:
+        return
+    pending.discard(field)
+    model = instance._meta.label
+    enqueue(build_renditions_task, {'model': model, 'pk': instance.pk, 'field': field},
+            dedupe_key=f'renditions:{model}:{instance.pk}:{field}')
+
+
+@task('images.build_renditions', max_attempts=3)
+def build_renditions_task(model, pk, field='photo'):
+    manager = apps.get_model(model)._default_manager
+    obj = manager.filter(pk=pk).first()
+    if obj is None or not getattr(obj, field):
+        return
+    original = getattr(obj, field).name
+    width, height = process_existing(obj, field)
+
+    def _save():
+        # Foto diganti selama rendition dibuat → ukuran ini milik file lama; job
+        # untuk file baru sudah antre, rendition file lama dibuang
+        if manager.filter(pk=pk).values_list(field, flat=True).first() != original:
+            delete_renditions(getattr(obj, field).storage, original)
+            return
+        setattr(obj, f'{field}_width', width)
+        setattr(obj, f'{field}_height', height)
+        # save() (bukan update) supaya signal model jalan: versi restoran / cache user ikut diperbarui
+        fields = [f'{field}_width', f'{field}_height']
+        fields += [name for name in ('updated_at',) if hasattr(obj, name)]
+        obj.save(update_fields=fields)
+
+    # BEGIN IMMEDIATE: nama file tidak bisa berubah antara pengecekan dan save
+    run_write(_save, op='renditions_save')
+
+
+def process_existing(instance, field='photo'):
+    """
+    Untuk file yang sudah tersimpan (backfill): rendition + ukuran, tanpa
+    mengubah file asli. Mengembalikan (width, height).
+    """
+    fieldfile = getattr(instance, field)
+    image = ImageOps.exif_transpose(_open(fieldfile))
+    build_renditions(fieldfile.storage, fieldfile.name, image)
+    return image.size
+
+
+def renditions(fieldfile, width, height):
+    """
+    {nama: [(url, lebar, mime), ...]} untuk template; ukuran dihitung,
+    bukan dibaca dari file.
+    """
+    result = {}
+    for name in RENDITIONS:
+        w, _ = rendition_size(width, height, name)
+        result[name] = [(fieldfile.storage.url(rendition_name(fieldfile.name, name, ext)), w, mime)
+                        for ext, _, mime, _ in FORMATS]
+    return result
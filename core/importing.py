@@ -0,0 +1,275 @@
+# core/importing.py
+"""
+Reader tabel (CSV/XLSX) bersama untuk command import: encoding & delimiter
+ditebak sekali dari sampel awal file, lalu baris di-stream per chunk
+(modul csv / openpyxl read-only), jadi memori tetap datar untuk file besar.
+File .npz hasil tahap clean (core.columnar) dibaca langsung dari array bertipe.
+"""
+import codecs
+import csv
+import os
+import queue
+from itertools import islice
+
+from django.db import connections
+
+ENCODINGS = ("utf-8-sig", "utf-8", "cp1252", "latin-1")
+DELIMITERS = ",;\t|"
+SAMPLE_SIZE = 64 * 1024
+
+
+class TableReadError(Exception):
+    pass
+
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def pick(cols, *cands):
+    """
+    Kolom pertama yang cocok (case-insensitive) dari daftar kandidat
+    """
+    low = {str(c).lower().strip(): c for c in cols}
+    for c in cands:
+        if c in low:
+            return low[c]
+    return None
+
+
+def sniff_csv(path, sample_size=SAMPLE_SIZE):
+    """
+    Tebak (encoding, delimiter) dari potongan awal file saja
+    """
+    with open(path, "rb") as f:
+        raw = f.read(sample_size)
+    if not raw:
+        raise TableReadError(f"File kosong: {path}")
+
+    text = None
+    for encoding in ENCODINGS:
+        try:
+            # final=False: karakter multibyte yang terpotong di ujung sampel bukan error
+            text = codecs.getincrementaldecoder(encoding)().decode(raw, final=False)
+            break
+        except UnicodeDecodeError:
+            continue
+
+    # Buang baris terakhir yang mungkin terpotong
+    lines = text.splitlines()
+    if len(lines) > 1 and len(raw) == sample_size:
+        lines = lines[:-1]
+    sample = "\n".join(lines)
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        # Sniffer gagal (mis. hanya satu baris): pilih kandidat terbanyak di header
+        header = lines[0] if lines else ""
+        delimiter = max(DELIMITERS, key=header.count)
+    return encoding, delimiter
+
+
+class TableReader:
+    """
+    reader = TableReader(path)
+    reader.columns          → nama kolom dari baris header
+    for rows in reader.chunks(5000): ...   (list of tuple, panjang = len(columns))
+
+    Sel kosong jadi None. Baris CSV dengan kolom lebih banyak dari header
+    dilewati (dihitung di `bad_rows`, dan diteruskan ke `on_bad_row` kalau
+    di-set), yang kurang diisi None.
+    """
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise TableReadError(f"File not found: {path}")
+        self.path = path
+        self.ext = os.path.splitext(path)[1].lower()
+        self.bad_rows = 0
+        self.on_bad_row = None
+        self.encoding = self.delimiter = None
+        if self.ext == ".xls":
+            raise TableReadError("Format .xls lama tidak didukung; simpan ulang sebagai .xlsx atau .csv")
+        if self.ext == ".npz":
+            self.columns = self._load_columnar()
+            return
+        if self.ext not in (".xlsx", ".xlsm"):
+            self.encoding, self.delimiter = sniff_csv(path)
+        self.columns = self._read_header()
+
+    def _load_columnar(self):
+        from .columnar import ColumnarError, read_table
+
+        try:
+            self.schema, self.arrays = read_table(self.path)
+        except (ColumnarError, ValueError, OSError) as e:
+            raise TableReadError(str(e))
+        return list(self.arrays)
+
+    def _read_header(self):
+        for header in self._raw_rows():
+            columns = [str(c).strip() if c is not None else "" for c in header]
+            if len(columns) < 2:
+                raise TableReadError(f"Hanya {len(columns)} kolom terbaca dari {self.path}")
+            return columns
+        raise TableReadError(f"File kosong: {self.path}")
+
+    def _raw_rows(self):
+        if self.ext == ".npz":
+            # Header + baris dari array; tolist() → tipe Python (float/int/str), NaN → None
+            yield self.columns
+            values = [[None if v != v else v for v in array.tolist()] for array in self.arrays.values()]
+            yield from zip(*values)
+        elif self.encoding is None:
+            from openpyxl import load_workbook
+
+            wb = load_workbook(self.path, read_only=True, data_only=True)
+            try:
+                yield from wb.worksheets[0].iter_rows(values_only=True)
+            finally:
+                wb.close()
+        else:
+            with open(self.path, encoding=self.encoding, newline="") as f:
+                yield from csv.reader(f, delimiter=self.delimiter)
+
+    def __iter__(self):
+        width = len(self.columns)
+        rows = self._raw_rows()
+        next(rows, None)  # header
+        for row in rows:
+            if len(row) > width:
+                # Sel kosong di ujung kanan xlsx tetap dihitung openpyxl; hanya CSV yang dianggap rusak
+                if self.encoding is not None or any(v is not None for v in row[width:]):
+                    self.bad_rows += 1
+                    if self.on_bad_row is not None:
+                        self.on_bad_row(row)
+                    continue
+                row = row[:width]
+            values = tuple(None if v == "" else v for v in row)
+            if all(v is None for v in values):
+                continue
+            if len(values) < width:
+                values += (None,) * (width - len(values))
+            yield values
+
+    def estimate_rows(self):
+        """
+        Perkiraan jumlah baris data (untuk ETA), tanpa parse isi file.
+        CSV: hitung newline (bisa lebih kalau ada sel multi-baris).
+        """
+        try:
+            if self.ext == ".npz":
+                return self.schema["rows"]
+            if self.encoding is None:
+                from openpyxl import load_workbook
+
+                wb = load_workbook(self.path, read_only=True)
+                try:
+                    max_row = wb.worksheets[0].max_row
+                finally:
+                    wb.close()
+                return max(max_row - 1, 0) if max_row else None
+            newline = "\n".encode(self.encoding.replace("-sig", ""))
+            lines, last = 0, b""
+            with open(self.path, "rb") as f:
+                while block := f.read(1024 * 1024):
+                    lines += block.count(newline)
+                    last = block
+            if last and not last.endswith(newline):
+                lines += 1  # baris terakhir tanpa newline
+            return max(lines - 1, 0)  # tanpa header
+        except Exception:
+            return None
+
+    def chunks(self, size=5000, start=0):
+        # start: lewati baris data yang sudah diproses (resume dari checkpoint)
+        return chunked(islice(self, start, None), size)
+
+
+def _parse_file(path, start, parse_fn, chunk_size):
+    rows = 0
+    try:
+        reader = TableReader(path)
+        for chunk in reader.chunks(chunk_size, start):
+            rows += len(chunk)
+            yield "rows", path, len(chunk), parse_fn(reader.columns, chunk)
+        yield "done", path, rows, reader.bad_rows, None
+    except Exception as e:
+        yield "done", path, rows, 0, f"{type(e).__name__}: {e}"
+
+
+def _parse_worker(tasks, results, parse_fn, chunk_size):
+    # Jalan di proses worker: baca + normalisasi saja, tidak menyentuh database
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        for message in _parse_file(*task, parse_fn, chunk_size):
+            results.put(message)
+
+
+def parallel_parse(paths, parse_fn, workers=1, chunk_size=5000, queue_size=None):
+    """
+    Parse banyak file secara paralel di process pool, hasilnya di-stream ke
+    pemanggil (satu-satunya penulis ke database). `paths` berisi path atau
+    (path, baris_awal) untuk resume. Menghasilkan tuple:
+
+      ("rows", path, jumlah_baris_chunk, parse_fn(columns, chunk))
+      ("done", path, jumlah_baris, baris_rusak, error_atau_None)
+
+    Chunk dari satu file selalu datang berurutan.
+
+    Antrian hasil dibatasi (`queue_size`, default 2 × workers): kalau penulis
+    lambat, worker otomatis menunggu (backpressure). `parse_fn` harus fungsi
+    level modul supaya bisa dikirim ke proses lain. Jangan dipanggil di
+    dalam transaction.atomic(): koneksi ditutup sebelum fork.
+    """
+    tasks_list = [p if isinstance(p, tuple) else (p, 0) for p in paths]
+    if workers <= 1 or len(tasks_list) <= 1:
+        # Tanpa proses tambahan: urutan & hasil sama persis
+        for path, start in tasks_list:
+            yield from _parse_file(path, start, parse_fn, chunk_size)
+        return
+
+    import multiprocessing
+
+    # fork: worker mewarisi modul yang sudah di-import (termasuk parse_fn)
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context("fork" if "fork" in methods else None)
+    workers = min(workers, len(tasks_list))
+    tasks = ctx.Queue()
+    results = ctx.Queue(maxsize=queue_size or workers * 2)
+    for task in tasks_list:
+        tasks.put(task)
+    for _ in range(workers):
+        tasks.put(None)
+
+    procs = [ctx.Process(target=_parse_worker, args=(tasks, results, parse_fn, chunk_size), daemon=True)
+             for _ in range(workers)]
+    # Tepat sebelum fork: koneksi DB induk (yang mungkin baru dipakai pemanggil)
+    # jangan ikut diwariskan ke worker; induk membuka koneksi baru saat perlu
+    connections.close_all()
+    for proc in procs:
+        proc.start()
+    pending = len(tasks_list)
+    try:
+        while pending:
+            try:
+                message = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(proc.is_alive() for proc in procs):
+                    raise RuntimeError("Semua worker parse berhenti sebelum file selesai diproses")
+                continue
+            if message[0] == "done":
+                pending -= 1
+            yield message
+    finally:
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+            proc.join()
@@ -0,0 +1,157 @@
+# core/jobs.py
+"""
+Kerangka job import bersama: baca file per chunk mulai dari checkpoint,
+commit per chunk, laporan progres berkala (rows/s, ETA, error) dan baris
+yang ditolak ditulis ke file sidecar CSV, bukan dibuang diam-diam.
+"""
+import csv
+import os
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .ledger import Checkpoint
+from .metrics import record_import
+
+REPORT_INTERVAL = 5.0  # detik
+
+
+def _duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+class Progress:
+    """
+    Laporan progres berkala ke stdout command. `total` boleh None (tanpa ETA).
+    """
+
+    def __init__(self, stdout, total=None, interval=REPORT_INTERVAL, start=0):
+        self.stdout = stdout
+        self.total = total
+        self.interval = interval
+        self.start = start
+        self.done = start
+        self.errors = 0
+        self.started = self._last = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return (self.done - self.start) / max(self.elapsed, 1e-6)
+
+    def update(self, rows, errors=0, force=False):
+        self.done += rows
+        self.errors += errors
+        now = time.monotonic()
+        if force or now - self._last >= self.interval:
+            self._last = now
+            self.stdout.write(self.line())
+
+    def line(self):
+        text = f"  {self.done}"
+        if self.total:
+            text += f"/{self.total} rows ({min(self.done / self.total, 1):.0%})"
+        else:
+            text += " rows"
+        text += f", {self.rate:.0f} rows/s"
+        if self.total and self.rate > 0 and self.done < self.total:
+            text += f", ETA {_duration((self.total - self.done) / self.rate)}"
+        return text + f", errors={self.errors}"
+
+
+class ImportJob:
+    """
+    job = ImportJob("import_reviews", "reviews", reader, stdout=self.stdout)
+    if job.finished: ...                         # file sama sudah selesai diimport
+    for rows in job.chunks(5000):
+        with transaction.atomic():
+            ... tulis data ...
+            job.reject(row, "alasan")            # baris ditolak → sidecar
+            job.advance(len(rows), created=n)    # checkpoint, di transaksi yang sama
+    job.finish()
+
+    Reject ditahan per chunk dan baru ditulis ke sidecar setelah transaksinya
+    commit, jadi resume setelah crash tidak menggandakan isi sidecar.
+    """
+
+    def __init__(self, name, source, reader, stdout, resume=True, interval=REPORT_INTERVAL, reject_dir=None):
+        self.name = name
+        self.reader = reader
+        self.checkpoint = Checkpoint(source, reader.path, resume=resume)
+        self.counts = {}
+        self.rejected = 0
+        self._pending = []
+        reject_dir = reject_dir or os.path.join(settings.BASE_DIR, "var", "import_rejects")
+        base = os.path.splitext(os.path.basename(reader.path))[0]
+        self.reject_path = os.path.join(reject_dir, f"{source}-{base}.rejects.csv")
+        if not self.checkpoint.offset and os.path.exists(self.reject_path):
+            os.remove(self.reject_path)  # mulai dari awal → sidecar lama tidak berlaku
+        self.progress = Progress(stdout, total=reader.estimate_rows(), interval=interval,
+                                 start=self.checkpoint.offset)
+        # Baris CSV rusak (kolom lebih banyak dari header) juga masuk sidecar
+        reader.on_bad_row = lambda row: self.reject(row, "kolom lebih banyak dari header")
+
+    @property
+    def finished(self):
+        return self.checkpoint.finished
+
+    @property
+    def offset(self):
+        return self.checkpoint.offset
+
+    def chunks(self, size):
+        return self.reader.chunks(size, self.checkpoint.offset)
+
+    def reject(self, row, reason):
+        self._pending.append(list(row) + [reason])
+
+    def advance(self, rows, **counts):
+        """
+        Panggil di dalam transaksi chunk: checkpoint + counter ikut commit bersama data
+        """
+        pending, self._pending = self._pending, []
+        counts = {name: value for name, value in counts.items() if value}
+        if pending:
+            counts["rejected"] = counts.get("rejected", 0) + len(pending)
+        self.checkpoint.advance(rows, **counts)
+
+        def committed():
+            self._write_rejects(pending)
+            for name, value in counts.items():
+                self.counts[name] = self.counts.get(name, 0) + value
+            self.progress.update(rows, errors=len(pending))
+
+        transaction.on_commit(committed)
+
+    def _write_rejects(self, rows):
+        if not rows:
+            return
+        os.makedirs(os.path.dirname(self.reject_path), exist_ok=True)
+        new_file = not os.path.exists(self.reject_path)
+        with open(self.reject_path, "a", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(list(self.reader.columns) + ["reject_reason"])
+            writer.writerows(rows)
+        self.rejected += len(rows)
+
+    def finish(self):
+        # Reject yang muncul setelah chunk terakhir (mis. baris rusak di ujung file)
+        pending, self._pending = self._pending, []
+        if pending:
+            with transaction.atomic():
+                self.checkpoint.advance(0, rejected=len(pending))
+            self._write_rejects(pending)
+            self.progress.update(0, errors=len(pending))
+        self.checkpoint.finish()
+        rows = self.progress.done - self.progress.start
+        record_import(self.name, rows, self.progress.elapsed, errors=self.rejected)
+        if self.rejected:
+            self.progress.stdout.write(f"  {self.rejected} rejected rows → {self.reject_path}")
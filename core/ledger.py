@@ -0,0 +1,111 @@
+# core/ledger.py
+"""
+Ledger import (key stabil + hash isi per baris sumber) dan checkpoint per
+file. Import ulang hanya menulis baris yang baru/berubah, dan bisa lanjut
+dari offset terakhir yang sudah di-commit setelah crash.
+"""
+import hashlib
+import json
+import os
+
+from .importing import chunked
+from .models import ImportCheckpoint, ImportRecord
+
+NEW, CHANGED, UNCHANGED = 'new', 'changed', 'unchanged'
+
+
+def content_hash(*values):
+    raw = json.dumps(values, default=str, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+def file_fingerprint(path):
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+class Ledger:
+    """
+    ledger = Ledger('reviews')
+    status = ledger.classify({key: hash, ...})   → {key: (NEW|CHANGED|UNCHANGED, object_id)}
+    ledger.record([(key, hash, object_id), ...]) → simpan setelah data ditulis
+    """
+
+    def __init__(self, source):
+        self.source = source
+
+    def classify(self, hashes):
+        known = {}
+        for keys in chunked(list(hashes), 500):
+            known.update(
+                (key, (h, object_id)) for key, h, object_id in
+                ImportRecord.objects.filter(source=self.source, key__in=keys)
+                                    .values_list('key', 'content_hash', 'object_id')
+            )
+        status = {}
+        for key, h in hashes.items():
+            if key not in known:
+                status[key] = (NEW, None)
+            elif known[key][0] != h:
+                status[key] = (CHANGED, known[key][1])
+            else:
+                status[key] = (UNCHANGED, known[key][1])
+        return status
+
+    def record(self, entries):
+        ImportRecord.objects.bulk_create(
+            [ImportRecord(source=self.source, key=key, content_hash=h, object_id=object_id)
+             for key, h, object_id in entries],
+            update_conflicts=True,
+            unique_fields=['source', 'key'],
+            update_fields=['content_hash', 'object_id', 'updated_at'],
+            batch_size=500,
+        )
+
+    def clear(self):
+        ImportRecord.objects.filter(source=self.source).delete()
+        ImportCheckpoint.objects.filter(source=self.source).delete()
+
+
+class Checkpoint:
+    """
+    Offset baris (setelah header) yang sudah di-commit untuk satu file.
+    Panggil advance() DI DALAM transaksi chunk yang sama dengan datanya,
+    supaya checkpoint dan data selalu konsisten.
+    """
+
+    def __init__(self, source, path, resume=True):
+        path = os.path.abspath(path)
+        fingerprint = file_fingerprint(path)
+        self.obj, _ = ImportCheckpoint.objects.get_or_create(
+            source=source, path=path, defaults={'fingerprint': fingerprint}
+        )
+        if not resume or self.obj.fingerprint != fingerprint:
+            # File berubah (atau diminta mulai ulang): mulai dari awal, ledger yang menyaring
+            self.obj.fingerprint = fingerprint
+            self.obj.offset = 0
+            self.obj.counts = {}
+            self.obj.finished = False
+            self.obj.save()
+
+    @property
+    def offset(self):
+        return self.obj.offset
+
+    @property
+    def finished(self):
+        return self.obj.finished
+
+    @property
+    def counts(self):
+        return dict(self.obj.counts)
+
+    def advance(self, rows, **counts):
+        self.obj.offset += rows
+        for name, value in counts.items():
+            self.obj.counts[name] = self.obj.counts.get(name, 0) + value
+        self.obj.save(update_fields=['offset', 'counts', 'updated_at'])
+
+    def finish(self):
+        self.obj.finished = True
+        self.obj.save(update_fields=['finished', 'updated_at'])
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.backends import forget_user
+from accounts.models import Profile
+from core.images import IMAGE_ERRORS, process_existing
+from restaurants.models import Menu, Restaurant, bump_restaurant_versions
+from reviews.models import Review
+
+# nama → (model, cara ambil restaurant_id untuk bump versi / None)
+MODELS = {
+    "restaurants": (Restaurant, "pk"),
+    "menus": (Menu, "restaurant_id"),
+    "reviews": (Review, "restaurant_id"),
+    "profiles": (Profile, None),
+}
+
+
+class Command(BaseCommand):
+    help = ("Buat rendition (thumb/card/hero, WebP + JPEG) dan catat ukuran untuk foto yang sudah ada "
+            "sebelum pipeline gambar; upload baru sudah diproses otomatis")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--models", nargs="+", choices=sorted(MODELS), default=list(MODELS))
+        parser.add_argument("--force", action="store_true", help="Buat ulang juga foto yang sudah punya rendition")
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        total = 0
+        for name in opts["models"]:
+            model, restaurant_attr = MODELS[name]
+            queryset = model.objects.exclude(photo="").exclude(photo=None)
+            if not opts["force"]:
+                queryset = queryset.filter(photo_width=None)
+
+            done = failed = 0
+            touched = set()
+            for obj in queryset.order_by("pk").iterator(chunk_size=200):
+                try:
+                    width, height = process_existing(obj)
+                except IMAGE_ERRORS as e:
+                    failed += 1
+                    self.stderr.write(f"  {name} #{obj.pk} {obj.photo.name}: {e}")
+                    continue
+                # update(), bukan save(): tanpa signal dan tanpa memproses ulang file
+                model.objects.filter(pk=obj.pk).update(photo_width=width, photo_height=height)
+                if restaurant_attr:
+                    touched.add(getattr(obj, restaurant_attr))
+                if model is Profile:
+                    forget_user(obj.user_id)  # salinan User + Profile di cache auth
+                done += 1
+            # HTML halaman restoran berubah (srcset) → ETag lama tidak berlaku
+            bump_restaurant_versions(touched)
+            total += done
+            self.stdout.write(f"  {name}: {done} processed, {failed} failed")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Renditions built for {total} photos in {elapsed:.1f}s ({total / max(elapsed, 1e-6):.1f} photos/s)"
+        ))
@@ -0,0 +1,172 @@
+import glob
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import Bookmark
+from core.columnar import SCHEMA_VERSION, write_table
+from core.models import UserActivity
+from restaurants.models import Menu, Restaurant
+from reviews.models import Review
+
+DEFAULT_DIR = os.path.join(settings.BASE_DIR, "var", "snapshots")
+
+
+def _changed_since(*fields):
+    # Baris yang salah satu kolom waktunya >= since
+    def build(since):
+        q = Q()
+        for field in fields:
+            q |= Q(**{f"{field}__gte": since})
+        return q
+    return build
+
+
+# tabel → (queryset, kolom, filter inkremental). Menu/Review yang diedit ikut
+# terbawa lewat restaurant.updated_at (signal menaikkan versi restorannya).
+TABLES = {
+    "restaurants": (Restaurant.objects.all(),
+                    ("id", "external_id", "name", "address", "latitude", "longitude", "rating",
+                     "description", "photo", "version", "created_at", "updated_at"),
+                    _changed_since("updated_at")),
+    "menus": (Menu.objects.all(),
+              ("id", "restaurant_id", "name", "price", "description", "photo", "created_at"),
+              _changed_since("created_at", "restaurant__updated_at")),
+    "reviews": (Review.objects.all(),
+                ("id", "restaurant_id", "user_id", "rating", "comment", "photo", "created_at"),
+                _changed_since("created_at", "restaurant__updated_at")),
+    "bookmarks": (Bookmark.objects.all(),
+                  ("id", "user_id", "restaurant_id", "created_at"),
+                  _changed_since("created_at")),
+    "user_activity": (UserActivity.objects.all(),
+                      ("id", "user_id", "restaurant_id", "activity_type", "search_query", "timestamp"),
+                      _changed_since("timestamp")),
+}
+
+
+class Command(BaseCommand):
+    help = ("Export snapshot konsisten (restoran, menu, review, bookmark, aktivitas) ke file kolomnar .npz "
+            "per chunk + manifest.json, untuk analitik tanpa query ke database live")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--out", default=DEFAULT_DIR, help="Folder induk snapshot")
+        parser.add_argument("--chunk-size", type=int, default=50000, help="Baris per file part (batas memori)")
+        parser.add_argument("--since", default=None,
+                            help="Inkremental: ISO datetime, atau 'last' = waktu snapshot terakhir di --out")
+        parser.add_argument("--tables", nargs="+", choices=sorted(TABLES), default=list(TABLES))
+
+    def handle(self, *args, **opts):
+        chunk_size = max(1, opts["chunk_size"])
+        since = self._since(opts["since"], opts["out"])
+        started = time.monotonic()
+
+        # Semua tabel dibaca dalam satu transaksi baca → satu snapshot konsisten
+        with transaction.atomic():
+            # BEGIN SQLite baru mengunci snapshot baca di SELECT pertama: kunci dulu, baru
+            # ambil waktunya, supaya snapshot_at tidak lebih awal dari data yang dibaca
+            # (kalau tidak, baris yang commit di antaranya terlewat juga oleh `--since last`)
+            Restaurant.objects.exists()
+            snapshot_at = timezone.now()
+            # Mikrodetik: dua export di detik yang sama (cron + manual) tidak berbagi folder
+            name = snapshot_at.strftime("%Y%m%dT%H%M%S.%f") + ("-incr" if since else "")
+            final_dir = os.path.join(opts["out"], name)
+            work_dir = final_dir + ".tmp"
+            # exist_ok=False: folder kerja yang sudah ada milik export lain → gagal, jangan ditimpa
+            try:
+                os.makedirs(work_dir)
+            except FileExistsError:
+                raise CommandError(f"{work_dir} sudah ada; export lain sedang berjalan?")
+
+            manifest = {
+                "format": "npz",
+                "schema_version": SCHEMA_VERSION,
+                "snapshot_at": snapshot_at.isoformat(),
+                "since": since.isoformat() if since else None,
+                "tables": {},
+            }
+            try:
+                for table in opts["tables"]:
+                    manifest["tables"][table] = self._export(table, work_dir, chunk_size, since)
+            except BaseException:
+                shutil.rmtree(work_dir, ignore_errors=True)
+                raise
+
+        with open(os.path.join(work_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        # Rename terakhir: folder snapshot hanya muncul kalau sudah lengkap
+        if os.path.exists(final_dir):
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise CommandError(f"{final_dir} sudah ada")
+        os.replace(work_dir, final_dir)
+
+        elapsed = time.monotonic() - started
+        total = sum(t["rows"] for t in manifest["tables"].values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {final_dir}: {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-6):.0f} rows/s)"
+        ))
+
+    def _since(self, value, out_dir):
+        if not value:
+            return None
+        if value == "last":
+            manifests = sorted(p for p in glob.glob(os.path.join(out_dir, "*", "manifest.json"))
+                               if not os.path.dirname(p).endswith(".tmp"))
+            if not manifests:
+                raise CommandError(f"Belum ada snapshot di {out_dir}; jalankan tanpa --since dulu")
+            with open(manifests[-1], encoding="utf-8") as f:
+                value = json.load(f)["snapshot_at"]
+        since = parse_datetime(value)
+        if since is None:
+            try:
+                since = datetime.fromisoformat(value)
+            except ValueError:
+                raise CommandError(f"--since tidak valid: {value!r}")
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def _export(self, table, work_dir, chunk_size, since):
+        """
+        Stream satu tabel (values_list().iterator) ke part-NNNNN.npz; memori
+        dibatasi satu chunk.
+        """
+        queryset, fields, changed = TABLES[table]
+        if since is not None:
+            queryset = queryset.filter(changed(since))
+        # Decimal (harga) → float64 supaya kolomnya bertipe angka
+        decimals = [f for f in fields if isinstance(queryset.model._meta.get_field(f), models.DecimalField)]
+        os.makedirs(os.path.join(work_dir, table))
+
+        parts, rows, buffer = [], 0, []
+
+        def flush():
+            frame = pd.DataFrame.from_records(buffer, columns=fields)
+            for col in decimals:
+                frame[col] = frame[col].astype("float64")
+            path = os.path.join(table, f"part-{len(parts):05d}.npz")
+            write_table(os.path.join(work_dir, path), frame, table)
+            parts.append({"file": path, "rows": len(buffer),
+                          "bytes": os.path.getsize(os.path.join(work_dir, path))})
+            buffer.clear()
+
+        for row in queryset.order_by("pk").values_list(*fields).iterator(chunk_size=chunk_size):
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                rows += len(buffer)
+                flush()
+        if buffer or not parts:
+            rows += len(buffer)
+            flush()
+
+        self.stdout.write(f"  {table}: {rows} rows, {len(parts)} part(s)")
+        return {"columns": list(fields), "rows": rows, "parts": parts}
@@ -0,0 +1,217 @@
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urlencode
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.synthetic import (
+    CATEGORIES, DEFAULT_PASSWORD, REVIEW_CLOSERS, REVIEW_OPENERS, SEARCHES, USERNAME_PREFIX,
+)
+
+# (endpoint, bobot) — kira-kira pola trafik asli: banyak baca, sedikit tulis
+DEFAULT_MIX = [
+    ('home', 25),
+    ('search', 15),
+    ('explore_recommendation', 10),
+    ('explore_all', 10),
+    ('explore_near_you', 5),
+    ('explore_saved', 5),
+    ('detail', 25),
+    ('write_review', 5),
+]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Session:
+    """
+    Satu 'browser': cookie jar sendiri, login sekali, lalu kirim request.
+    """
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies))
+
+    def _csrf(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, path, data=None):
+        url = f"{self.base_url}{path}"
+        headers = {'Accept-Encoding': 'identity'}
+        body = None
+        if data is not None:
+            data = {**data, 'csrfmiddlewaretoken': self._csrf()}
+            body = urlencode(data).encode()
+            headers['Referer'] = url
+        req = Request(url, data=body, headers=headers)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                payload = resp.read()
+                return resp.status, payload
+        except HTTPError as e:
+            return e.code, e.read()
+
+    def login(self, username, password):
+        self.request('/accounts/login/')
+        status, _ = self.request('/accounts/login/', {'username': username, 'password': password})
+        return status == 200 and any(c.name == 'sessionid' for c in self.cookies)
+
+
+class Command(BaseCommand):
+    help = ("Load test HTTP konkuren terhadap server yang sedang jalan (runserver/gunicorn). "
+            "Jalankan `seed_synthetic` dulu supaya user loaduser<n> tersedia.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL server")
+        parser.add_argument("--concurrency", type=int, default=8, help="Jumlah worker (thread) paralel")
+        parser.add_argument("--duration", type=float, default=30.0, help="Lama test dalam detik")
+        parser.add_argument("--users", type=int, default=50, help="Jumlah akun loaduser<n> yang dipakai")
+        parser.add_argument("--anonymous", type=float, default=0.3, help="Porsi worker tanpa login")
+        parser.add_argument("--no-writes", action="store_true", help="Jangan kirim POST review")
+        parser.add_argument("--timeout", type=float, default=30.0)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--json", dest="json_path", default=None, help="Simpan hasil ke file JSON")
+
+    def handle(self, *args, **opts):
+        base_url = opts["url"]
+        resto_ids = self._restaurant_ids(base_url, opts["timeout"])
+        if not resto_ids:
+            raise CommandError("Tidak ada restoran dari /api/restaurants/. Sudah jalankan seed_synthetic?")
+
+        mix = [(name, weight) for name, weight in DEFAULT_MIX
+               if not (opts["no_writes"] and name == 'write_review')]
+        names = [name for name, _ in mix]
+        weights = [weight for _, weight in mix]
+
+        timings = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+        deadline = time.monotonic() + opts["duration"]
+
+        def worker(index):
+            rng = random.Random(opts["seed"] * 1000 + index)
+            session = Session(base_url, opts["timeout"])
+            logged_in = False
+            if rng.random() >= opts["anonymous"]:
+                username = f"{USERNAME_PREFIX}{rng.randrange(max(opts['users'], 1))}"
+                logged_in = session.login(username, DEFAULT_PASSWORD)
+                if not logged_in:
+                    with lock:
+                        errors['login'] += 1
+
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                if not logged_in and name in ('explore_saved', 'explore_recommendation', 'write_review'):
+                    # Tab ini kosong/redirect untuk anonim; ganti ke halaman publik
+                    name = 'explore_all'
+                path, data = self._build(name, rng, resto_ids)
+                t0 = time.perf_counter()
+                try:
+                    status, _ = session.request(path, data)
+                except (URLError, OSError):
+                    status = None
+                elapsed = time.perf_counter() - t0
+                with lock:
+                    timings[name].append(elapsed * 1000)
+                    if status is None or status >= 400:
+                        errors[name] += 1
+
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(opts["concurrency"])]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.monotonic() - started
+
+        self._report(timings, errors, wall, opts)
+
+    def _restaurant_ids(self, base_url, timeout):
+        ids, cursor = [], None
+        session = Session(base_url, timeout)
+        while len(ids) < 2000:
+            path = '/api/restaurants/?fields=id&limit=100'
+            if cursor:
+                path += f"&cursor={quote(cursor)}"
+            try:
+                status, body = session.request(path)
+            except (URLError, OSError) as e:
+                raise CommandError(f"Server tidak bisa dihubungi: {e}")
+            if status != 200:
+                break
+            data = json.loads(body)
+            ids.extend(row['id'] for row in data['results'])
+            cursor = data.get('next')
+            if not cursor:
+                break
+        return ids
+
+    def _build(self, name, rng, resto_ids):
+        if name == 'home':
+            return '/', None
+        if name == 'search':
+            params = {'q': rng.choice(SEARCHES)}
+            if rng.random() < 0.3:
+                params['category'] = rng.choice(CATEGORIES)
+            if rng.random() < 0.3:
+                params['min_rating'] = rng.choice([3, 4])
+            return f"/?{urlencode(params)}", None
+        if name.startswith('explore_'):
+            return f"/explore/?tab={name[len('explore_'):]}", None
+        if name == 'detail':
+            return f"/restaurants/detail/{rng.choice(resto_ids)}/", None
+        # write_review: kalau sudah pernah review, view me-redirect (tetap terhitung sukses)
+        return f"/reviews/write/{rng.choice(resto_ids)}/", {
+            'rating': rng.randint(1, 5),
+            'comment': f"{rng.choice(REVIEW_OPENERS)}, {rng.choice(REVIEW_CLOSERS)}",
+        }
+
+    def _report(self, timings, errors, wall, opts):
+        self.stdout.write(
+            f"{opts['concurrency']} workers, {wall:.1f}s, target {opts['url']}\n"
+            f"{'endpoint':<24}{'count':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}"
+        )
+        summary = {}
+        total = 0
+        for name, _ in DEFAULT_MIX:
+            values = sorted(timings.get(name, []))
+            if not values:
+                continue
+            total += len(values)
+            row = {
+                'count': len(values),
+                'rps': len(values) / wall,
+                'p50': statistics.median(values),
+                'p95': _percentile(values, 95),
+                'p99': _percentile(values, 99),
+                'errors': errors.get(name, 0),
+            }
+            summary[name] = row
+            self.stdout.write(
+                f"{name:<24}{row['count']:>8}{row['rps']:>9.1f}{row['p50']:>9.1f}"
+                f"{row['p95']:>9.1f}{row['p99']:>9.1f}{row['errors']:>8}"
+            )
+        self.stdout.write(f"{'total':<24}{total:>8}{total / wall:>9.1f}")
+        if errors.get('login'):
+            self.stderr.write(self.style.WARNING(f"{errors['login']} login gagal"))
+
+        if opts["json_path"]:
+            with open(opts["json_path"], 'w', encoding='utf-8') as f:
+                json.dump({'wall_seconds': wall, 'concurrency': opts['concurrency'], 'endpoints': summary}, f, indent=2)
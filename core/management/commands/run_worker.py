@@ -0,0 +1,70 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils.module_loading import autodiscover_modules
+
+from core.tasks import POLL_INTERVAL, periodic_tasks, schedule_periodic, work
+
+
+def _run_process(worker_id, stop, poll, once):
+    # Sinyal cukup ditangani induk (yang men-set `stop`); handler warisan fork
+    # yang memanggil stop.set() di sini bisa deadlock dengan stop.wait()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    work(worker_id, stop, poll, once)
+
+
+class Command(BaseCommand):
+    help = ("Jalankan worker antrean job background (tabel task di SQLite, tanpa broker). "
+            "Ctrl-C / SIGTERM: job yang sedang jalan diselesaikan dulu")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Jumlah worker paralel")
+        parser.add_argument("--mode", choices=("thread", "process"), default="thread",
+                            help="thread: job I/O ringan; process: job berat CPU (mis. rendition gambar)")
+        parser.add_argument("--poll", type=float, default=POLL_INTERVAL, help="Detik menunggu saat antrean kosong")
+        parser.add_argument("--once", action="store_true", help="Kerjakan job yang jatuh tempo lalu berhenti")
+
+    def handle(self, *args, **opts):
+        # Job di <app>/tasks.py ikut terdaftar (job core sudah di-import lewat models)
+        autodiscover_modules("tasks")
+        if not opts["once"]:
+            schedule_periodic()
+
+        workers = max(1, opts["workers"])
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        if opts["mode"] == "process":
+            # fork: koneksi DB induk tidak boleh terbawa ke proses anak
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            stop = context.Event()
+            runners = [context.Process(target=_run_process, args=(f"{prefix}-p{i}", stop, opts["poll"], opts["once"]))
+                       for i in range(workers)]
+        else:
+            stop = threading.Event()
+            runners = [threading.Thread(target=work, args=(f"{prefix}-t{i}", stop, opts["poll"], opts["once"]),
+                                        name=f"worker-{i}")
+                       for i in range(workers)]
+
+        def shutdown(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        started = time.monotonic()
+        periodic = ", ".join(sorted(periodic_tasks())) or "-"
+        self.stdout.write(f"{workers} {opts['mode']} worker(s) running (periodic: {periodic})")
+        for runner in runners:
+            runner.start()
+        # join dengan timeout supaya sinyal tetap diterima thread utama
+        while any(runner.is_alive() for runner in runners):
+            for runner in runners:
+                runner.join(timeout=0.5)
+        self.stdout.write(self.style.SUCCESS(f"Workers stopped after {time.monotonic() - started:.1f}s"))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.synthetic import DEFAULT_PASSWORD, USERNAME_PREFIX, generate
+
+
+class Command(BaseCommand):
+    help = "Isi database dengan dataset sintetis (restoran Jakarta, menu, user, review, reply, bookmark, aktivitas) untuk load test"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--restaurants", type=int, default=500)
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--reviews-per-restaurant", type=int, default=20)
+        parser.add_argument("--menus-per-restaurant", type=int, default=8)
+        parser.add_argument("--replies-per-review", type=float, default=0.3, help="Peluang satu review punya reply")
+        parser.add_argument("--bookmarks-per-user", type=int, default=10)
+        parser.add_argument("--activities-per-user", type=int, default=30)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        counts = generate(
+            restaurants=opts["restaurants"],
+            users=opts["users"],
+            reviews_per_restaurant=opts["reviews_per_restaurant"],
+            menus_per_restaurant=opts["menus_per_restaurant"],
+            replies_per_review=opts["replies_per_review"],
+            bookmarks_per_user=opts["bookmarks_per_user"],
+            activities_per_user=opts["activities_per_user"],
+            seed=opts["seed"],
+            stdout=self.stdout,
+        )
+        elapsed = time.monotonic() - started
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Synthetic dataset created: {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-6):.0f} rows/s)"
+        ))
+        self.stdout.write(f"Login: {USERNAME_PREFIX}<n> / {DEFAULT_PASSWORD}")
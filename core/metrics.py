@@ -0,0 +1,281 @@
+# core/metrics.py
+"""
+Registry metrik in-process (counter + histogram bucket tetap) yang aman untuk
+banyak worker gunicorn: tiap proses menulis snapshot-nya sendiri ke
+METRICS_DIR/<pid>.json, dan endpoint /metrics menjumlahkan semua file itu.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa compaction snapshot proses mati
+    fcntl = None
+
+from django.conf import settings
+
+# Detik; cocok untuk latensi view (5ms .. 10s)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FLUSH_INTERVAL = 2.0
+
+# Snapshot gabungan proses yang sudah mati (lihat Registry._compact)
+COMPACTED = 'dead.json'
+
+
+def _label_key(labels):
+    return tuple(sorted((str(k), str(v)) for k, v in (labels or {}).items()))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # ada, tapi milik user lain
+    return True
+
+
+def _read_snapshot(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(merged, data):
+    """
+    Tambahkan satu snapshot ke `merged` = (counters, histograms, buckets, help)
+    """
+    counters, histograms, buckets, help_texts = merged
+    buckets.update({n: tuple(b) for n, b in data.get('buckets', {}).items()})
+    help_texts.update(data.get('help', {}))
+    for n, labels, value in data.get('counters', []):
+        key = (n, tuple(tuple(x) for x in labels))
+        counters[key] = counters.get(key, 0) + value
+    for n, labels, hist in data.get('histograms', []):
+        key = (n, tuple(tuple(x) for x in labels))
+        if key not in histograms:
+            histograms[key] = list(hist)
+        elif len(histograms[key]) == len(hist):
+            histograms[key] = [a + b for a, b in zip(histograms[key], hist)]
+
+
+def _write_json(directory, name, data):
+    # File temp unik per penulis, lalu rename atomik: pembaca tidak pernah melihat file setengah jadi
+    with tempfile.NamedTemporaryFile('w', dir=directory, prefix=f'.{name}.', suffix='.tmp',
+                                     encoding='utf-8', delete=False) as f:
+        json.dump(data, f)
+    try:
+        os.replace(f.name, os.path.join(directory, name))
+    except OSError:
+        os.unlink(f.name)
+        raise
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ''
+    escaped = []
+    for key, value in items:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+class Registry:
+    def __init__(self, directory=None):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._directory = directory
+        self._counters = {}      # (name, labels) -> float
+        self._histograms = {}    # (name, labels) -> [bucket counts..., +Inf, sum]
+        self._buckets = {}       # name -> tuple(batas atas)
+        self._help = {}
+        self._last_flush = 0.0
+        self._pid = os.getpid()
+
+    @property
+    def directory(self):
+        if self._directory is None:
+            self._directory = str(getattr(settings, 'METRICS_DIR', None) or
+                                  os.path.join(tempfile.gettempdir(), 'peekmap-metrics'))
+        return self._directory
+
+    def inc(self, name, amount=1, labels=None, help_text=''):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            if help_text:
+                self._help.setdefault(name, help_text)
+        self._maybe_flush()
+
+    def observe(self, name, value, labels=None, buckets=DEFAULT_BUCKETS, help_text=''):
+        key = (name, _label_key(labels))
+        with self._lock:
+            bounds = self._buckets.setdefault(name, tuple(buckets))
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [0] * (len(bounds) + 1) + [0.0]
+            hist[bisect_left(bounds, value)] += 1
+            hist[-1] += value
+            if help_text:
+                self._help.setdefault(name, help_text)
+        self._maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[n, list(l), v] for (n, l), v in self._counters.items()],
+                'histograms': [[n, list(l), list(h)] for (n, l), h in self._histograms.items()],
+                'buckets': {n: list(b) for n, b in self._buckets.items()},
+                'help': dict(self._help),
+            }
+
+    # --- multi-proses ---------------------------------------------------
+
+    def _maybe_flush(self):
+        now = time.monotonic()
+        # Thread lain sedang flush → lewati, snapshot berikutnya tetap membawa angka ini
+        if now - self._last_flush >= FLUSH_INTERVAL and self._flush_lock.acquire(blocking=False):
+            try:
+                self._flush()
+            finally:
+                self._flush_lock.release()
+
+    def reset_after_fork(self):
+        # Worker hasil fork mulai dari nol dan menulis ke file <pid> sendiri
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._counters.clear()
+        self._histograms.clear()
+        self._last_flush = 0.0
+        self._pid = os.getpid()
+
+    def flush(self):
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            _write_json(self.directory, f"{self._pid}.json", self.snapshot())
+        except OSError:
+            pass
+
+    def _compact(self):
+        """
+        Snapshot <pid>.json dari proses yang sudah mati digabung ke dead.json
+        lalu dihapus: total counter tetap, tapi file tidak menumpuk selamanya.
+        flock → hanya satu proses yang melakukan compaction pada satu waktu.
+        """
+        if fcntl is None:
+            return
+        try:
+            with open(os.path.join(self.directory, '.compact.lock'), 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                dead = [name for name in os.listdir(self.directory)
+                        if name.endswith('.json') and name[:-5].isdigit()
+                        and int(name[:-5]) != self._pid and not _pid_alive(int(name[:-5]))]
+                if not dead:
+                    return
+                merged = ({}, {}, {}, {})
+                for name in [COMPACTED] + dead:
+                    data = _read_snapshot(os.path.join(self.directory, name))
+                    if data:
+                        _merge(merged, data)
+                counters, histograms, buckets, help_texts = merged
+                _write_json(self.directory, COMPACTED, {
+                    'counters': [[n, list(l), v] for (n, l), v in counters.items()],
+                    'histograms': [[n, list(l), h] for (n, l), h in histograms.items()],
+                    'buckets': {n: list(b) for n, b in buckets.items()},
+                    'help': help_texts,
+                })
+                for name in dead:
+                    os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def collect(self):
+        """
+        Gabungkan snapshot semua proses (termasuk proses ini yang paling baru)
+        """
+        self.flush()
+        self._compact()
+        merged = ({}, {}, {}, {})
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            names = []
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            data = _read_snapshot(os.path.join(self.directory, name))
+            if data:
+                _merge(merged, data)
+        return merged
+
+    def render_prometheus(self):
+        counters, histograms, buckets, help_texts = self.collect()
+        lines = []
+
+        for name in sorted({n for n, _ in counters}):
+            if name in help_texts:
+                lines.append(f"# HELP {name} {help_texts[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for name in sorted({n for n, _ in histograms}):
+            bounds = buckets.get(name, DEFAULT_BUCKETS)
+            if name in help_texts:
+                lines.append(f"# HELP {name} {help_texts[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for (n, labels), hist in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(bounds, hist):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                cumulative += hist[len(bounds)]
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {hist[-1]}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+atexit.register(registry.flush)
+os.register_at_fork(after_in_child=registry.reset_after_fork)
+
+
+def inc(name, amount=1, labels=None, help_text=''):
+    registry.inc(name, amount, labels, help_text)
+
+
+def observe(name, value, labels=None, buckets=DEFAULT_BUCKETS, help_text=''):
+    registry.observe(name, value, labels, buckets, help_text)
+
+
+def record_cache(namespace, hit):
+    # hit: True/False, atau string hasil ('hit', 'miss', 'stale')
+    result = hit if isinstance(hit, str) else ('hit' if hit else 'miss')
+    inc('cache_requests_total', labels={'namespace': namespace, 'result': result},
+        help_text='Cache lookups by namespace and result')
+
+
+def record_import(job, rows, seconds, errors=0):
+    inc('import_rows_total', rows, labels={'job': job}, help_text='Rows processed by import commands')
+    inc('import_errors_total', errors, labels={'job': job}, help_text='Rows rejected by import commands')
+    inc('import_seconds_total', seconds, labels={'job': job}, help_text='Wall time spent in import commands')
@@ -0,0 +1,186 @@
+# core/middleware.py
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger('core.instrumentation')
+
+_current_stats = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """
+    Angka-angka untuk satu request: query, waktu DB, waktu template, SQL kembar
+    """
+
+    def __init__(self, slow_query_ms):
+        self.slow_query_ms = slow_query_ms
+        self.query_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.view_started = None
+        self.view_time = None
+        self.sql_counts = defaultdict(int)
+
+    def __call__(self, execute, sql, params, many, context):
+        # Dipasang lewat connection.execute_wrapper()
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.query_count += 1
+            self.db_time += duration
+            self.sql_counts[sql] += 1
+            if duration * 1000 >= self.slow_query_ms:
+                logger.warning('slow query %.1fms (%s): %s', duration * 1000, context['connection'].alias, sql[:500])
+
+    def duplicates(self, threshold):
+        # SQL yang sama persis (parameter beda) dijalankan berulang → tanda N+1
+        return sorted(
+            ((sql, n) for sql, n in self.sql_counts.items() if n >= threshold),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+
+def _install_template_timer():
+    """
+    Bungkus render template Django sekali saja, supaya waktu render
+    tercatat ke request yang sedang aktif (kalau ada).
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, '_instrumented', False):
+        return
+    original = Template.render
+
+    def render(self, *args, **kwargs):
+        stats = _current_stats.get()
+        if stats is None:
+            return original(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            stats.template_time += time.perf_counter() - start
+
+    render._instrumented = True
+    Template.render = render
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Hitung query & waktu DB/template/view per request, kirim sebagai header
+    Server-Timing dan satu baris log JSON. Taruh paling atas di MIDDLEWARE
+    agar query session/auth ikut terhitung.
+
+    Setting:
+      INSTRUMENTATION_SAMPLE_RATE  (0.0–1.0, default 1.0)
+      SLOW_QUERY_THRESHOLD_MS      (default 100)
+      N_PLUS_ONE_THRESHOLD         (default 3 query identik)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'INSTRUMENTATION_SAMPLE_RATE', 1.0)
+        self.slow_query_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100)
+        self.duplicate_threshold = getattr(settings, 'N_PLUS_ONE_THRESHOLD', 3)
+        _install_template_timer()
+
+    def __call__(self, request):
+        # Tidak ter-sample: langsung lewat, hampir tanpa overhead
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return self.get_response(request)
+
+        stats = RequestStats(self.slow_query_ms)
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        total = time.perf_counter() - start
+        if stats.view_started is not None:
+            stats.view_time = time.perf_counter() - stats.view_started
+
+        self._report(request, response, stats, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.view_started = time.perf_counter()
+        return None
+
+    def _report(self, request, response, stats, total):
+        duplicates = stats.duplicates(self.duplicate_threshold)
+        timings = [
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.query_count} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+        ]
+        if stats.view_time is not None:
+            timings.append(f'view;dur={stats.view_time * 1000:.1f}')
+        timings.append(f'total;dur={total * 1000:.1f}')
+        if duplicates:
+            timings.append(f'dup;desc="{sum(n for _, n in duplicates)} repeated"')
+        response.headers['Server-Timing'] = ', '.join(timings)
+
+        match = getattr(request, 'resolver_match', None)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': stats.query_count,
+            'db_ms': round(stats.db_time * 1000, 2),
+            'template_ms': round(stats.template_time * 1000, 2),
+            'view_ms': round(stats.view_time * 1000, 2) if stats.view_time is not None else None,
+            'total_ms': round(total * 1000, 2),
+        }
+        if duplicates:
+            record['duplicates'] = [{'sql': sql[:300], 'count': n} for sql, n in duplicates[:5]]
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+
+
+class MetricsMiddleware:
+    """
+    Catat throughput & histogram latensi per view ke core.metrics.
+    Tab explore dicatat terpisah (label `tab`).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None or match.view_name == 'core:metrics':
+            return response
+        labels = {
+            'view': match.view_name,
+            'method': request.method,
+            'tab': request.GET.get('tab', 'recommendation') if match.view_name == 'core:explore' else '',
+        }
+        metrics.observe('http_request_duration_seconds', elapsed, labels=labels,
+                        help_text='Request latency per view')
+        metrics.inc('http_requests_total', labels={**labels, 'status': response.status_code},
+                    help_text='Requests per view and status code')
+        return response
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from django.contrib.auth.models import User
 from restaurants.models import Restaurant
 
@@ -25,3 +27,88 @@ class UserActivity(models.Model):
         verbose_name = 'User Activity'
         verbose_name_plural = 'User Activities'
         ordering = ['-timestamp']
+
+
+class ImportRecord(models.Model):
+    """
+    Ledger import: satu baris per baris sumber (source + key stabil) dengan
+    hash isinya, supaya import ulang bisa melewati baris yang tidak berubah.
+    """
+    source = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=40)
+    object_id = models.PositiveBigIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}:{self.key}"
+
+    class Meta:
+        db_table = 'import_record'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'key'], name='import_record_source_key_uniq'),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Posisi terakhir yang sudah di-commit untuk satu file sumber
+    """
+    source = models.CharField(max_length=50)
+    path = models.CharField(max_length=500)
+    fingerprint = models.CharField(max_length=64)
+    offset = models.PositiveBigIntegerField(default=0)
+    counts = models.JSONField(default=dict)
+    finished = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}:{self.path} @ {self.offset}"
+
+    class Meta:
+        db_table = 'import_checkpoint'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'path'], name='import_checkpoint_source_path_uniq'),
+        ]
+
+
+class Task(models.Model):
+    """
+    Antrean job background (core/tasks.py), dijalankan oleh `manage.py run_worker`
+    """
+    PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # Job dengan dedupe_key sama tidak bisa antre dua kali selama masih pending; selama
+    # running boleh antre satu lagi, supaya perubahan di tengah eksekusi tetap diproses
+    dedupe_key = models.CharField(max_length=200, null=True, blank=True)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    class Meta:
+        db_table = 'task'
+        constraints = [
+            models.UniqueConstraint(fields=['dedupe_key'], condition=Q(status='pending'),
+                                    name='task_pending_dedupe_key_uniq'),
+        ]
+        indexes = [
+            # Worker: ambil job pending yang sudah jatuh tempo, urut run_at
+            models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'),
+        ]
@@ -0,0 +1,174 @@
+# core/pagination.py
+import base64
+import json
+from datetime import date, datetime
+from functools import cached_property
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+
+def _json_default(value):
+    # isoformat penuh (termasuk mikrodetik) supaya perbandingan keyset tetap tepat
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tidak bisa encode {type(value).__name__} ke cursor")
+
+
+def encode_cursor(values, direction='next'):
+    """
+    Encode (sort key, id) terakhir jadi token opaque yang aman untuk URL
+    """
+    payload = json.dumps({'d': direction, 'v': list(values)}, default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Kebalikan encode_cursor. Token rusak/asing dianggap None (halaman pertama)
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        direction, values = payload['d'], payload['v']
+    except (ValueError, TypeError, KeyError):
+        return None
+    if direction not in ('next', 'previous') or not isinstance(values, list):
+        return None
+    return direction, values
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+class CursorPaginator:
+    """
+    Keyset pagination: WHERE (sort key, id) > (nilai terakhir) ... LIMIT n.
+    Tanpa COUNT(*) dan tanpa OFFSET, jadi biaya tiap halaman sama saja
+    seberapa jauh pun halamannya. `ordering` harus unik secara total
+    (akhiri dengan 'id') dan kolomnya tidak boleh NULL.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('id',)):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [f.lstrip('-') for f in self.ordering]
+
+    def _keyset_filter(self, values, reverse=False):
+        # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y)
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            descending = field.startswith('-') != reverse
+            name = field.lstrip('-')
+            lookup = f"{name}__lt" if descending else f"{name}__gt"
+            clause = Q(**{lookup: values[i]})
+            for prev_name, prev_value in zip(self.fields[:i], values[:i]):
+                clause &= Q(**{prev_name: prev_value})
+            condition |= clause
+        return condition
+
+    def _reversed_ordering(self):
+        return [f[1:] if f.startswith('-') else f"-{f}" for f in self.ordering]
+
+    def _cursor_for(self, obj, direction):
+        # Baris bisa berupa model atau dict hasil .values()
+        if isinstance(obj, dict):
+            return encode_cursor([obj[f] for f in self.fields], direction)
+        return encode_cursor([getattr(obj, f) for f in self.fields], direction)
+
+    def _clean_values(self, values):
+        """
+        Nilai cursor dikonversi ke tipe kolomnya (to_python). Cursor yang
+        diutak-atik (tipe salah, null, dict) → None, jadi halaman pertama.
+        """
+        if len(values) != len(self.fields):
+            return None
+        cleaned = []
+        for name, value in zip(self.fields, values):
+            if value is None or isinstance(value, (dict, list)):
+                return None
+            try:
+                cleaned.append(self.queryset.model._meta.get_field(name).to_python(value))
+            except FieldDoesNotExist:
+                cleaned.append(value)
+            except (ValidationError, TypeError, ValueError):
+                return None
+        return cleaned
+
+    def page(self, cursor=None):
+        decoded = decode_cursor(cursor) if isinstance(cursor, str) else None
+        if decoded:
+            values = self._clean_values(decoded[1])
+            decoded = (decoded[0], values) if values is not None else None
+
+        if decoded is None:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_more, rows = len(rows) > self.per_page, rows[:self.per_page]
+            next_cursor = self._cursor_for(rows[-1], 'next') if has_more else None
+            return CursorPage(rows, next_cursor=next_cursor)
+
+        direction, values = decoded
+        if direction == 'next':
+            qs = self.queryset.filter(self._keyset_filter(values)).order_by(*self.ordering)
+            rows = list(qs[:self.per_page + 1])
+            has_more, rows = len(rows) > self.per_page, rows[:self.per_page]
+            next_cursor = self._cursor_for(rows[-1], 'next') if has_more and rows else None
+            previous_cursor = self._cursor_for(rows[0], 'previous') if rows else None
+            return CursorPage(rows, next_cursor=next_cursor, previous_cursor=previous_cursor)
+
+        # Mundur: balik urutan, ambil n+1, lalu balik lagi hasilnya
+        qs = self.queryset.filter(self._keyset_filter(values, reverse=True)).order_by(*self._reversed_ordering())
+        rows = list(qs[:self.per_page + 1])
+        has_more, rows = len(rows) > self.per_page, rows[:self.per_page]
+        rows.reverse()
+        previous_cursor = self._cursor_for(rows[0], 'previous') if has_more and rows else None
+        next_cursor = self._cursor_for(rows[-1], 'next') if rows else None
+        return CursorPage(rows, next_cursor=next_cursor, previous_cursor=previous_cursor)
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator nomor halaman biasa, tapi jumlah total diambil dari `count`
+    (angka atau queryset tanpa anotasi) supaya tidak perlu COUNT(*) di atas
+    query GROUP BY yang berat.
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count_source = count
+
+    @cached_property
+    def count(self):
+        if self._count_source is None:
+            return super().count
+        if isinstance(self._count_source, int):
+            return self._count_source
+        return self._count_source.count()
@@ -63,7 +63,7 @@ def get_user_preferences(user):
 
     for review in reviews:
         if review.rating >= 4:
-            high_rated_resto_ids.add(review.restaurant.id)
+            high_rated_resto_ids.add(review.restaurant_id)
         # Ekstrak kata kunci sederhana
         comment = review.comment.lower()
         words = comment.split()
@@ -108,15 +108,25 @@ def simple_recommendation(user):
     exclude_ids = set(reviewed_ids) | prefs['bookmarked']
     candidates = all_resto.exclude(id__in=exclude_ids)
 
+    # Nama restoran pembanding diambil sekali di depan, bukan per kandidat
+    high_rated_names = [
+        name.lower() for name in
+        Restaurant.objects.filter(id__in=prefs['high_rated']).values_list('name', flat=True)
+    ]
+    viewed_counts = activity_prefs.get('viewed_restaurants', {}) if activity_prefs else {}
+    viewed_names = {
+        resto_id: name.lower() for resto_id, name in
+        Restaurant.objects.filter(id__in=viewed_counts).values_list('id', 'name')
+    }
+
     # Skor rekomendasi
     scored = []
     for resto in candidates:
         score = 0.0
 
         # 1. Jika restoran mirip dengan yang pernah di-rate tinggi (sederhana: nama mengandung kata umum)
-        for hr_id in prefs['high_rated']:
-            hr = Restaurant.objects.get(id=hr_id)
-            if hr.name.lower() in resto.name.lower() or resto.name.lower() in hr.name.lower():
+        for hr_name in high_rated_names:
+            if hr_name in resto.name.lower() or resto.name.lower() in hr_name:
                 score += 2.0
 
         # 2. Kata kunci dari komentar
@@ -140,10 +150,10 @@ def simple_recommendation(user):
         # 5. Boost berdasarkan activity tracking
         if activity_prefs:
             # Boost jika user sering view restaurant serupa
-            for viewed_id, view_count in activity_prefs.get('viewed_restaurants', {}).items():
+            for viewed_id, view_count in viewed_counts.items():
                 if viewed_id != resto.id:
-                    viewed_resto = Restaurant.objects.filter(id=viewed_id).first()
-                    if viewed_resto and viewed_resto.name.lower() in resto.name.lower():
+                    viewed_name = viewed_names.get(viewed_id)
+                    if viewed_name and viewed_name in resto.name.lower():
                         score += view_count * 0.5
                         
             # Boost berdasarkan search keywords
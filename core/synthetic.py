@@ -0,0 +1,160 @@
+# core/synthetic.py
+"""
+Generator dataset sintetis (restoran area Jakarta, menu, user, review
+berbahasa Indonesia, reply, bookmark, aktivitas) untuk load test & tes
+budget query. Deterministik untuk `seed` yang sama.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Bookmark, Profile
+from restaurants.models import Menu, Restaurant
+from reviews.models import Review, ReviewReply
+
+from .models import UserActivity
+
+USERNAME_PREFIX = 'loaduser'
+DEFAULT_PASSWORD = 'peekmap-load'
+
+# (nama wilayah, lat, lng) kira-kira pusat tiap kota administrasi
+AREAS = [
+    ('Jakarta Pusat', -6.186486, 106.834091),
+    ('Jakarta Barat', -6.168329, 106.758239),
+    ('Jakarta Selatan', -6.266155, 106.813194),
+    ('Jakarta Utara', -6.121435, 106.774124),
+    ('Jakarta Timur', -6.225014, 106.900447),
+]
+STREETS = ['Jl. Sudirman', 'Jl. Thamrin', 'Jl. Gatot Subroto', 'Jl. Kemang Raya', 'Jl. Panglima Polim',
+           'Jl. Sabang', 'Jl. Pluit Raya', 'Jl. Kelapa Gading', 'Jl. Tebet Raya', 'Jl. Senopati']
+PREFIXES = ['Warung', 'Rumah Makan', 'Kedai', 'Depot', 'Bakmi', 'Sate', 'Soto', 'Nasi Goreng', 'Kopi', 'Dapur']
+OWNERS = ['Pak Budi', 'Bu Sri', 'Mang Ujang', 'Cik Lina', 'Bang Jali', 'Mbok Darmi', 'Koh Ahong', 'Uda Rizal']
+CATEGORIES = ['Indonesia', 'China', 'Jepang', 'Western', 'Fast Food', 'Italian']
+DISHES = ['Nasi Goreng Spesial', 'Mie Ayam Bakso', 'Sate Ayam', 'Soto Betawi', 'Gado-gado', 'Rendang',
+          'Ayam Geprek', 'Bakso Urat', 'Es Teh Manis', 'Es Jeruk', 'Kopi Susu', 'Pisang Goreng',
+          'Ramen', 'Sushi Roll', 'Spaghetti Carbonara', 'Burger Keju', 'Dimsum', 'Capcay']
+REVIEW_OPENERS = ['Makanannya enak banget', 'Rasanya lumayan', 'Pelayanannya cepat', 'Tempatnya nyaman',
+                  'Harganya murah', 'Porsinya besar', 'Agak mahal tapi sepadan', 'Sambalnya pedas mantap']
+REVIEW_CLOSERS = ['pasti balik lagi!', 'cocok buat makan bareng keluarga.', 'parkirnya agak susah.',
+                  'pas jam makan siang ramai sekali.', 'recommended buat yang suka pedas.',
+                  'tapi pelayanannya lambat.', 'minumannya juga segar.', 'lezat dan bersih.']
+REPLIES = ['Setuju, enak banget!', 'Terima kasih infonya kak', 'Wah jadi pengen coba',
+           'Kemarin saya ke sana juga, memang ramai', 'Menu apa yang paling recommended?']
+SEARCHES = ['sate', 'bakso', 'kopi', 'nasi goreng', 'ramen', 'soto', 'pedas', 'murah']
+
+
+def _bulk(model, objs, batch_size=1000):
+    model.objects.bulk_create(objs, batch_size=batch_size)
+
+
+@transaction.atomic
+def generate(restaurants=100, users=50, reviews_per_restaurant=10, menus_per_restaurant=8,
+             replies_per_review=0.3, bookmarks_per_user=5, activities_per_user=20, seed=42, stdout=None):
+    """
+    Buat dataset sintetis. Return dict jumlah baris per tabel.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    def log(msg):
+        if stdout is not None:
+            stdout.write(msg)
+
+    # --- Users (hash password sekali saja; PBKDF2 per user terlalu lambat) ---
+    password = make_password(DEFAULT_PASSWORD)
+    start = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+    new_users = [
+        User(username=f"{USERNAME_PREFIX}{start + i}", email=f"{USERNAME_PREFIX}{start + i}@example.com",
+             password=password)
+        for i in range(users)
+    ]
+    _bulk(User, new_users)
+    user_ids = [u.pk for u in new_users]
+    # bulk_create tidak memicu post_save, jadi Profile dibuat manual
+    _bulk(Profile, [Profile(user_id=uid, location=rng.choice(AREAS)[0]) for uid in user_ids])
+    log(f"users: {len(user_ids)}")
+
+    # --- Restaurants ---
+    restos = []
+    for i in range(restaurants):
+        area, lat, lng = rng.choice(AREAS)
+        category = rng.choice(CATEGORIES)
+        restos.append(Restaurant(
+            name=f"{rng.choice(PREFIXES)} {rng.choice(OWNERS)} {i + 1}",
+            address=f"{rng.choice(STREETS)} No. {rng.randint(1, 250)}, {area}",
+            latitude=round(lat + rng.uniform(-0.03, 0.03), 6),
+            longitude=round(lng + rng.uniform(-0.03, 0.03), 6),
+            rating=round(rng.uniform(3.0, 5.0), 1),
+            description=f"{category} - {rng.choice(DISHES)}",
+        ))
+    _bulk(Restaurant, restos)
+    resto_ids = [r.pk for r in restos]
+    log(f"restaurants: {len(resto_ids)}")
+
+    # --- Menus ---
+    menus = [
+        Menu(restaurant_id=rid, name=dish, price=Decimal(rng.randrange(8, 150) * 1000),
+             description=f"{dish} khas {rng.choice(OWNERS)}")
+        for rid in resto_ids
+        for dish in rng.sample(DISHES, min(menus_per_restaurant, len(DISHES)))
+    ]
+    _bulk(Menu, menus)
+    log(f"menus: {len(menus)}")
+
+    # --- Reviews (maks. satu per user per restoran) ---
+    reviews = []
+    per_resto = min(reviews_per_restaurant, len(user_ids))
+    for rid in resto_ids:
+        for uid in rng.sample(user_ids, per_resto):
+            reviews.append(Review(
+                user_id=uid, restaurant_id=rid, rating=rng.choices([1, 2, 3, 4, 5], [1, 2, 4, 6, 5])[0],
+                comment=f"{rng.choice(REVIEW_OPENERS)}, {rng.choice(REVIEW_CLOSERS)}",
+                created_at=now - timedelta(minutes=rng.randint(0, 525600)),
+            ))
+    _bulk(Review, reviews)
+    review_rows = [r.pk for r in reviews]
+    log(f"reviews: {len(review_rows)}")
+
+    # --- Replies ---
+    replies = [
+        ReviewReply(review_id=review_id, user_id=rng.choice(user_ids), reply_text=rng.choice(REPLIES))
+        for review_id in review_rows
+        if rng.random() < replies_per_review
+    ]
+    _bulk(ReviewReply, replies)
+    log(f"replies: {len(replies)}")
+
+    # --- Bookmarks ---
+    bookmarks = [
+        Bookmark(user_id=uid, restaurant_id=rid)
+        for uid in user_ids
+        for rid in rng.sample(resto_ids, min(bookmarks_per_user, len(resto_ids)))
+    ]
+    _bulk(Bookmark, bookmarks)
+    log(f"bookmarks: {len(bookmarks)}")
+
+    # --- Activity ---
+    activities = []
+    for uid in user_ids:
+        for _ in range(activities_per_user):
+            if rng.random() < 0.7:
+                activities.append(UserActivity(user_id=uid, restaurant_id=rng.choice(resto_ids), activity_type='view'))
+            else:
+                activities.append(UserActivity(user_id=uid, activity_type='search', search_query=rng.choice(SEARCHES)))
+    _bulk(UserActivity, activities)
+    log(f"activities: {len(activities)}")
+
+    return {
+        'users': len(user_ids),
+        'restaurants': len(resto_ids),
+        'menus': len(menus),
+        'reviews': len(review_rows),
+        'replies': len(replies),
+        'bookmarks': len(bookmarks),
+        'activities': len(activities),
+    }
@@ -0,0 +1,241 @@
+# core/tasks.py
+"""
+Antrean job background di tabel SQLite (core.models.Task), tanpa broker:
+
+  @task('images.build_renditions', max_attempts=3)
+  def build_renditions(model, pk): ...
+
+  enqueue('images.build_renditions', {'model': 'reviews.Review', 'pk': 1},
+          dedupe_key='renditions:reviews.Review:1', delay=10)
+
+Job dijalankan oleh `manage.py run_worker`. Gagal → dicoba lagi dengan
+backoff eksponensial sampai max_attempts; job `every=` dijadwalkan ulang
+sendiri setelah selesai. dedupe_key hanya menahan job yang masih pending:
+selama job running, enqueue dengan key sama membuat job baru. TASKS_EAGER = True menjalankan job langsung saat
+enqueue (tanpa worker).
+"""
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import metrics
+from .writes import run_write
+
+logger = logging.getLogger('core.tasks')
+
+MAX_ATTEMPTS = 5
+BASE_DELAY = 10        # detik, dikali 2 tiap percobaan gagal
+MAX_DELAY = 3600
+LOCK_TIMEOUT = 600     # detik; job 'running' lebih lama dari ini dianggap worker-nya mati
+POLL_INTERVAL = 1.0
+KEEP_DONE_DAYS = 7
+
+# nama → (fungsi, max_attempts, every)
+_registry = {}
+
+
+def task(name, max_attempts=MAX_ATTEMPTS, every=None):
+    """
+    Daftarkan fungsi sebagai job. `every` (detik / timedelta) = job periodik.
+    Fungsinya tetap bisa dipanggil langsung.
+    """
+    if isinstance(every, timedelta):
+        every = every.total_seconds()
+
+    def decorator(func):
+        _registry[name] = (func, max_attempts, every)
+        func.task_name = name
+        return func
+    return decorator
+
+
+def periodic_tasks():
+    return {name: every for name, (_, _, every) in _registry.items() if every}
+
+
+def enqueue(name, kwargs=None, *, dedupe_key=None, delay=None, run_at=None):
+    """
+    Antrekan job `name` (atau fungsi @task) dengan argumen `kwargs` (harus JSON).
+    Mengembalikan Task, atau None kalau job dengan dedupe_key sama masih pending.
+    Di dalam transaksi, job ikut commit/rollback bersama data pemanggil.
+    """
+    from .models import Task
+
+    name = getattr(name, 'task_name', name)
+    if name not in _registry:
+        raise LookupError(f'task tidak terdaftar: {name}')
+    kwargs = kwargs or {}
+    if getattr(settings, 'TASKS_EAGER', False):
+        _registry[name][0](**kwargs)
+        return None
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    try:
+        return run_write(Task.objects.create, op='task_enqueue', name=name, kwargs=kwargs,
+                         dedupe_key=dedupe_key, run_at=run_at, max_attempts=_registry[name][1])
+    except IntegrityError:
+        if dedupe_key is None:
+            raise
+        return None
+
+
+def schedule_periodic():
+    """
+    Pastikan tiap job periodik punya satu antrean (dipanggil saat worker start)
+    """
+    for name in periodic_tasks():
+        enqueue(name, dedupe_key=f'periodic:{name}')
+
+
+def _backoff(attempts):
+    delay = min(MAX_DELAY, BASE_DELAY * 2 ** (attempts - 1))
+    return random.uniform(delay / 2, delay)  # jitter: job yang gagal bersamaan tidak bangun bersamaan
+
+
+def claim(worker_id):
+    """
+    Ambil satu job yang jatuh tempo (atau yang worker-nya mati) dan tandai
+    running. BEGIN IMMEDIATE (run_write) → dua worker tidak bisa mengambil job yang sama.
+    Job yang worker-nya mati dan sudah habis percobaannya ditandai failed, tidak dijalankan lagi.
+    """
+    from .models import Task
+
+    expired = []
+
+    def _claim():
+        now = timezone.now()
+        due = Q(status=Task.PENDING, run_at__lte=now) | Q(status=Task.RUNNING,
+                                                           locked_at__lt=now - timedelta(seconds=LOCK_TIMEOUT))
+        while True:
+            job = Task.objects.filter(due).order_by('run_at', 'id').first()
+            if job is None:
+                return None
+            if job.status == Task.RUNNING and job.attempts >= job.max_attempts:
+                Task.objects.filter(pk=job.pk).update(status=Task.FAILED, finished_at=now, locked_by='',
+                                                      locked_at=None, last_error='worker mati / timeout')
+                expired.append(job)
+                continue
+            Task.objects.filter(pk=job.pk).update(status=Task.RUNNING, locked_by=worker_id, locked_at=now,
+                                                  attempts=F('attempts') + 1)
+            job.status, job.locked_by, job.locked_at, job.attempts = Task.RUNNING, worker_id, now, job.attempts + 1
+            return job
+
+    job = run_write(_claim, op='task_claim')
+    for dead in expired:
+        metrics.inc('tasks_total', labels={'task': dead.name, 'result': 'failed'},
+                    help_text='Background tasks finished')
+        logger.error('task %s #%s gagal permanen: worker mati / timeout setelah %d percobaan',
+                     dead.name, dead.pk, dead.attempts)
+        _reschedule(dead)
+    return job
+
+
+def _reschedule(job):
+    # Periodik: jadwal berikutnya dihitung dari selesainya run ini
+    every = _registry.get(job.name, (None, None, None))[2]
+    if every:
+        enqueue(job.name, job.kwargs, dedupe_key=f'periodic:{job.name}', delay=every)
+
+
+def _finish(job, atomic=True, **fields):
+    """
+    Simpan hasil job, hanya kalau lock-nya masih milik worker ini. False = job
+    lewat LOCK_TIMEOUT dan sudah diambil alih (atau ditandai gagal) oleh claim();
+    status dan jadwal ulang job periodik jadi urusan pemilik lock yang baru.
+    """
+    from .models import Task
+
+    updated = run_write(Task.objects.filter(pk=job.pk, locked_by=job.locked_by).update, op='task_finish',
+                        atomic=atomic, locked_by='', locked_at=None, **fields)
+    if not updated:
+        metrics.inc('tasks_total', labels={'task': job.name, 'result': 'lost_lock'},
+                    help_text='Background tasks finished')
+        logger.warning('task %s #%s: lock %s sudah lepas (lewat %ds), hasil run ini dibuang',
+                       job.name, job.pk, job.locked_by, LOCK_TIMEOUT)
+    return bool(updated)
+
+
+def execute(job):
+    """
+    Jalankan satu job yang sudah di-claim dan simpan hasilnya
+    """
+    from .models import Task
+
+    labels = {'task': job.name}
+    started = time.monotonic()
+    func = _registry.get(job.name, (None, None, None))[0]
+    try:
+        if func is None:
+            raise LookupError(f'task tidak terdaftar: {job.name}')
+        func(**job.kwargs)
+    except Exception as e:
+        now = timezone.now()
+        error = ''.join(traceback.format_exception(e))[-4000:]
+        if job.attempts < job.max_attempts and func is not None:
+            retry_at = now + timedelta(seconds=_backoff(job.attempts))
+            try:
+                # atomic: bentrok dedupe tidak merusak transaksi luar (kalau ada)
+                if not _finish(job, status=Task.PENDING, run_at=retry_at, last_error=error):
+                    return False
+            except IntegrityError:
+                # Job baru dengan dedupe_key sama sudah pending dan akan mengerjakan ulang
+                error = f'digantikan job pending dengan dedupe_key sama\n{error}'
+            else:
+                metrics.inc('task_retries_total', labels=labels, help_text='Background task retries')
+                logger.warning('task %s #%s gagal (percobaan %d/%d), dicoba lagi %s: %s',
+                               job.name, job.pk, job.attempts, job.max_attempts, retry_at.isoformat(), e)
+                return False
+        if not _finish(job, atomic=False, status=Task.FAILED, last_error=error, finished_at=now):
+            return False
+        metrics.inc('tasks_total', labels={**labels, 'result': 'failed'}, help_text='Background tasks finished')
+        logger.error('task %s #%s gagal permanen setelah %d percobaan: %s', job.name, job.pk, job.attempts, e)
+        ok = False
+    else:
+        if not _finish(job, atomic=False, status=Task.DONE, last_error='', finished_at=timezone.now()):
+            return False
+        metrics.inc('tasks_total', labels={**labels, 'result': 'done'}, help_text='Background tasks finished')
+        ok = True
+    finally:
+        metrics.observe('task_seconds', time.monotonic() - started, labels=labels,
+                        help_text='Background task run time')
+    _reschedule(job)
+    return ok
+
+
+def work(worker_id, stop, poll=POLL_INTERVAL, once=False):
+    """
+    Loop satu worker sampai `stop` (threading/multiprocessing Event) di-set.
+    `once=True`: berhenti begitu antrean kosong.
+    """
+    while not stop.is_set():
+        close_old_connections()
+        try:
+            job = claim(worker_id)
+        except OperationalError as e:
+            logger.warning('worker %s gagal mengambil job: %s', worker_id, e)
+            job = None
+        if job is None:
+            if once:
+                break
+            stop.wait(poll)
+            continue
+        execute(job)
+    close_old_connections()
+
+
+@task('core.purge_tasks', every=timedelta(days=1))
+def purge_tasks(days=KEEP_DONE_DAYS):
+    """
+    Hapus job selesai yang lebih lama dari `days` hari (yang gagal disimpan untuk diperiksa)
+    """
+    from .models import Task
+
+    cutoff = timezone.now() - timedelta(days=days)
+    Task.objects.filter(status=Task.DONE, finished_at__lt=cutoff).delete()
@@ -0,0 +1,62 @@
+# core/templatetags/images.py
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from core.images import RENDITIONS, renditions
+
+register = template.Library()
+
+
+def _dimensions(fieldfile):
+    instance, name = fieldfile.instance, fieldfile.field.name
+    return getattr(instance, f'{name}_width', None), getattr(instance, f'{name}_height', None)
+
+
+def _srcset(sets, index):
+    seen, parts = set(), []
+    for name in RENDITIONS:
+        url, width, _ = sets[name][index]
+        if width not in seen:  # gambar kecil: beberapa rendition sama lebarnya
+            seen.add(width)
+            parts.append(f'{url} {width}w')
+    return ', '.join(parts)
+
+
+@register.simple_tag
+def picture(fieldfile, size='card', sizes=None, loading='lazy', **attrs):
+    """
+    {% picture resto.photo "card" alt=resto.name class="w-full h-48 object-cover" %}
+    → <picture> dengan srcset WebP + JPEG dari rendition, lazy loading.
+    Foto yang belum punya rendition (belum diproses) tampil apa adanya.
+    """
+    if not fieldfile:
+        return ''
+    extra = format_html_join('', ' {}="{}"', attrs.items())
+    width, height = _dimensions(fieldfile)
+    if not (width and height):
+        return format_html('<img src="{}" loading="{}" decoding="async"{}>', fieldfile.url, loading, extra)
+
+    sets = renditions(fieldfile, width, height)
+    (webp_url, w, webp_mime), (jpg_url, _, _) = sets[size]
+    h = max(1, round(height * w / width))
+    sizes = sizes or f'{w}px'
+    return format_html(
+        '<picture><source type="{}" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" loading="{}" decoding="async"{}></picture>',
+        webp_mime, _srcset(sets, 0), sizes,
+        jpg_url, _srcset(sets, 1), sizes, w, h, loading, extra,
+    )
+
+
+@register.simple_tag
+def rendition_url(fieldfile, size='hero', ext='jpg'):
+    """
+    URL satu rendition (mis. untuk background-image); fallback ke file asli
+    """
+    if not fieldfile:
+        return ''
+    width, height = _dimensions(fieldfile)
+    if not (width and height):
+        return fieldfile.url
+    index = 0 if ext == 'webp' else 1
+    return renditions(fieldfile, width, height)[size][index][0]
@@ -1,3 +1,437 @@
-from django.test import TestCase
+import io
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import Count
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from restaurants.models import Restaurant
+from reviews.models import Review
+
+from .cache import Namespace
+from .images import rendition_size, strip_metadata
+from .metrics import registry
+from .models import Task, UserActivity
+from .pagination import CursorPaginator, encode_cursor
+from .synthetic import USERNAME_PREFIX, generate
+from .tasks import LOCK_TIMEOUT, claim, enqueue, execute, task
+
+# Dua ukuran data; query per halaman harus SAMA di keduanya
+SMALL = dict(restaurants=6, users=6, reviews_per_restaurant=3, menus_per_restaurant=3,
+             replies_per_review=0.5, bookmarks_per_user=2, activities_per_user=4)
+LARGE = dict(restaurants=30, users=20, reviews_per_restaurant=15, menus_per_restaurant=10,
+             replies_per_review=0.8, bookmarks_per_user=8, activities_per_user=30)
+
+# (nama, url, login?, maksimum query). Budget sudah termasuk query session/auth
+# dengan cache default (locmem): session dari DB, User + Profile satu query.
+PAGES = [
+    ('home', lambda d: '/', False, 3),
+    ('home (login)', lambda d: '/', True, 7),
+    ('search', lambda d: '/?q=a', True, 9),
+    ('search + filter', lambda d: '/?q=a&category=Indonesia&min_rating=3', True, 9),
+    ('explore recommendation', lambda d: '/explore/?tab=recommendation', True, 14),
+    ('explore top_rated', lambda d: '/explore/?tab=top_rated', True, 6),
+    ('explore near_you', lambda d: '/explore/?tab=near_you', True, 4),
+    ('explore all', lambda d: '/explore/?tab=all', True, 6),
+    ('explore all (page)', lambda d: '/explore/?tab=all&page=2', True, 7),
+    ('explore saved', lambda d: '/explore/?tab=saved', True, 6),
+    ('detail', lambda d: f"/restaurants/detail/{d['busiest']}/", False, 6),
+    ('detail (login)', lambda d: f"/restaurants/detail/{d['busiest']}/", True, 10),
+    ('detail (page)', lambda d: f"/restaurants/detail/{d['busiest']}/?page=2", True, 10),
+    ('profile', lambda d: '/accounts/profile/', True, 3),
+    ('write review', lambda d: f"/reviews/write/{d['unreviewed']}/", True, 4),
+    ('api restaurants', lambda d: '/api/restaurants/', False, 2),
+    ('api reviews', lambda d: f"/api/restaurants/{d['busiest']}/reviews/?fields=id,rating,replies", False, 3),
+]
+
+
+# Log instrumentasi per request tidak perlu di output test
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+class QueryBudgetTests(TestCase):
+    """
+    Render tiap halaman dengan data sintetis dua ukuran. Gagal kalau jumlah
+    query melewati budget, atau naik seiring bertambahnya data (N+1).
+    """
+
+    def _seed(self, size):
+        Restaurant.objects.all().delete()
+        User.objects.all().delete()
+        generate(seed=7, **size)
+        user = User.objects.get(username=f"{USERNAME_PREFIX}0")
+        self._seed_recommendation_inputs(user)
+        busiest = Restaurant.objects.annotate(n=Count('review')).order_by('-n', 'id').first()
+        unreviewed = Restaurant.objects.exclude(review__user=user).order_by('id').first()
+        return user, {'busiest': busiest.id, 'unreviewed': unreviewed.id}
+
+    def _seed_recommendation_inputs(self, user):
+        """
+        Tab rekomendasi bercabang menurut riwayat user (review rating tinggi,
+        view, pencarian) dan kosong kalau tidak ada kandidat berskor. Isi
+        riwayat itu secara eksplisit supaya cabang yang diukur sama di kedua
+        ukuran data, tidak tergantung urutan RNG di core.synthetic.
+        """
+        first = Restaurant.objects.order_by('id').first()
+        Review.objects.update_or_create(user=user, restaurant=first, defaults={'rating': 5, 'comment': 'enak'})
+        UserActivity.objects.create(user=user, restaurant=first, activity_type='view')
+        # Satu kandidat berskor > 0: punya review, belum di-review/bookmark user, namanya pernah dicari
+        candidate = Restaurant.objects.exclude(review__user=user).exclude(pk=first.pk).order_by('id').first()
+        user.bookmark_set.filter(restaurant=candidate).delete()
+        other = User.objects.exclude(pk=user.pk).order_by('id').first()
+        Review.objects.get_or_create(user=other, restaurant=candidate, defaults={'rating': 4, 'comment': 'enak'})
+        UserActivity.objects.create(user=user, activity_type='search', search_query=candidate.name)
+
+    def _measure(self, size):
+        user, data = self._seed(size)
+        counts = {}
+        for name, url, login, _ in PAGES:
+            self.client.logout()
+            if login:
+                self.client.force_login(user)
+            path = url(data)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(path)
+            # query_log di-reset tiap request_started, jadi baca sekarang
+            counts[name] = len(ctx.captured_queries)
+            self.assertEqual(response.status_code, 200, f"{name}: {path}")
+        return counts
+
+    def test_query_budgets(self):
+        small = self._measure(SMALL)
+        large = self._measure(LARGE)
+        for name, _, _, budget in PAGES:
+            with self.subTest(page=name):
+                self.assertLessEqual(large[name], budget, f"{name}: {large[name]} queries > budget {budget}")
+                self.assertEqual(
+                    small[name], large[name],
+                    f"{name}: {small[name]} queries (kecil) vs {large[name]} (besar) — kemungkinan N+1",
+                )
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+class CursorTamperingTests(TestCase):
+    """
+    Cursor yang diutak-atik (tipe salah, null, dict) → halaman pertama, bukan 500
+    """
+
+    BAD_VALUES = [['a', 'zz'], ['a', {'x': 1}], [None, None], ['a'], 'bukan list']
+
+    def setUp(self):
+        generate(seed=3, **SMALL)
+        self.user = User.objects.get(username=f"{USERNAME_PREFIX}0")
+        self.busiest = Restaurant.objects.annotate(n=Count('review')).order_by('-n', 'id').first()
+
+    def test_paginator_falls_back_to_first_page(self):
+        first = CursorPaginator(Restaurant.objects.all(), 2, ordering=('name', 'id')).page()
+        for values in self.BAD_VALUES:
+            with self.subTest(values=values):
+                token = encode_cursor(values) if isinstance(values, list) else encode_cursor([values])
+                page = CursorPaginator(Restaurant.objects.all(), 2, ordering=('name', 'id')).page(token)
+                self.assertEqual([r.id for r in page], [r.id for r in first])
+                self.assertFalse(page.has_previous)
+
+    def test_pages_with_bad_cursor(self):
+        self.client.force_login(self.user)
+        for values in self.BAD_VALUES[:3]:
+            token = encode_cursor(values)
+            for path in ('/explore/?tab=all', f'/restaurants/detail/{self.busiest.id}/', '/api/restaurants/'):
+                with self.subTest(path=path, values=values):
+                    response = self.client.get(path, {'cursor': token})
+                    self.assertEqual(response.status_code, 200)
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+class ConditionalGetTests(TestCase):
+    """
+    Versi restoran (dasar ETag) hanya naik, dan 304 tidak menyajikan token CSRF basi
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('etag', password='rahasia123')
+        self.restaurant = Restaurant.objects.create(name='Warung', address='Jakarta')
+
+    def test_stale_save_does_not_reuse_version(self):
+        stale = Restaurant.objects.get(pk=self.restaurant.pk)
+        review = Review.objects.create(user=self.user, restaurant=self.restaurant, rating=4, comment='enak')
+        review.delete()
+        seen = Restaurant.objects.get(pk=self.restaurant.pk).version
+
+        stale.name = 'Warung Baru'
+        stale.save()
+        current = Restaurant.objects.get(pk=self.restaurant.pk)
+        self.assertEqual(current.version, seen + 1)
+        self.assertEqual(stale.version, current.version)
+        self.assertEqual(current.name, 'Warung Baru')
+
+    def test_detail_etag_changes_with_csrf_token(self):
+        path = f'/restaurants/detail/{self.restaurant.pk}/'
+        self.client.force_login(self.user)
+        etag = self.client.get(path).headers['ETag']
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Login ulang → token CSRF berganti → halaman (dan form-nya) harus dirender ulang
+        self.client.logout()
+        self.client.force_login(self.user)
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+
+
+class CacheNamespaceTests(TestCase):
+    """
+    core.cache.Namespace: key, invalidate, stale-while-revalidate, single-flight, metrik
+    """
+
+    def setUp(self):
+        self.ns = Namespace(f'test-{self._testMethodName}', ttl=60, stale_ttl=60)
+        self.computed = []
+
+    def _compute(self, value):
+        def compute():
+            self.computed.append(value)
+            return value
+        return compute
+
+    def _hold_lock(self, *parts):
+        self.assertTrue(self.ns.cache.add(f'{self.ns.key(*parts)}!lock', 1))
+
+    def _counts(self):
+        counts = {'hit': 0, 'miss': 0, 'stale': 0}
+        for name, labels, value in registry.snapshot()['counters']:
+            labels = dict(labels)
+            if name == 'cache_requests_total' and labels['namespace'] == self.ns.name:
+                counts[labels['result']] += value
+        return counts
+
+    def test_parts_with_separator_do_not_collide(self):
+        self.assertNotEqual(self.ns.key('a:b'), self.ns.key('a', 'b'))
+        self.assertNotEqual(self.ns.key('a b'), self.ns.key('a', 'b'))
+        self.ns.set('a:b', value=1)
+        self.assertIsNone(self.ns.get('a', 'b'))
+        self.assertEqual(self.ns.get('a:b'), 1)
+
+    def test_invalidate_bumps_version(self):
+        self.ns.set('x', value='lama')
+        version = self.ns.version()
+        self.assertEqual(self.ns.invalidate(), version + 1)
+        self.assertIsNone(self.ns.get('x'))
+        self.assertEqual(self.ns.get_or_compute('x', self._compute('baru')), 'baru')
+
+    def test_stale_value_served_while_another_worker_recomputes(self):
+        self.ns._store(self.ns.key('x'), 'lama', -1, 60)  # lewat soft TTL, belum hard TTL
+        self._hold_lock('x')
+        self.assertEqual(self.ns.get_or_compute('x', self._compute('baru')), 'lama')
+        self.assertEqual(self.computed, [])
+
+    def test_stale_value_recomputed_by_lock_holder(self):
+        self.ns._store(self.ns.key('x'), 'lama', -1, 60)
+        self.assertEqual(self.ns.get_or_compute('x', self._compute('baru')), 'baru')
+        self.assertEqual(self.computed, ['baru'])
+        self.assertEqual(self.ns.get_or_compute('x', self._compute('lagi')), 'baru')
+
+    def test_miss_waits_for_lock_holder(self):
+        self._hold_lock('x')
+        # "Worker lain" yang memegang lock selesai menghitung sedikit kemudian
+        worker = threading.Timer(0.1, lambda: self.ns.set('x', value='dari worker lain'))
+        worker.start()
+        try:
+            self.assertEqual(self.ns.get_or_compute('x', self._compute('sendiri')), 'dari worker lain')
+        finally:
+            worker.join()
+        self.assertEqual(self.computed, [])
+
+    def test_hit_miss_stale_counters(self):
+        before = self._counts()
+        self.ns.get_or_compute('x', self._compute(1))   # miss
+        self.ns.get_or_compute('x', self._compute(2))   # hit
+        self.ns.get('y')                                # miss
+        self.ns._store(self.ns.key('x'), 1, -1, 60)
+        self.ns.get_or_compute('x', self._compute(3))   # stale
+        after = self._counts()
+        self.assertEqual({r: after[r] - before[r] for r in after}, {'hit': 1, 'miss': 2, 'stale': 1})
+
+
+
+class ImagePipelineTests(TestCase):
+    """
+    core/images.py + {% picture %}: EXIF dibuang, ukuran rendition, srcset, fallback
+    """
+
+    def _upload(self, fmt, name, frames=1):
+        exif = Image.Exif()
+        exif[0x010F] = 'Canon'          # Make
+        exif[0x8825] = {1: 'S', 2: 6.2}  # GPSInfo
+        exif[0x0112] = 6                # Orientation: putar 90°
+        buffer = io.BytesIO()
+        images = [Image.new('RGB', (64, 32), color) for color in ('red', 'blue', 'green')[:frames]]
+        images[0].save(buffer, fmt, exif=exif, save_all=frames > 1, append_images=images[1:])
+        restaurant = Restaurant(name='Warung')
+        restaurant.photo = SimpleUploadedFile(name, buffer.getvalue())
+        return restaurant.photo
+
+    def _stripped(self, fieldfile):
+        fieldfile.file.seek(0)
+        return Image.open(io.BytesIO(fieldfile.file.read()))
+
+    def test_strip_metadata_removes_exif(self):
+        photo = self._upload('JPEG', 'foto.jpg')
+        image = strip_metadata(photo)
+        self.assertEqual(image.size, (32, 64))  # orientasi sudah diterapkan
+        stripped = self._stripped(photo)
+        self.assertEqual(stripped.format, 'JPEG')
+        self.assertEqual(dict(stripped.getexif()), {})
+        self.assertEqual(stripped.size, (32, 64))
+
+    def test_strip_metadata_reencodes_mpo_as_jpeg(self):
+        photo = self._upload('MPO', 'foto.jpg', frames=2)
+        self.assertEqual(self._stripped(photo).format, 'MPO')
+        strip_metadata(photo)
+        stripped = self._stripped(photo)
+        self.assertEqual(stripped.format, 'JPEG')
+        self.assertEqual(getattr(stripped, 'n_frames', 1), 1)
+        self.assertEqual(dict(stripped.getexif()), {})
+        self.assertGreater(stripped.convert('RGB').getpixel((16, 16))[0], 200)  # frame pertama (merah)
+
+    def test_rendition_size(self):
+        self.assertEqual(rendition_size(4000, 3000, 'thumb'), (160, 120))
+        self.assertEqual(rendition_size(300, 1200, 'card'), (120, 480))
+        self.assertEqual(rendition_size(100, 50, 'hero'), (100, 50))  # tidak diperbesar
+
+    def _picture(self, restaurant, size='card'):
+        template = Template('{% load images %}{% picture resto.photo size alt="Warung" %}')
+        return template.render(Context({'resto': restaurant, 'size': size}))
+
+    def test_picture_srcset(self):
+        restaurant = Restaurant(name='Warung', photo='resto_photos/a.jpg', photo_width=1000, photo_height=500)
+        html = self._picture(restaurant)
+        base = '/media/renditions/resto_photos/a.jpg'
+        self.assertIn(f'<source type="image/webp" srcset="{base}/thumb.webp 160w, {base}/card.webp 480w, '
+                      f'{base}/hero.webp 1000w" sizes="480px">', html)
+        self.assertIn(f'<img src="{base}/card.jpg" srcset="{base}/thumb.jpg 160w, {base}/card.jpg 480w, '
+                      f'{base}/hero.jpg 1000w" sizes="480px" width="480" height="240"', html)
+        self.assertIn('alt="Warung"', html)
+
+        # Gambar kecil: semua rendition selebar aslinya → satu kandidat saja
+        restaurant.photo_width, restaurant.photo_height = 100, 50
+        self.assertIn(f'srcset="{base}/thumb.jpg 100w"', self._picture(restaurant))
+
+    def test_picture_without_renditions_uses_original(self):
+        restaurant = Restaurant(name='Warung', photo='resto_photos/a.jpg')
+        self.assertEqual(self._picture(restaurant),
+                         '<img src="/media/resto_photos/a.jpg" loading="lazy" decoding="async" alt="Warung">')
+        self.assertEqual(self._picture(Restaurant(name='Kosong')), '')
+
+
+@task('tests.noop')
+def noop_task(**kwargs):
+    pass
+
+
+@task('tests.broken', max_attempts=2)
+def broken_task():
+    raise RuntimeError('rusak')
+
+
+@task('tests.periodic', every=60)
+def periodic_task():
+    pass
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTests(TestCase):
+    """
+    Antrean job (core/tasks.py): claim, retry + backoff, dedupe, job periodik,
+    dan job yang worker-nya mati
+    """
+
+    def _make_due(self, job):
+        Task.objects.filter(pk=job.pk).update(run_at=timezone.now() - timedelta(seconds=1))
+
+    def test_claim_marks_running(self):
+        queued = enqueue(noop_task, {'x': 1})
+        job = claim('w1')
+        self.assertEqual(job.pk, queued.pk)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts, queued.locked_by), (Task.RUNNING, 1, 'w1'))
+        self.assertIsNone(claim('w2'))
+        self.assertTrue(execute(job))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.DONE)
+
+    def test_retry_with_backoff_then_failed(self):
+        queued = enqueue(broken_task)
+        self.assertFalse(execute(claim('w1')))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Task.PENDING, 1))
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn('rusak', queued.last_error)
+        self.assertIsNone(claim('w1'))  # belum jatuh tempo
+
+        self._make_due(queued)
+        self.assertFalse(execute(claim('w1')))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Task.FAILED, 2))
+        self.assertIsNotNone(queued.finished_at)
+
+    def test_dedupe_only_while_pending(self):
+        first = enqueue(broken_task, dedupe_key='k')
+        self.assertIsNotNone(first)
+        self.assertIsNone(enqueue(broken_task, dedupe_key='k'))
+
+        job = claim('w1')
+        second = enqueue(broken_task, dedupe_key='k')
+        self.assertIsNotNone(second)
+        # Gagal saat job baru sudah pending → tidak bisa kembali pending, ditandai failed
+        self.assertFalse(execute(job))
+        first.refresh_from_db()
+        self.assertEqual(first.status, Task.FAILED)
+        self.assertIn('digantikan', first.last_error)
+
+    def test_periodic_rescheduled_after_execute(self):
+        first = enqueue(periodic_task, dedupe_key='periodic:tests.periodic')
+        self.assertTrue(execute(claim('w1')))
+        first.refresh_from_db()
+        self.assertEqual(first.status, Task.DONE)
+        following = Task.objects.get(name='tests.periodic', status=Task.PENDING)
+        self.assertEqual(following.dedupe_key, 'periodic:tests.periodic')
+        self.assertGreater(following.run_at, first.finished_at + timedelta(seconds=59))
+
+    def test_stale_running_job(self):
+        stale = timezone.now() - timedelta(seconds=LOCK_TIMEOUT + 1)
+        exhausted = Task.objects.create(name='tests.noop', status=Task.RUNNING, attempts=2, max_attempts=2,
+                                        locked_by='mati', locked_at=stale, run_at=stale)
+        retried = Task.objects.create(name='tests.noop', status=Task.RUNNING, attempts=1, max_attempts=2,
+                                      locked_by='mati', locked_at=stale, run_at=stale)
+
+        job = claim('w1')
+        self.assertEqual(job.pk, retried.pk)
+        self.assertEqual((job.attempts, job.locked_by), (2, 'w1'))
+        exhausted.refresh_from_db()
+        self.assertEqual((exhausted.status, exhausted.last_error), (Task.FAILED, 'worker mati / timeout'))
+        self.assertIsNone(claim('w2'))
+
+    def test_result_dropped_after_lock_lost(self):
+        queued = enqueue(periodic_task, dedupe_key='periodic:tests.periodic')
+        slow = claim('w1')
+        # w1 lewat LOCK_TIMEOUT → job diambil alih w2 sebelum w1 selesai
+        stale = timezone.now() - timedelta(seconds=LOCK_TIMEOUT + 1)
+        Task.objects.filter(pk=queued.pk).update(locked_at=stale)
+        current = claim('w2')
+        self.assertEqual(current.pk, queued.pk)
+
+        self.assertFalse(execute(slow))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.locked_by), (Task.RUNNING, 'w2'))
+        self.assertFalse(Task.objects.filter(status=Task.PENDING).exists())  # tidak dijadwalkan ulang dua kali
+
+        self.assertTrue(execute(current))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.DONE)
+        self.assertEqual(Task.objects.filter(name='tests.periodic', status=Task.PENDING).count(), 1)
@@ -6,5 +6,6 @@ app_name = 'core'
 
 urlpatterns = [
     path('', views.home, name='home'),
-    path('explore/', views.explore, name='explore')
+    path('explore/', views.explore, name='explore'),
+    path('metrics', views.metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -1,4 +1,11 @@
+import logging
+
+from django.db import IntegrityError, OperationalError
+
 from .models import UserActivity
+from .writes import run_write
+
+logger = logging.getLogger('core.writes')
 
 
 def track_user_activity(user, activity_type, restaurant=None, search_query=None):
@@ -7,15 +14,21 @@ def track_user_activity(user, activity_type, restaurant=None, search_query=None)
     """
     if user.is_authenticated:
         try:
-            UserActivity.objects.create(
+            # Tetap inline, bukan lewat core.tasks: enqueue juga satu INSERT (ke tabel
+            # task), dan activity langsung dibaca tab rekomendasi / ETag explore.
+            # Retry kalau database terkunci (core.writes), bukan langsung hilang
+            run_write(
+                UserActivity.objects.create,
+                op='activity',
+                atomic=False,  # satu INSERT
                 user=user,
                 restaurant=restaurant,
                 activity_type=activity_type,
                 search_query=search_query
             )
-        except Exception:
-            # Fail silently to not break the main functionality
-            pass
+        except (IntegrityError, OperationalError) as e:
+            # Jangan sampai halaman gagal gara-gara tracking; tapi tercatat di log + metrik
+            logger.warning('activity %s untuk user %s tidak tersimpan: %s', activity_type, user.pk, e)
 
 
 def get_recently_viewed_restaurants(user, limit=5):
@@ -25,24 +38,26 @@ def get_recently_viewed_restaurants(user, limit=5):
     if not user.is_authenticated:
         return []
     
-    recent_activities = UserActivity.objects.filter(
+    recent_ids = UserActivity.objects.filter(
         user=user,
         activity_type='view',
         restaurant__isnull=False
-    ).select_related('restaurant').order_by('-timestamp')
-    
-    # Manual distinct untuk SQLite compatibility
-    seen_restaurants = set()
-    unique_restaurants = []
-    
-    for activity in recent_activities:
-        if activity.restaurant.id not in seen_restaurants:
-            seen_restaurants.add(activity.restaurant.id)
-            unique_restaurants.append(activity.restaurant)
-            if len(unique_restaurants) >= limit:
+    ).order_by('-timestamp').values_list('restaurant_id', flat=True)
+
+    # Manual distinct untuk SQLite compatibility (berhenti begitu cukup)
+    unique_ids = []
+    for resto_id in recent_ids.iterator(chunk_size=100):
+        if resto_id not in unique_ids:
+            unique_ids.append(resto_id)
+            if len(unique_ids) >= limit:
                 break
-    
-    return unique_restaurants
+
+    # Satu query untuk restoran + rating rata-rata, urutan tetap terbaru dulu
+    from django.db.models import Avg
+    from restaurants.models import Restaurant
+
+    restaurants = Restaurant.objects.annotate(avg_rating=Avg('review__rating')).in_bulk(unique_ids)
+    return [restaurants[resto_id] for resto_id in unique_ids if resto_id in restaurants]
 
 
 def get_user_search_history(user, limit=10):
@@ -58,4 +73,48 @@ def get_user_search_history(user, limit=10):
         search_query__isnull=False
     ).values_list('search_query', flat=True)[:limit]
     
-    return list(search_activities)
\ No newline at end of file
+    return list(search_activities)
+
+
+def toggle_user_bookmark(user, restaurant_id):
+    """
+    Simpan / hapus bookmark secara atomik pakai unique key (user, restaurant).
+    Return True kalau sekarang tersimpan, False kalau baru dihapus.
+    Raise Restaurant.DoesNotExist kalau restoran tidak ada.
+    """
+    from accounts.models import Bookmark
+    from restaurants.models import Restaurant
+
+    try:
+        # Delete + insert dalam satu transaksi tulis (BEGIN IMMEDIATE, retry kalau terkunci)
+        return run_write(_toggle_bookmark, Bookmark, user, restaurant_id, op='bookmark')
+    except IntegrityError:
+        # Foreign key gagal → restoran tidak ada
+        raise Restaurant.DoesNotExist(restaurant_id)
+
+
+def _toggle_bookmark(Bookmark, user, restaurant_id):
+    deleted, _ = Bookmark.objects.filter(user=user, restaurant_id=restaurant_id).delete()
+    if deleted:
+        return False
+    # INSERT ... ON CONFLICT DO NOTHING: aman kalau dua klik datang bersamaan
+    Bookmark.objects.bulk_create(
+        [Bookmark(user=user, restaurant_id=restaurant_id)], ignore_conflicts=True
+    )
+    return True
+
+
+def get_bookmarked_ids(user, restaurant_ids):
+    """
+    Status bookmark hanya untuk restoran di halaman ini (satu query)
+    """
+    if not user.is_authenticated:
+        return set()
+    restaurant_ids = [rid for rid in restaurant_ids if rid is not None]
+    if not restaurant_ids:
+        return set()
+    from accounts.models import Bookmark
+
+    return set(
+        Bookmark.objects.filter(user=user, restaurant_id__in=restaurant_ids).values_list('restaurant_id', flat=True)
+    )
@@ -1,14 +1,23 @@
 # core/views.py
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
-from django.db.models import Avg, Count
+from django.db.models import Avg, Count, Max
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from restaurants.models import Restaurant, Menu
 from reviews.models import Review
 from accounts.models import Bookmark
 
+from .conditional import (
+    catalogue_version, conditional_response, csrf_version, make_etag, set_conditional_headers,
+    user_bookmark_version,
+)
+from .metrics import registry as metrics_registry
+from .models import UserActivity
+from .pagination import CountedPaginator, CursorPaginator
 from .recommendations import simple_recommendation
-from .utils import track_user_activity, get_recently_viewed_restaurants
+from .utils import track_user_activity, get_recently_viewed_restaurants, get_bookmarked_ids
 
 def home(request):
     query = request.GET.get('q')
@@ -30,11 +39,15 @@ def home(request):
         if category:
             resto_results = resto_results.filter(description__icontains=category)
         
+        # Rating & jumlah review dihitung di query yang sama (bukan review_set per kartu)
+        resto_results = resto_results.annotate(
+            avg_rating=Avg('review__rating'),
+            review_count=Count('review')
+        )
+
         # Apply rating filter
         if min_rating:
-            resto_results = resto_results.annotate(
-                avg_rating=Avg('review__rating')
-            ).filter(avg_rating__gte=float(min_rating))
+            resto_results = resto_results.filter(avg_rating__gte=float(min_rating))
             
     else:
         resto_results = Restaurant.objects.none()
@@ -42,12 +55,13 @@ def home(request):
 
     restaurants_all = Restaurant.objects.all()
 
-    top_rated = Restaurant.objects.annotate(
+    # list(): template memakai top_rated beberapa kali, cukup satu query
+    top_rated = list(Restaurant.objects.annotate(
         avg_rating=Avg('review__rating')
-    ).filter(avg_rating__isnull=False).order_by('-avg_rating')[:5]
+    ).filter(avg_rating__isnull=False).order_by('-avg_rating')[:5])
 
     # Get random reviews from different restaurants
-    last_reviews = Review.objects.select_related('user', 'restaurant').order_by('?')[:5]
+    last_reviews = Review.objects.select_related('user__profile', 'restaurant').order_by('?')[:5]
 
     # ✅ Siapkan data sebagai list biasa (jangan json.dumps!)
     restaurants_data = []
@@ -78,20 +92,40 @@ def home(request):
         'last_reviews': last_reviews,
         'restaurants_all': restaurants_all,
         'restaurants_json': restaurants_json,
-        'bookmarked_resto_ids': [],
         'categories': ['China', 'Jepang', 'Western', 'Indonesia', 'Fast Food', 'Italian'],
         'recently_viewed': recently_viewed,
     }
     return render(request, 'core/home.html', context)
 
+def _explore_etag(request, tab):
+    """
+    ETag untuk tab explore, atau (None, None) kalau tab tidak bisa di-cache
+    """
+    if tab == 'near_you':
+        # Urutan acak, tiap request memang beda
+        return None, None
+    if tab in ('recommendation', 'saved') and not request.user.is_authenticated:
+        return None, None
+
+    version, last_modified = catalogue_version()
+    # Form bookmark di kartu restoran → token CSRF ikut ETag
+    parts = ['explore', tab, version, request.user.pk, user_bookmark_version(request.user), csrf_version(request)]
+    if tab == 'recommendation':
+        # Rekomendasi juga bergantung pada aktivitas user (view/search)
+        parts.append(UserActivity.objects.filter(user=request.user).aggregate(last=Max('id'))['last'])
+    parts.append(request.GET.urlencode())
+    return make_etag(*parts), last_modified
+
+
 def explore(request):
     tab = request.GET.get('tab', 'recommendation')
     context = {'tab': tab}
 
-    if request.user.is_authenticated:
-        context['bookmarked_resto_ids'] = list(
-            Bookmark.objects.filter(user=request.user).values_list('restaurant_id', flat=True)
-        )
+    etag, last_modified = _explore_etag(request, tab)
+    if etag is not None:
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
 
     if tab == 'recommendation' and request.user.is_authenticated:
         # 🔥 Gunakan sistem rekomendasi AI sederhana
@@ -111,26 +145,70 @@ def explore(request):
         qs = Restaurant.objects.annotate(
             avg_rating=Avg('review__rating'),
             review_count=Count('review')
-        ).order_by('name')
+        )
+
+        if 'page' in request.GET:
+            # Mode nomor halaman: total dihitung dari tabel restoran saja (tanpa GROUP BY)
+            paginator = CountedPaginator(qs.order_by('name', 'id'), 12, count=Restaurant.objects.all())
+            page = request.GET.get('page', 1)
+
+            try:
+                restaurants_page = paginator.page(page)
+            except PageNotAnInteger:
+                restaurants_page = paginator.page(1)
+            except EmptyPage:
+                restaurants_page = paginator.page(paginator.num_pages)
 
-        paginator = Paginator(qs, 12)  # 12 per page
+            context['page_obj'] = restaurants_page
+        else:
+            # Mode cursor (default): biaya sama untuk halaman sedalam apa pun
+            restaurants_page = CursorPaginator(qs, 12, ordering=('name', 'id')).page(request.GET.get('cursor'))
+            context['cursor_page'] = restaurants_page
+
+        context['restaurants'] = restaurants_page
+
+    elif tab == 'saved' and request.user.is_authenticated:
+        # Satu query: bookmark + restoran + rating agregat, urut waktu disimpan
+        bookmarks = Bookmark.objects.filter(user=request.user).select_related('restaurant').annotate(
+            avg_rating=Avg('restaurant__review__rating'),
+            review_count=Count('restaurant__review')
+        ).order_by('-created_at', '-id')
+
+        paginator = Paginator(bookmarks, 12)
         page = request.GET.get('page', 1)
 
         try:
-            restaurants_page = paginator.page(page)
+            bookmarks_page = paginator.page(page)
         except PageNotAnInteger:
-            restaurants_page = paginator.page(1)
+            bookmarks_page = paginator.page(1)
         except EmptyPage:
-            restaurants_page = paginator.page(paginator.num_pages)
+            bookmarks_page = paginator.page(paginator.num_pages)
+
+        restaurants = []
+        for bookmark in bookmarks_page:
+            resto = bookmark.restaurant
+            resto.avg_rating = round(bookmark.avg_rating, 1) if bookmark.avg_rating else 0
+            resto.review_count = bookmark.review_count
+            restaurants.append(resto)
+
+        context['restaurants'] = restaurants
+        context['page_obj'] = bookmarks_page
+        context['bookmarked_resto_ids'] = {resto.id for resto in restaurants}
+
+    # Status bookmark hanya untuk restoran yang tampil di halaman ini
+    if 'bookmarked_resto_ids' not in context:
+        context['bookmarked_resto_ids'] = get_bookmarked_ids(
+            request.user, [resto.id for resto in context.get('restaurants', [])]
+        )
 
-        context['restaurants'] = restaurants_page
+    response = render(request, 'core/explore.html', context)
+    if etag is not None:
+        set_conditional_headers(response, etag, last_modified)
+    return response
 
-    elif tab == 'saved' and request.user.is_authenticated:
-        bookmarks = Bookmark.objects.filter(user=request.user).select_related('restaurant')
-        context['restaurants'] = [b.restaurant for b in bookmarks]
-        for resto in context['restaurants']:
-            reviews = resto.review_set.all()
-            resto.avg_rating = round(sum([r.rating for r in reviews]) / len(reviews), 1) if reviews else 0
-            resto.review_count = len(reviews)
-
-    return render(request, 'core/explore.html', context)
\ No newline at end of file
+
+def metrics(request):
+    # Format teks Prometheus; hanya untuk scrape lokal
+    if request.META.get('REMOTE_ADDR') not in getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1']):
+        return HttpResponseForbidden('Forbidden')
+    return HttpResponse(metrics_registry.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,108 @@
+# core/writes.py
+"""
+Koordinator tulis untuk SQLite: transaksi tulis pendek dibuka dengan
+BEGIN IMMEDIATE (lock tulis diambil di awal, jadi tidak ada deadlock saat
+upgrade read → write), dan "database is locked" di-retry dengan backoff
+eksponensial + jitter. Retry, waktu tunggu, dan kegagalan dicatat ke metrik.
+"""
+import functools
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from . import metrics
+
+logger = logging.getLogger('core.writes')
+
+MAX_ATTEMPTS = 5
+BASE_DELAY = 0.02  # detik, dikali 2 tiap percobaan
+MAX_DELAY = 0.5
+
+LOCK_ERRORS = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def is_lock_error(exc):
+    return isinstance(exc, OperationalError) and any(msg in str(exc).lower() for msg in LOCK_ERRORS)
+
+
+@contextmanager
+def immediate_atomic(using=DEFAULT_DB_ALIAS):
+    """
+    transaction.atomic() yang mulai dengan BEGIN IMMEDIATE di SQLite.
+    Di dalam atomic lain jadi savepoint biasa (lock-nya ikut transaksi luar).
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    connection.ensure_connection()
+    previous = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            # BEGIN sudah terkirim saat masuk atomic; mode bisa dikembalikan
+            connection.transaction_mode = previous
+            yield
+    finally:
+        connection.transaction_mode = previous
+
+
+def run_write(func, *args, op='write', using=DEFAULT_DB_ALIAS, attempts=MAX_ATTEMPTS, atomic=True, **kwargs):
+    """
+    Jalankan func(*args, **kwargs) dalam transaksi tulis IMMEDIATE, retry
+    kalau database terkunci. Exception lain (dan lock setelah percobaan
+    terakhir) diteruskan ke pemanggil.
+
+    atomic=False untuk tulis satu statement (mis. satu INSERT tanpa signal):
+    autocommit sudah atomik, jadi cukup retry-nya tanpa BEGIN/COMMIT tambahan.
+    """
+    labels = {'op': op}
+    if connections[using].in_atomic_block:
+        # Sudah di dalam transaksi: retry di sini tidak mungkin, serahkan ke luar
+        if not atomic:
+            return func(*args, **kwargs)
+        with immediate_atomic(using):
+            return func(*args, **kwargs)
+
+    started = time.monotonic()
+    for attempt in range(1, attempts + 1):
+        try:
+            if atomic:
+                with immediate_atomic(using):
+                    result = func(*args, **kwargs)
+            else:
+                result = func(*args, **kwargs)
+        except OperationalError as e:
+            if not is_lock_error(e):
+                raise
+            if attempt == attempts:
+                metrics.inc('db_write_failures_total', labels=labels,
+                            help_text='Writes that failed after all lock retries')
+                logger.warning('write %s gagal setelah %d percobaan: %s', op, attempt, e)
+                raise
+            metrics.inc('db_write_retries_total', labels=labels, help_text='Write retries after database is locked')
+            delay = min(MAX_DELAY, BASE_DELAY * 2 ** (attempt - 1))
+            time.sleep(random.uniform(delay / 2, delay))  # jitter: penulis yang bentrok tidak bangun bersamaan
+            continue
+        waited = time.monotonic() - started
+        metrics.inc('db_writes_total', labels=labels, help_text='Writes through the write coordinator')
+        if attempt > 1:
+            metrics.observe('db_write_lock_wait_seconds', waited, labels=labels,
+                            help_text='Time spent waiting on locked writes before success')
+        return result
+
+
+def write_transaction(op, **options):
+    """
+    Decorator: @write_transaction('bookmark') → fungsi dijalankan lewat run_write
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return run_write(func, *args, op=op, **options, **kwargs)
+        return wrapper
+    return decorator
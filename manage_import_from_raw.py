@@ -1,5 +1,5 @@
 # manage_import_from_raw.py
-import os, csv, sys, django
+import os, sys, time, django
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -8,17 +8,93 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")  # ← adjust
 
 django.setup()
 
-from restaurants.models import Restaurant
+from restaurants.models import Restaurant, bump_restaurant_versions
 from reviews.models import Review
 from django.contrib.auth.models import User
+from django.db import transaction
+from core.importing import chunked
 
 import pandas as pd
 import numpy as np
 
 RAW_RESTOS = BASE_DIR / "data" / "All_Restaurant_Data - Sheet1.csv"
 RAW_REVIEWS = BASE_DIR / "data" / "All_Review_Data - Sheet1.csv"
+CHUNK_SIZE = 5000
+
+class Phases:
+    """Catat durasi tiap tahap, dicetak di akhir."""
+    def __init__(self):
+        self.timings = []
+        self._last = time.monotonic()
+
+    def mark(self, name, rows):
+        now = time.monotonic()
+        self.timings.append((name, rows, now - self._last))
+        self._last = now
+
+    def report(self):
+        for name, rows, seconds in self.timings:
+            print(f"  {name:<12} {rows:>8} rows  {seconds:6.2f}s  ({rows / max(seconds, 1e-6):.0f} rows/s)")
+
+def import_restaurants(r_df):
+    """
+    Restoran yang sudah ada dicari by name dalam satu query; sisanya bulk_create.
+    Return {resto_id: Restaurant.pk}.
+    """
+    existing = {}
+    for names in chunked(set(r_df["clean_name"]), 500):
+        existing.update(Restaurant.objects.filter(name__in=names).values_list("name", "id"))
+    # Nama dobel di file → baris pertama (resto_id terkecil) yang dibuat
+    missing = r_df[~r_df["clean_name"].isin(existing.keys())].drop_duplicates("clean_name")
+    new = [
+        Restaurant(
+            name=row.clean_name,
+            address="",
+            latitude=None if pd.isna(row.clean_lat) else row.clean_lat,
+            longitude=None if pd.isna(row.clean_lng) else row.clean_lng,
+            rating=None,
+            description=row.clean_desc if row.clean_desc != "nan" else "",
+        )
+        for row in missing.itertuples(index=False)
+    ]
+    with transaction.atomic():
+        Restaurant.objects.bulk_create(new, batch_size=1000)
+    existing.update((obj.name, obj.pk) for obj in new)
+    return {int(rid): existing[name] for rid, name in zip(r_df["resto_id"], r_df["clean_name"])}, len(new)
+
+def import_reviews(v_df, resto_id_to_pk, users):
+    """
+    Bulk insert per chunk (satu transaksi per chunk). Pasangan (user, restaurant)
+    yang sudah punya review — di DB atau di baris sebelumnya — dilewati.
+    """
+    total = len(v_df)
+    v_df = v_df.assign(rest_pk=v_df["resto_id"].map(resto_id_to_pk)).dropna(subset=["rest_pk", "rating"])
+    v_df = v_df.assign(user_pk=v_df["user_id"].map(lambda i: users[i - 1]))
+    v_df = v_df.drop_duplicates(["user_pk", "rest_pk"])
+
+    created, touched = 0, set()
+    for chunk in chunked(v_df.itertuples(index=False), CHUNK_SIZE):
+        rest_pks = {int(row.rest_pk) for row in chunk}
+        taken = set(Review.objects.filter(restaurant_id__in=rest_pks, user_id__in=users)
+                                  .values_list("user_id", "restaurant_id"))
+        reviews = [
+            Review(user_id=row.user_pk, restaurant_id=int(row.rest_pk), rating=int(row.rating),
+                   comment=str(getattr(row, "review_text", "") or "")[:2000])
+            for row in chunk if (row.user_pk, int(row.rest_pk)) not in taken
+        ]
+        with transaction.atomic():
+            Review.objects.bulk_create(reviews, batch_size=1000)
+        created += len(reviews)
+        touched.update(r.restaurant_id for r in reviews)
+
+    # bulk_create tidak memicu signal → naikkan versi restoran yang dapat review (ETag)
+    bump_restaurant_versions(touched)
+    # skipped: tanpa restoran/rating, atau pasangan (user, restaurant) sudah ada
+    return created, total - created
 
 def main():
+    phases = Phases()
+
     # Load restaurants and clean columns
     r_df = pd.read_csv(RAW_RESTOS)
     r_df["resto_id"] = pd.to_numeric(r_df["resto_id"], errors="coerce")
@@ -29,31 +105,8 @@ def main():
     name = r_df["resto_name"].astype(str).str.strip()
     lat = pd.to_numeric(r_df.get("latitude"), errors="coerce")
     lng = pd.to_numeric(r_df.get("langitude"), errors="coerce")  # note: 'langitude' in your CSV
-    desc = r_df.get("keywords", pd.Series([""]*len(r_df))).astype(str)
-
-    # Create restaurants in sorted order of resto_id
-    r_df = r_df.assign(_name=name, _lat=lat, _lng=lng, _desc=desc).sort_values("resto_id")
-    resto_id_to_pk = {}
-
-    print(f"Importing {len(r_df)} restaurants…")
-    for _, row in r_df.iterrows():
-        obj, _ = Restaurant.objects.get_or_create(
-            name=row["_name"],
-            defaults={
-                "address": "",
-                "latitude": row["_lat"] if not pd.isna(row["_lat"]) else None,
-                "longitude": row["_lng"] if not pd.isna(row["_lng"]) else None,
-                "rating": None,
-                "description": row["_desc"] if row["_desc"] != "nan" else "",
-            },
-        )
-        resto_id_to_pk[int(row["resto_id"])] = obj.pk
-
-    # Prepare 20 synthetic users (if missing)
-    users = []
-    for i in range(1, 21):
-        u, _ = User.objects.get_or_create(username=f"user{i}", defaults={"email": f"user{i}@example.com"})
-        users.append(u)
+    desc = r_df.get("keywords", pd.Series([""]*len(r_df), index=r_df.index)).astype(str)
+    r_df = r_df.assign(clean_name=name, clean_lat=lat, clean_lng=lng, clean_desc=desc).sort_values("resto_id")
 
     # Load reviews
     v_df = pd.read_csv(RAW_REVIEWS)
@@ -66,33 +119,29 @@ def main():
     if "user_id" not in v_df.columns:
         v_df["user_id"] = np.nan
 
-    v_df = v_df.sort_values(["resto_id", "review_id"])
+    v_df = v_df.sort_values(["resto_id", "review_id"]).reset_index(drop=True)
     # deterministic round-robin 1..20 for NaN users
-    rr = ((pd.Series(range(len(v_df))) % 20) + 1).astype(int)
-    v_df.loc[v_df["user_id"].isna(), "user_id"] = rr[v_df["user_id"].isna()].values
-    v_df["user_id"] = pd.to_numeric(v_df["user_id"], errors="coerce").fillna(1).astype(int)
+    rr = pd.Series(np.arange(len(v_df)) % 20 + 1)
+    v_df["user_id"] = pd.to_numeric(v_df["user_id"], errors="coerce").fillna(rr).astype(int)
     v_df["user_id"] = ((v_df["user_id"] - 1) % 20) + 1  # clamp to 1..20
+    phases.mark("load", len(r_df) + len(v_df))
+
+    print(f"Importing {len(r_df)} restaurants…")
+    resto_id_to_pk, new_restos = import_restaurants(r_df)
+    phases.mark("restaurants", len(r_df))
+
+    # Prepare 20 synthetic users (if missing)
+    users = []
+    for i in range(1, 21):
+        u, _ = User.objects.get_or_create(username=f"user{i}", defaults={"email": f"user{i}@example.com"})
+        users.append(u.pk)
+    phases.mark("users", len(users))
+
+    created, skipped = import_reviews(v_df, resto_id_to_pk, users)
+    phases.mark("reviews", len(v_df))
 
-    # Create Review rows (skip duplicates per your unique_together)
-    created = 0
-    skipped = 0
-    for _, row in v_df.iterrows():
-        rest_pk = resto_id_to_pk.get(int(row["resto_id"]))
-        if not rest_pk or pd.isna(row["rating"]):
-            continue
-        user = users[int(row["user_id"]) - 1]
-        try:
-            Review.objects.create(
-                user=user,
-                restaurant_id=rest_pk,
-                rating=int(row["rating"]),
-                comment=str(row.get("review_text", "") or "")[:2000],
-            )
-            created += 1
-        except Exception:
-            skipped += 1
-
-    print(f"Done. Reviews created: {created}, skipped: {skipped}")
+    print(f"Done. Restaurants created: {new_restos}, reviews created: {created}, skipped: {skipped}")
+    phases.report()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
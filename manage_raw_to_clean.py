@@ -1,27 +1,18 @@
 # manage_raw_to_clean.py
-import os, sys
+import argparse
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent
+sys.path.append(str(BASE_DIR))
+
+from core.columnar import normalize_coordinates, normalize_ratings, write_table  # noqa: E402
+
 RAW_RESTOS = BASE_DIR / "data" / "All_Restaurant_Data.csv"
 RAW_REVIEWS = BASE_DIR / "data" / "All_Review_Data.csv"
-OUT_RESTOS = BASE_DIR / "data" / "restaurants.csv"
-OUT_REVIEWS = BASE_DIR / "data" / "reviews.csv"
-
-def to_float(x):
-    if pd.isna(x) or x == "" or x is None:
-        return np.nan
-    try:
-        return float(x)
-    except Exception:
-        # try compact format (e.g., "6200000" intended as 6.2)
-        x2 = str(x).replace(".", "")
-        try:
-            return float(x2) / 1_000_000
-        except Exception:
-            return np.nan
+OUT_DIR = BASE_DIR / "data"
 
 def pick(df, candidates, fallback=None):
     """Return the first existing column as Series."""
@@ -30,9 +21,31 @@ def pick(df, candidates, fallback=None):
             return df[c]
     return fallback
 
-def main():
+def name_key(series):
+    return series.astype(str).str.lower().str.strip()
+
+def write(frame, table, out_dir, fmt):
+    """Columnar .npz (typed, dibaca langsung oleh import_*) dan/atau CSV."""
+    paths = []
+    if fmt in ("npz", "both"):
+        paths.append(out_dir / f"{table}.npz")
+        write_table(paths[-1], frame, table)
+    if fmt in ("csv", "both"):
+        paths.append(out_dir / f"{table}.csv")
+        frame.to_csv(paths[-1], index=False, encoding="utf-8")
+    return ", ".join(str(p) for p in paths)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Raw scrape CSV → clean restaurants/reviews")
+    parser.add_argument("--restos", type=Path, default=RAW_RESTOS)
+    parser.add_argument("--reviews", type=Path, default=RAW_REVIEWS)
+    parser.add_argument("--out-dir", type=Path, default=OUT_DIR)
+    parser.add_argument("--format", choices=("npz", "csv", "both"), default="npz")
+    args = parser.parse_args(argv)
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+
     # --- Restaurants ---
-    r = pd.read_csv(RAW_RESTOS, encoding="utf-8")
+    r = pd.read_csv(args.restos, encoding="utf-8", dtype=str)
     r.columns = r.columns.str.strip().str.lower()  # normalize headers
 
     # name
@@ -42,80 +55,82 @@ def main():
         name_series = r["resto_name"]
     else:
         name_series = r.iloc[:, 0]
-    name = name_series.astype(str).str.strip()
-
-    # latitude / longitude
-    lat_series = pick(r, ["latitude"])
-    lng_series = pick(r, ["longitude", "langitude"])
-
-    latitude = pd.to_numeric(lat_series, errors="coerce") if lat_series is not None else np.nan
-    longitude = pd.to_numeric(lng_series, errors="coerce") if lng_series is not None else np.nan
+    name = name_series.fillna("").astype(str).str.strip()
+
+    # latitude / longitude: vektor, termasuk format ringkas "-6.234.567" + cek batas Jakarta
+    lat_series = pick(r, ["latitude"], fallback=pd.Series([None] * len(r)))
+    lng_series = pick(r, ["longitude", "langitude"], fallback=pd.Series([None] * len(r)))
+    latitude = normalize_coordinates(lat_series, "latitude")
+    longitude = normalize_coordinates(lng_series, "longitude")
+    # Koordinat setengah valid tidak berguna untuk peta
+    invalid = latitude.isna() | longitude.isna()
+    latitude[invalid] = np.nan
+    longitude[invalid] = np.nan
 
     # description
     desc_series = pick(r, ["description", "keywords"], fallback=pd.Series([""] * len(r)))
-    description = desc_series.astype(str) if desc_series is not None else ""
+    description = desc_series.fillna("").astype(str)
 
+    # resto_id dari sumber (kalau ada) jadi kunci stabil untuk import_restos/import_reviews
+    raw_ids = pd.to_numeric(pick(r, ["resto_id"], fallback=pd.Series([np.nan] * len(r))), errors="coerce")
     restos = pd.DataFrame({
-        "name": name,
+        "resto_id": raw_ids.values,
+        "name": name.values,
         "address": "",
-        "latitude": latitude,
-        "longitude": longitude,
+        "latitude": latitude.values,
+        "longitude": longitude.values,
         "rating": np.nan,
-        "description": description,
+        "description": description.values,
     })
-    restos = restos[restos["name"].str.strip() != ""].copy().reset_index(drop=True)
-    restos["__restaurant_id"] = np.arange(1, len(restos) + 1)
+    restos = restos[restos["name"] != ""]
+    if restos["resto_id"].notna().all():
+        restos = restos.drop_duplicates("resto_id")
+    else:
+        restos["resto_id"] = np.arange(1, len(restos) + 1)
+    restos = restos.astype({"resto_id": "int64"}).reset_index(drop=True)
 
-    restos_out = restos.drop(columns="__restaurant_id")
-    restos_out.to_csv(OUT_RESTOS, index=False, encoding="utf-8")
-    print(f"✅ Wrote {len(restos_out)} restaurants → {OUT_RESTOS}")
+    print(f"✅ Wrote {len(restos)} restaurants ({int(invalid.sum())} without valid Jakarta coordinates) "
+          f"→ {write(restos, 'restaurants', args.out_dir, args.format)}")
 
     # --- Reviews ---
-    v = pd.read_csv(RAW_REVIEWS, encoding="utf-8")
+    v = pd.read_csv(args.reviews, encoding="utf-8", dtype=str)
     v.columns = v.columns.str.strip().str.lower()
 
-    v["rating"] = pd.to_numeric(v.get("rating"), errors="coerce").clip(1, 5)
+    rating = normalize_ratings(v["rating"]) if "rating" in v.columns else pd.Series(np.nan, index=v.index)
 
-    # build restaurant_id for reviews
+    # restaurant_id review = resto_id restoran bersih (lookup Series.map, tanpa merge)
     name_key_in_v = "restaurant_name" if "restaurant_name" in v.columns else ("resto_name" if "resto_name" in v.columns else None)
+    known_ids = pd.Index(restos["resto_id"])
 
     if name_key_in_v:
-        clean_keys = restos_out["name"].str.lower().str.strip()
-        name2id = {k: i+1 for i, k in enumerate(clean_keys)}
-        v["restaurant_id"] = v[name_key_in_v].astype(str).str.lower().str.strip().map(name2id)
+        name2id = pd.Series(restos["resto_id"].values, index=name_key(restos["name"]))
+        name2id = name2id[~name2id.index.duplicated()]
+        restaurant_id = name_key(v[name_key_in_v]).map(name2id)
     elif "restaurant_id" in v.columns:
-        v["restaurant_id"] = pd.to_numeric(v["restaurant_id"], errors="coerce")
-    elif "resto_id" in v.columns and "resto_id" in r.columns:
-        r_map = r[["resto_id"]].copy()
-        r_map["resto_name_key"] = name.str.lower().str.strip().values
-        clean_map = pd.DataFrame({
-            "restaurant_id": range(1, len(restos_out) + 1),
-            "resto_name_key": restos_out["name"].str.lower().str.strip()
-        })
-        v = v.merge(r_map[["resto_id", "resto_name_key"]], on="resto_id", how="left")
-        v = v.merge(clean_map, on="resto_name_key", how="left")
+        restaurant_id = pd.to_numeric(v["restaurant_id"], errors="coerce")
+    elif "resto_id" in v.columns:
+        restaurant_id = pd.to_numeric(v["resto_id"], errors="coerce")
+        restaurant_id = restaurant_id.where(restaurant_id.isin(known_ids))
     else:
         v = v.sort_values(by=v.columns[0]).reset_index(drop=True)
-        v["restaurant_id"] = (np.arange(len(v)) % len(restos_out)) + 1
+        rating = rating.reset_index(drop=True)
+        restaurant_id = pd.Series(known_ids[np.arange(len(v)) % len(known_ids)], dtype="float64")
 
-    # user_id handling
-    if "user_id" not in v.columns:
-        v["user_id"] = np.nan
-    v["user_id"] = pd.to_numeric(v["user_id"], errors="coerce")
-    rr = ((pd.Series(range(len(v))) % 20) + 1).astype(int)
-    v.loc[v["user_id"].isna(), "user_id"] = rr[v["user_id"].isna()].values
-    v["user_id"] = v["user_id"].astype(int)
-    v["user_id"] = ((v["user_id"] - 1) % 20) + 1
+    # user_id handling: kosong → round-robin 1..20
+    user_id = pd.to_numeric(v["user_id"], errors="coerce") if "user_id" in v.columns else pd.Series(np.nan, index=v.index)
+    rr = pd.Series(np.arange(len(v)) % 20 + 1, index=v.index)
+    user_id = ((user_id.fillna(rr).astype("int64") - 1) % 20) + 1
+
+    text = v["review_text"] if "review_text" in v.columns else v.get("comment", pd.Series([""] * len(v), index=v.index))
 
     reviews = pd.DataFrame({
-        "user_id": v["user_id"],
-        "restaurant_id": pd.to_numeric(v["restaurant_id"], errors="coerce"),
-        "rating": v["rating"].fillna(3).clip(1, 5).astype(int),
-        "review_text": v.get("review_text") if "review_text" in v.columns else v.get("comment", "")
-    }).dropna(subset=["restaurant_id"]).astype({"restaurant_id": int})
-
-    reviews.to_csv(OUT_REVIEWS, index=False, encoding="utf-8")
-    print(f"✅ Wrote {len(reviews)} reviews → {OUT_REVIEWS}")
+        "user_id": user_id.values,
+        "restaurant_id": restaurant_id.values,
+        "rating": rating.fillna(3).values,
+        "review_text": text.fillna("").astype(str).values,
+    }).dropna(subset=["restaurant_id"]).astype({"restaurant_id": "int64", "rating": "int64"})
+
+    print(f"✅ Wrote {len(reviews)} reviews → {write(reviews, 'reviews', args.out_dir, args.format)}")
 
 if __name__ == "__main__":
     main()
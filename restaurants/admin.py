@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Avg
 from .models import Restaurant, Menu
 
 @admin.register(Restaurant)
@@ -11,8 +12,13 @@ class RestaurantAdmin(admin.ModelAdmin):
     # Field khusus untuk average_rating (hanya baca)
     readonly_fields = ('average_rating',)
 
+    def get_queryset(self, request):
+        # Rating dihitung di query daftar, bukan 2 query per baris
+        return super().get_queryset(request).annotate(avg_rating=Avg('review__rating'))
+
     def average_rating(self, obj):
-        return f"{obj.average_rating} ⭐"
+        avg = getattr(obj, 'avg_rating', None)
+        return f"{round(avg, 1) if avg is not None else 0} ⭐"
     average_rating.short_description = 'Rating Rata-rata'
 
 
@@ -21,6 +27,7 @@ class MenuAdmin(admin.ModelAdmin):
     list_display = ('name', 'restaurant', 'price', 'formatted_price')
     search_fields = ('name', 'restaurant__name')
     list_filter = ('restaurant',)
+    list_select_related = ('restaurant',)
     ordering = ('restaurant', 'name')
 
     def formatted_price(self, obj):
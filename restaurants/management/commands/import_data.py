@@ -1,113 +1,268 @@
-import csv
 import os
 import random
+import time
+from collections import Counter
+from itertools import islice
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from restaurants.models import Restaurant
+from django.db import transaction
+from django.conf import settings
+from restaurants.models import Restaurant, bump_restaurant_versions
 from reviews.models import Review
-from decimal import Decimal
+from core.columnar import normalize_coordinates
+from core.importing import TableReader, chunked, parallel_parse, pick
+from core.jobs import Progress
+from core.ledger import NEW, UNCHANGED, Checkpoint, Ledger, content_hash
+from core.metrics import record_import
+
+DEFAULT_LAT, DEFAULT_LNG = -6.2, 106.8
+RESTO_SOURCE, REVIEW_SOURCE = "scrape_restaurants", "scrape_reviews"
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return " ".join(str(value).split())  # rapikan spasi/newline
+
+
+def parse_restaurants(columns, rows):
+    """
+    Normalisasi satu chunk file resto (jalan di proses worker).
+    Return list of (name, description, lat, lng, address).
+    """
+    name_col = pick(columns, "name")
+    cat_col = pick(columns, "category")
+    desc_col = pick(columns, "description")
+    lat_col = pick(columns, "latitude")
+    lng_col = pick(columns, "longitude")
+    idx = {c: columns.index(c) for c in (name_col, cat_col, desc_col, lat_col, lng_col) if c is not None}
+    get = lambda row, col: row[idx[col]] if col is not None else None
+
+    # Koordinat satu chunk sekaligus (format scrape "-6.234.567" + cek batas Jakarta)
+    lats = normalize_coordinates([get(row, lat_col) for row in rows], "latitude").tolist()
+    lngs = normalize_coordinates([get(row, lng_col) for row in rows], "longitude").tolist()
+
+    out = []
+    for row, lat, lng in zip(rows, lats, lngs):
+        name = _text(get(row, name_col))[:100]
+        if not name:
+            continue
+        category = _text(get(row, cat_col))
+        description = _text(get(row, desc_col))
+        if lat != lat or lng != lng:  # NaN
+            lat, lng = DEFAULT_LAT, DEFAULT_LNG
+        out.append((
+            name,
+            f"{category} - {description}" if description and description != 'N/A' else category,
+            lat,
+            lng,
+            f"Jakarta ({category})",
+        ))
+    return out
+
+
+def parse_reviews(columns, rows):
+    """
+    Normalisasi satu chunk file review (jalan di proses worker).
+    Return list of (rating atau None, comment).
+    """
+    rating_col = pick(columns, "rating")
+    text_col = pick(columns, "review_text")
+    idx = {c: columns.index(c) for c in (rating_col, text_col) if c is not None}
+    get = lambda row, col: row[idx[col]] if col is not None else None
+
+    out = []
+    for row in rows:
+        try:
+            rating = min(max(int(float(get(row, rating_col))), 1), 5)
+        except (TypeError, ValueError):
+            rating = None  # diisi acak oleh writer, seperti sebelumnya
+        text = _text(get(row, text_col))
+        out.append((rating, text[:500] if text and text != 'N/A' else 'Great food!'))
+    return out
+
 
 class Command(BaseCommand):
     help = 'Import restaurant and review data from CSV files'
 
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=os.path.join(settings.BASE_DIR, "data", "fix_scrapped"),
+                            help="Folder hasil scrape")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Jumlah proses parse paralel (1 = tanpa proses tambahan)")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Baris per chunk / bulk insert")
+        parser.add_argument("--queue-size", type=int, default=None,
+                            help="Maks. chunk yang menunggu writer (default 2 × workers)")
+        parser.add_argument("--no-resume", action="store_true",
+                            help="Abaikan checkpoint, baca semua file dari awal (ledger tetap menyaring baris sama)")
+
     def handle(self, *args, **options):
         # Path ke folder CSV (dalam Django project)
-        import os
-        from django.conf import settings
-        csv_folder = os.path.join(settings.BASE_DIR, "data", "fix_scrapped")
-        
-        # Import restaurants
-        resto_files = [f for f in os.listdir(csv_folder) if f.startswith('00') and 'resto' in f and not 'reviews' in f]
-        
-        self.stdout.write(f"Found {len(resto_files)} restaurant files")
-        
-        for file_name in resto_files:
-            file_path = os.path.join(csv_folder, file_name)
-            self.stdout.write(f"Processing {file_name}")
-            
-            with open(file_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile, delimiter=';')
-                for row in reader:
-                    try:
-                        # Skip if restaurant already exists
-                        if Restaurant.objects.filter(name=row['name']).exists():
-                            continue
-                            
-                        
-                        # Parse coordinates
-                        try:
-                            lat = float(row['latitude'].replace('.', '')) / 1000000
-                            lng = float(row['longitude'].replace('.', '')) / 1000000
-                        except:
-                            lat = -6.2
-                            lng = 106.8
-                        
-                        # Create restaurant
-                        restaurant = Restaurant.objects.create(
-                            name=row['name'],
-                            description=f"{row['category']} - {row['description']}" if row['description'] != 'N/A' else row['category'],
-                            latitude=lat,
-                            longitude=lng,
-                            address=f"Jakarta ({row['category']})"
-                        )
-                        print(f"Created restaurant: {restaurant.name}")
-                        
-                    except Exception as e:
-                        print(f"Error creating restaurant {row.get('name', 'Unknown')}: {str(e)}")
-        
-        # Import reviews
-        review_files = [f for f in os.listdir(csv_folder) if f.startswith('00') and 'reviews' in f]
-        
-        # Get or create sample users
+        csv_folder = options["dir"]
+        workers = max(1, options["workers"])
+        batch_size = max(1, options["batch_size"])
+        started = time.monotonic()
+
+        files = sorted(os.listdir(csv_folder))
+        resto_files = [os.path.join(csv_folder, f) for f in files
+                       if f.startswith('00') and 'resto' in f and not 'reviews' in f]
+        review_files = [os.path.join(csv_folder, f) for f in files if f.startswith('00') and 'reviews' in f]
+        self.stdout.write(f"Found {len(resto_files)} restaurant files, {len(review_files)} review files "
+                          f"({workers} workers)")
+
+        resume = not options["no_resume"]
+        resto_tasks, resto_checkpoints = self._checkpoints(RESTO_SOURCE, resto_files, resume)
+        review_tasks, review_checkpoints = self._checkpoints(REVIEW_SOURCE, review_files, resume)
+
+        # Tahap 1: restoran (review butuh restoran yang sudah ada). Key ledger = nama file + nama.
+        resto_ledger = Ledger(RESTO_SOURCE)
+        existing = dict(Restaurant.objects.values_list('name', 'id'))
+        created_restos, updated_restos, errors = 0, 0, 0
+        progress = self._progress(resto_tasks)
+        for message in parallel_parse(resto_tasks, parse_restaurants, workers, batch_size, options["queue_size"]):
+            if message[0] == "done":
+                errors += self._report_file(message, resto_checkpoints)
+                continue
+            _, path, n_rows, parsed = message
+            # Nama dobel di chunk yang sama → baris terakhir menang
+            prefix = os.path.basename(path)
+            rows = {f"{prefix}:{values[0]}": (values, content_hash(*values)) for values in parsed}
+            status = resto_ledger.classify({key: h for key, (_, h) in rows.items()})
+            new, changed, adopted = [], [], []
+            for key, ((name, description, lat, lng, address), h) in rows.items():
+                st, object_id = status[key]
+                if st == UNCHANGED:
+                    continue
+                if st == NEW and name in existing:
+                    # Restoran sudah ada sebelum ledger (atau dari file lain): tidak ditimpa
+                    adopted.append((key, h, existing[name]))
+                    continue
+                obj = Restaurant(name=name, description=description, latitude=lat, longitude=lng,
+                                 address=address)
+                if st == NEW:
+                    new.append((key, h, obj))
+                else:
+                    obj.id = object_id
+                    changed.append((key, h, obj))
+            with transaction.atomic():
+                Restaurant.objects.bulk_create([obj for _, _, obj in new], batch_size=batch_size)
+                if changed:
+                    Restaurant.objects.bulk_update([obj for _, _, obj in changed],
+                                                   ['description', 'latitude', 'longitude', 'address'],
+                                                   batch_size=500)
+                    bump_restaurant_versions([obj.id for _, _, obj in changed])
+                resto_ledger.record([(key, h, obj.pk) for key, h, obj in new + changed] + adopted)
+                resto_checkpoints[path].advance(n_rows, created=len(new), updated=len(changed))
+            existing.update((obj.name, obj.pk) for _, _, obj in new)
+            created_restos += len(new)
+            updated_restos += len(changed)
+            progress.update(n_rows, errors=n_rows - len(parsed))  # tanpa nama → dilewati
+
+        # Tahap 2: review → restoran & user sampel dipilih acak (perilaku lama).
+        # Review scrape tidak punya id: key ledger = nama file + hash isi + urutan kemunculan
+        # hash itu di file (komentar placeholder seperti "Great food!" sering dobel). Baris
+        # yang disisipkan/dihapus di tengah file tidak menggeser key baris lain.
+        review_ledger = Ledger(REVIEW_SOURCE)
+        resto_ids = list(Restaurant.objects.values_list('id', flat=True))
         users = []
         for i in range(10):
             user, created = User.objects.get_or_create(
                 username=f'user{i}',
                 defaults={'email': f'user{i}@example.com'}
             )
-            users.append(user)
-        
-        self.stdout.write(f"Found {len(review_files)} review files")
-        
-        for file_name in review_files:
-            file_path = os.path.join(csv_folder, file_name)
-            self.stdout.write(f"Processing {file_name}")
-            
-            with open(file_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile, delimiter=';')
-                for row in reader:
-                    try:
-                        # Find restaurant by original_id
-                        resto_id = int(row['id_resto'])
-                        restaurants = Restaurant.objects.all()
-                        
-                        if restaurants.exists():
-                            # Get a random restaurant for this review
-                            restaurant = random.choice(restaurants)
-                            user = random.choice(users)
-                            
-                            # Parse rating
-                            try:
-                                rating = int(float(row['rating']))
-                                if rating < 1:
-                                    rating = 1
-                                elif rating > 5:
-                                    rating = 5
-                            except:
-                                rating = random.randint(3, 5)
-                            
-                            # Create review
-                            review = Review.objects.create(
-                                restaurant=restaurant,
-                                user=user,
-                                rating=rating,
-                                comment=row['review_text'][:500] if row['review_text'] != 'N/A' else 'Great food!',
-                            )
-                            
-                    except Exception as e:
-                        print(f"Error creating review: {str(e)}")
-        
-                
-        self.stdout.write(self.style.SUCCESS(f'Successfully imported data!'))
+            users.append(user.id)
+
+        created_reviews, touched = 0, set()
+        occurrences = {path: self._seen_hashes(path, start) for path, start in review_tasks}
+        progress = self._progress(review_tasks)
+        for message in parallel_parse(review_tasks, parse_reviews, workers, batch_size, options["queue_size"]):
+            if message[0] == "done":
+                errors += self._report_file(message, review_checkpoints)
+                continue
+            _, path, n_rows, parsed = message
+            name = os.path.basename(path)
+            seen = occurrences[path]
+            rows = {}
+            for rating, comment in parsed:
+                h = content_hash(rating, comment)
+                rows[f"{name}:{h}:{seen[h]}"] = (rating, comment, h)
+                seen[h] += 1
+            if not resto_ids:
+                continue
+            status = review_ledger.classify({key: h for key, (_, _, h) in rows.items()})
+            reviews = []
+            for key, (rating, comment, h) in rows.items():
+                if status[key][0] == UNCHANGED:
+                    continue
+                resto_id = random.choice(resto_ids)
+                touched.add(resto_id)
+                reviews.append((key, h, Review(restaurant_id=resto_id, user_id=random.choice(users),
+                                               rating=rating or random.randint(3, 5), comment=comment)))
+            with transaction.atomic():
+                Review.objects.bulk_create([review for _, _, review in reviews], batch_size=batch_size)
+                review_ledger.record([(key, h, review.pk) for key, h, review in reviews])
+                review_checkpoints[path].advance(n_rows, created=len(reviews))
+            created_reviews += len(reviews)
+            progress.update(n_rows)
+
+        # bulk_create tidak memicu signal → naikkan versi restoran yang dapat review baru
+        bump_restaurant_versions(touched)
+
+        elapsed = time.monotonic() - started
+        record_import("import_data", created_restos + updated_restos + created_reviews, elapsed, errors=errors)
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully imported data! restaurants +{created_restos} ({updated_restos} updated), '
+            f'reviews +{created_reviews} in {elapsed:.1f}s'
+        ))
         self.stdout.write(f'Total restaurants: {Restaurant.objects.count()}')
-        self.stdout.write(f'Total reviews: {Review.objects.count()}')
\ No newline at end of file
+        self.stdout.write(f'Total reviews: {Review.objects.count()}')
+
+    def _seen_hashes(self, path, start):
+        """
+        Jumlah kemunculan tiap hash review di `start` baris pertama file. Resume
+        dari checkpoint melewati baris itu, tapi urutan kemunculan di key ledger
+        tetap harus dihitung dari awal file.
+        """
+        seen = Counter()
+        if start:
+            reader = TableReader(path)
+            for rows in chunked(islice(reader, start), 5000):
+                seen.update(content_hash(*values) for values in parse_reviews(reader.columns, rows))
+        return seen
+
+    def _checkpoints(self, source, paths, resume):
+        """
+        Checkpoint per file. File yang sudah selesai dan belum berubah dilewati;
+        sisanya dikirim ke parser sebagai (path, offset) untuk resume.
+        """
+        tasks, checkpoints = [], {}
+        for path in paths:
+            checkpoint = Checkpoint(source, path, resume=resume)
+            if checkpoint.finished:
+                self.stdout.write(f"Skipped {os.path.basename(path)}: unchanged since last import")
+                continue
+            if checkpoint.offset:
+                self.stdout.write(f"Resuming {os.path.basename(path)} from row {checkpoint.offset}")
+            checkpoints[path] = checkpoint
+            tasks.append((path, checkpoint.offset))
+        return tasks, checkpoints
+
+    def _progress(self, tasks):
+        # Total baris sisa (perkiraan, hitung newline) untuk ETA
+        total = 0
+        for path, start in tasks:
+            try:
+                total += max((TableReader(path).estimate_rows() or 0) - start, 0)
+            except Exception:
+                pass
+        return Progress(self.stdout, total=total or None)
+
+    def _report_file(self, message, checkpoints):
+        _, path, rows, bad_rows, error = message
+        name = os.path.basename(path)
+        if error:
+            self.stderr.write(self.style.ERROR(f"{name}: {error}"))
+            return 1
+        checkpoints[path].finish()
+        self.stdout.write(f"Processed {name}: {rows} rows" + (f", {bad_rows} bad rows skipped" if bad_rows else ""))
+        return bad_rows
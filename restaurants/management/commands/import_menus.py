@@ -0,0 +1,194 @@
+import os, json, time
+from decimal import Decimal
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.conf import settings
+from restaurants.models import Menu, Restaurant, bump_restaurant_versions
+from core.columnar import normalize_prices, split_menu_prices
+from core.importing import TableReader, TableReadError, chunked, pick
+from core.metrics import record_import
+
+# Pisah daftar menu di koma/titik koma, kecuali di dalam kurung: "Mie Goreng (Ayam, Seafood)"
+LIST_SPLIT_RE = r"[,;](?![^()]*\))"
+UNKNOWN_PRICE = Decimal("0.00")
+
+
+class Command(BaseCommand):
+    help = ("Import/upsert Menu dari Menus.xlsx/.csv (resto_id dipetakan lewat data/_resto_id_map.json). "
+            "Menu dicocokkan per restoran berdasarkan nama.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", default=os.path.join(settings.BASE_DIR, "data", "Menus.xlsx"),
+                            help="Path ke Menus.xlsx/.csv")
+        parser.add_argument("--batch-size", type=int, default=500, help="Baris file per chunk/transaksi")
+        parser.add_argument("--dry-run", action="store_true", help="Hitung perubahan tanpa menulis ke database")
+        parser.add_argument("--prune", action="store_true",
+                            help="Hapus menu restoran yang ada di file tapi menunya tidak ada lagi di file")
+
+    def handle(self, *args, **opts):
+        path = opts["file"]
+        batch_size = max(1, opts["batch_size"])
+        dry_run = opts["dry_run"]
+        try:
+            reader = TableReader(path)
+        except TableReadError as e:
+            self.stderr.write(self.style.ERROR(str(e)))
+            return
+
+        # load mapping dari import_restos
+        map_path = os.path.join(settings.BASE_DIR, "data", "_resto_id_map.json")
+        idmap = {}
+        if os.path.exists(map_path):
+            with open(map_path, "r", encoding="utf-8") as f:
+                idmap = json.load(f)
+        existing_resto_ids = set(Restaurant.objects.values_list("id", flat=True))
+
+        def resolve_resto(raw_rid):
+            try:
+                key = str(int(float(raw_rid)))
+            except (TypeError, ValueError):
+                return None
+            if key in idmap and idmap[key] in existing_resto_ids:
+                return idmap[key]
+            # fallback (kalau mapping kosong): coba pakai id langsung
+            return int(key) if int(key) in existing_resto_ids else None
+
+        cols = reader.columns
+        self.rid_col   = pick(cols, "resto_id", "restaurant_id", "id_resto")
+        self.list_col  = pick(cols, "list menu", "list_menu", "menus")
+        self.name_col  = pick(cols, "menu_name", "nama_menu", "menu", "name")
+        self.price_col = pick(cols, "price", "harga")
+        self.desc_col  = pick(cols, "description", "deskripsi")
+
+        if not self.rid_col or not (self.list_col or self.name_col):
+            raise SystemExit("Butuh kolom resto_id + 'list menu' (daftar dipisah koma) atau menu_name pada Menus.")
+
+        started = time.monotonic()
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "deleted": 0, "skipped": 0}
+        kept = {}  # restaurant_id -> id menu yang ada di file (untuk --prune)
+        touched = set()
+        file_rows = 0
+
+        # File di-stream per chunk: normalisasi (vektor) → bandingkan per restoran → bulk upsert
+        for rows in reader.chunks(batch_size):
+            file_rows += len(rows)
+            frame = pd.DataFrame(rows, columns=cols)
+            frame["restaurant_id"] = frame[self.rid_col].map(resolve_resto)
+            counts["skipped"] += int(frame["restaurant_id"].isna().sum())
+            menus = self._normalize(frame[frame["restaurant_id"].notna()])
+            with transaction.atomic():
+                self._upsert(menus, counts, kept, touched, dry_run)
+
+        if opts["prune"]:
+            counts["deleted"] = self._prune(kept, dry_run)
+            touched.update(kept)
+        if not dry_run:
+            # bulk_create/bulk_update tidak memicu signal → naikkan versi restoran (ETag)
+            bump_restaurant_versions(touched)
+
+        counts["skipped"] += reader.bad_rows
+        elapsed = time.monotonic() - started
+        menus_total = counts["created"] + counts["updated"] + counts["unchanged"]
+        if not dry_run:
+            record_import("import_menus", menus_total, elapsed, errors=counts["skipped"])
+        prefix = "[dry-run] " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Menus: created={counts['created']}, updated={counts['updated']}, "
+            f"unchanged={counts['unchanged']}, deleted={counts['deleted']}, skipped rows={counts['skipped']} "
+            f"from {file_rows} rows / {len(kept)} restaurants in {elapsed:.2f}s "
+            f"({menus_total / max(elapsed, 1e-6):.0f} menus/s)"
+        ))
+
+    def _normalize(self, frame):
+        """
+        Chunk file → DataFrame (restaurant_id, name, price, description), semua
+        operasi string/harga per kolom. Harga/deskripsi None = tidak ada di file.
+        """
+        if self.list_col:
+            items = frame[self.list_col].fillna("").astype(str).str.split(LIST_SPLIT_RE, regex=True)
+            menus = frame.assign(item=items).explode("item")
+            item = (menus["item"].fillna("").astype(str)
+                    .str.replace(r"\s*\([^)]*$", "", regex=True)  # catatan dalam kurung yang tidak ditutup
+                    .str.strip(" \t\r\n.;"))
+            keep = (item != "") & ~item.str.startswith("(")
+            menus, item = menus[keep], item[keep]
+            names, prices = split_menu_prices(item)
+            descriptions = pd.Series([None] * len(menus), index=menus.index, dtype=object)
+        else:
+            menus = frame[frame[self.name_col].notna()]
+            names, prices = split_menu_prices(menus[self.name_col].astype(str).str.strip())
+            if self.price_col:
+                # Kolom harga eksplisit menang atas harga di ujung nama
+                column = normalize_prices(menus[self.price_col])
+                prices = column.where(column.notna(), prices)
+            descriptions = (menus[self.desc_col] if self.desc_col
+                            else pd.Series([None] * len(menus), index=menus.index, dtype=object))
+
+        out = pd.DataFrame({
+            "restaurant_id": menus["restaurant_id"].astype("int64"),
+            "name": names.str.slice(0, 100),
+            "price": prices,
+            # object + None (bukan NaN), supaya "tidak ada di file" bisa dibedakan
+            "description": descriptions.astype(object).where(descriptions.notna(), None),
+        })
+        out = out[out["name"] != ""]
+        # Nama dobel di restoran yang sama → baris terakhir menang
+        key = out["name"].str.casefold()
+        return out[~pd.DataFrame({"r": out["restaurant_id"], "k": key}).duplicated(keep="last")]
+
+    def _upsert(self, menus, counts, kept, touched, dry_run):
+        """
+        Menu baru di-bulk_create, yang harga/deskripsinya berubah di-bulk_update,
+        yang sama dilewati. Menu lama dicocokkan per restoran (nama, case-insensitive).
+        """
+        resto_ids = set(menus["restaurant_id"].tolist())
+        existing = {}
+        for ids in chunked(resto_ids, 500):
+            for menu in Menu.objects.filter(restaurant_id__in=ids).only("id", "restaurant_id", "name",
+                                                                          "price", "description"):
+                existing[(menu.restaurant_id, menu.name.casefold())] = menu
+
+        to_create, to_update = [], []
+        for restaurant_id, name, price, description in menus.itertuples(index=False):
+            menu = existing.get((restaurant_id, name.casefold()))
+            if menu is None:
+                to_create.append(Menu(restaurant_id=restaurant_id, name=name,
+                                      price=price if price is not None else UNKNOWN_PRICE,
+                                      description=description))
+                continue
+            kept.setdefault(restaurant_id, set()).add(menu.id)
+            # Harga/deskripsi yang tidak ada di file tidak menimpa isian manual
+            changed = False
+            if price is not None and menu.price != price:
+                menu.price, changed = price, True
+            if description is not None and menu.description != description:
+                menu.description, changed = description, True
+            if changed:
+                to_update.append(menu)
+            else:
+                counts["unchanged"] += 1
+
+        counts["created"] += len(to_create)
+        counts["updated"] += len(to_update)
+        if dry_run:
+            for menu in to_create:
+                kept.setdefault(menu.restaurant_id, set())
+            return
+        Menu.objects.bulk_create(to_create, batch_size=500)
+        Menu.objects.bulk_update(to_update, ["price", "description"], batch_size=500)
+        for menu in to_create:
+            kept.setdefault(menu.restaurant_id, set()).add(menu.pk)
+        touched.update(menu.restaurant_id for menu in to_create + to_update)
+
+    def _prune(self, kept, dry_run):
+        deleted = 0
+        for ids in chunked(list(kept), 100):
+            stale = Menu.objects.filter(restaurant_id__in=ids).exclude(
+                id__in=[menu_id for rid in ids for menu_id in kept[rid]]
+            )
+            if dry_run:
+                deleted += stale.count()
+            else:
+                deleted += stale.delete()[0]
+        return deleted
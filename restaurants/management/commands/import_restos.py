@@ -1,25 +1,10 @@
-import os, math, csv, json
+import os, math, json
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.conf import settings
-from restaurants.models import Restaurant
-
-def read_table(path):
-    import pandas as pd
-    ext = os.path.splitext(path)[1].lower()
-    if ext in [".xlsx", ".xls"]:
-        return pd.read_excel(path)
-    # CSV fallback (kalau terpaksa)
-    for enc in ["utf-8-sig", "utf-8", "latin-1"]:
-        for sep in [None, ",", ";", "\t", "|"]:
-            try:
-                df = pd.read_csv(path, encoding=enc, sep=sep, engine="python",
-                                 on_bad_lines="skip", quoting=csv.QUOTE_MINIMAL)
-                if len(df) > 0 and len(df.columns) >= 2:
-                    return df
-            except Exception:
-                continue
-    raise RuntimeError("Gagal membaca file Restaurants. Pakai .xlsx agar aman ya 🙏")
+from restaurants.models import Restaurant, bump_restaurant_versions
+from core.importing import TableReader, TableReadError, chunked, pick
+from core.jobs import ImportJob
 
 def to_float(x):
     try:
@@ -29,37 +14,57 @@ def to_float(x):
     except Exception:
         return None
 
-def pick(cols, *cands):
-    low = {str(c).lower().strip(): c for c in cols}
-    for c in cands:
-        if c in low: return low[c]
-    return None
-
 def clean_text(s):
     if s is None: return ""
     s = str(s).replace('""', '"').strip()
     return s if s != "-" else ""
 
+# Kolom yang ditulis import; kalau semuanya sama, baris dianggap unchanged
+FIELDS = ("name", "address", "latitude", "longitude", "rating")
+JOB_SOURCE = "restaurants"
+
+
 class Command(BaseCommand):
-    help = "Import/overwrite Restaurants dari CSV/Excel + tulis mapping resto_id→db_id ke data/_resto_id_map.json"
+    help = ("Import/upsert Restaurants dari CSV/Excel (kunci: resto_id → Restaurant.external_id) "
+            "+ tulis mapping resto_id→db_id ke data/_resto_id_map.json")
 
     def add_arguments(self, parser):
         parser.add_argument("--file", required=True, help="Path ke Restaurants.xlsx/.csv")
-        parser.add_argument("--truncate", action="store_true", help="Hapus semua Restaurant sebelum import")
+        parser.add_argument("--truncate", action="store_true",
+                            help="Hapus semua Restaurant sebelum import (ikut menghapus review/menu!)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Jumlah baris per bulk upsert")
+        parser.add_argument("--adopt-map", action="store_true",
+                            help="Isi external_id restoran lama dari data/_resto_id_map.json sebelum upsert "
+                                 "(sekali saja, untuk database hasil import versi lama)")
+        parser.add_argument("--no-resume", action="store_true",
+                            help="Abaikan checkpoint, baca file dari awal")
 
-    @transaction.atomic
     def handle(self, *args, **opts):
         path = opts["file"]
-        if not os.path.exists(path):
-            self.stderr.write(self.style.ERROR(f"File not found: {path}"))
+        batch_size = max(1, opts["batch_size"])
+        try:
+            reader = TableReader(path)
+        except TableReadError as e:
+            self.stderr.write(self.style.ERROR(str(e)))
             return
 
+        map_path = os.path.join(settings.BASE_DIR, "data", "_resto_id_map.json")
+
         if opts["truncate"]:
             self.stdout.write(self.style.WARNING("Truncating Restaurant table..."))
             Restaurant.objects.all().delete()
+        elif opts["adopt_map"]:
+            self._adopt_map(map_path)
+
+        # Commit per chunk + checkpoint: crash di tengah file bisa dilanjutkan
+        job = ImportJob("import_restos", JOB_SOURCE, reader, self.stdout,
+                        resume=not (opts["no_resume"] or opts["truncate"]))
+        if job.finished:
+            self.stdout.write(self.style.SUCCESS(f"File belum berubah sejak import terakhir: {job.checkpoint.counts}"))
+        elif job.offset:
+            self.stdout.write(self.style.WARNING(f"Resume dari baris {job.offset}"))
 
-        df = read_table(path)
-        cols = df.columns
+        cols = reader.columns
 
         # kolom umum di dataset kamu
         restoid_col = pick(cols, "resto_id", "restaurant_id", "id")
@@ -72,40 +77,111 @@ class Command(BaseCommand):
         if not name_col:
             raise SystemExit("Kolom nama restoran tidak ditemukan (cari: resto_name/name/restaurant_name).")
 
-        mapping = {}  # resto_id (file) -> Restaurant.id (DB)
-        created = 0
-
-        for _, row in df.iterrows():
-            name = clean_text(row.get(name_col))
-            if not name:
-                continue
-
-            address = clean_text(row.get(addr_col)) if addr_col else ""
-            lat = to_float(row.get(lat_col)) if lat_col else None
-            lng = to_float(row.get(lng_col)) if lng_col else None
-            rating = to_float(row.get(rate_col)) if rate_col else None
-
-            r = Restaurant(name=name)
-            if hasattr(r, "address"):   r.address = address
-            if hasattr(r, "latitude"):  r.latitude = lat
-            if hasattr(r, "longitude"): r.longitude = lng
-            if rating is not None and hasattr(r, "average_rating"):
-                r.average_rating = rating
-
-            r.save()
-            created += 1
-
-            # simpan mapping resto_id -> db_id jika kolomnya ada
-            if restoid_col:
-                file_rid = row.get(restoid_col)
-                if file_rid not in [None, ""]:
-                    mapping[str(int(float(file_rid)))] = r.id  # normalisasi ke string int
-
-        # tulis mapping ke data/_resto_id_map.json
-        map_path = os.path.join(settings.BASE_DIR, "data", "_resto_id_map.json")
+        idx = {c: cols.index(c) for c in (restoid_col, name_col, addr_col, lat_col, lng_col, rate_col) if c is not None}
+        get = lambda row, col: row[idx[col]] if col is not None else None
+
+        # File di-stream per chunk; tiap chunk: parse → bandingkan → bulk upsert (satu transaksi)
+        for rows in ([] if job.finished else job.chunks(batch_size)):
+            keyed, unkeyed = {}, []
+            for row in rows:
+                name = clean_text(get(row, name_col))
+                if not name:
+                    job.reject(row, "nama restoran kosong")
+                    continue
+                values = {
+                    "name": name[:100],
+                    "address": clean_text(get(row, addr_col)) if addr_col else "",
+                    "latitude": to_float(get(row, lat_col)) if lat_col else None,
+                    "longitude": to_float(get(row, lng_col)) if lng_col else None,
+                    "rating": to_float(get(row, rate_col)) if rate_col else None,
+                }
+                external_id = None
+                if restoid_col:
+                    rid = to_float(get(row, restoid_col))
+                    if rid is not None:
+                        external_id = str(int(rid))  # normalisasi ke string int
+                if external_id is None:
+                    # baris tanpa resto_id selalu di-insert
+                    unkeyed.append(values)
+                else:
+                    keyed[external_id] = values  # resto_id dobel → baris terakhir menang
+
+            with transaction.atomic():
+                counts = self._upsert(keyed)
+                if unkeyed:
+                    Restaurant.objects.bulk_create([Restaurant(**values) for values in unkeyed])
+                    counts["inserted"] += len(unkeyed)
+                job.advance(len(rows), **counts)
+
+        if not job.finished:
+            job.finish()
+
+        # tulis mapping ke data/_resto_id_map.json; dari DB (external_id = resto_id),
+        # jadi tetap lengkap walau import ini hasil resume
+        mapping = dict(Restaurant.objects.exclude(external_id=None).values_list("external_id", "id"))
         os.makedirs(os.path.dirname(map_path), exist_ok=True)
         with open(map_path, "w", encoding="utf-8") as f:
             json.dump(mapping, f, ensure_ascii=False, indent=2)
 
-        self.stdout.write(self.style.SUCCESS(f"Restaurants imported: {created}"))
+        counts = job.counts
+        self.stdout.write(self.style.SUCCESS(
+            f"Restaurants: inserted={counts.get('inserted', 0)}, updated={counts.get('updated', 0)}, "
+            f"unchanged={counts.get('unchanged', 0)}, rejected={job.rejected} "
+            f"in {job.progress.elapsed:.1f}s ({job.progress.rate:.0f} rows/s)"
+        ))
         self.stdout.write(self.style.SUCCESS(f"Mapping saved: {map_path} (keys={len(mapping)})"))
+
+    def _upsert(self, keyed):
+        """
+        Baris baru di-insert, yang berubah di-update (satu bulk_create
+        update_conflicts), yang sama persis dilewati supaya ETag-nya tetap.
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        existing = {
+            row["external_id"]: row
+            for row in Restaurant.objects.filter(external_id__in=list(keyed))
+                                         .values("id", "external_id", *FIELDS)
+        }
+        to_write = []
+        for external_id, values in keyed.items():
+            current = existing.get(external_id)
+            if current is None:
+                to_write.append(Restaurant(external_id=external_id, **values))
+                counts["inserted"] += 1
+            elif any(current[f] != values[f] for f in FIELDS):
+                to_write.append(Restaurant(id=current["id"], external_id=external_id, **values))
+                counts["updated"] += 1
+            else:
+                counts["unchanged"] += 1
+
+        if to_write:
+            updated_ids = [obj.id for obj in to_write if obj.id is not None]
+            Restaurant.objects.bulk_create(
+                to_write,
+                update_conflicts=True,
+                unique_fields=["external_id"],
+                update_fields=[*FIELDS, "updated_at"],
+            )
+            # bulk_create tidak memicu save(): versi yang berubah dinaikkan di DB (transaksi pemanggil)
+            bump_restaurant_versions(updated_ids)
+        return counts
+
+    def _adopt_map(self, map_path):
+        """
+        Restoran hasil import lama belum punya external_id; pakai mapping
+        lama (resto_id → db_id) supaya upsert meng-update, bukan menduplikasi.
+        """
+        if not os.path.exists(map_path):
+            self.stderr.write(self.style.WARNING(f"Mapping tidak ada: {map_path}"))
+            return
+        with open(map_path, "r", encoding="utf-8") as f:
+            old_map = json.load(f)
+        taken = set(Restaurant.objects.exclude(external_id=None).values_list("external_id", flat=True))
+        by_db_id = {db_id: rid for rid, db_id in old_map.items() if rid not in taken}
+        adopted = []
+        for db_ids in chunked(sorted(by_db_id), 500):
+            for r in Restaurant.objects.filter(id__in=db_ids, external_id=None).only("id"):
+                r.external_id = by_db_id[r.id]
+                adopted.append(r)
+        Restaurant.objects.bulk_update(adopted, ["external_id"], batch_size=500)
+        self.stdout.write(f"  external_id diisi dari mapping lama: {len(adopted)}")
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0004_restaurant_restaurant_name_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,4 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.images import discard_renditions, process_upload, schedule_renditions
 
 class Restaurant(models.Model):
     name = models.CharField(max_length=100)
@@ -8,11 +14,36 @@ class Restaurant(models.Model):
     rating = models.FloatField(null=True, blank=True)
     description = models.TextField(blank=True, null=True)
     photo = models.ImageField(upload_to='resto_photos/', blank=True, null=True)
+    # Ukuran asli, diisi pipeline gambar (core/images.py) saat upload
+    photo_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Naik setiap kali restoran, menu, review, atau reply-nya berubah (dipakai untuk ETag).
+    # Hanya dinaikkan di DB (F('version') + 1), tidak pernah ditulis dari objek di memori.
+    version = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # resto_id dari file sumber; kunci upsert import_restos
+    external_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Objek yang dimuat sebelum ada review/menu baru membawa version lama;
+        kolom itu tidak ikut UPDATE, versinya dinaikkan di DB dalam transaksi yang sama.
+        """
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.pop('update_fields', None)
+        if update_fields is None:
+            update_fields = [f.name for f in self._meta.concrete_fields if not f.primary_key]
+        update_fields = [name for name in update_fields if name != 'version']
+        with transaction.atomic():
+            super().save(*args, update_fields=update_fields, **kwargs)
+            bump_restaurant_version(self.pk)
+        self.refresh_from_db(fields=['version', 'updated_at'])
+
     @property
     def average_rating(self):
         reviews = self.review_set.all()
@@ -24,6 +55,10 @@ class Restaurant(models.Model):
         db_table = 'restaurant'
         verbose_name = 'Restaurant'
         verbose_name_plural = 'Restaurants'
+        indexes = [
+            # Keyset pagination tab "All" di explore: ORDER BY name, id
+            models.Index(fields=['name', 'id'], name='restaurant_name_id_idx'),
+        ]
 
 class Menu(models.Model):
     name = models.CharField(max_length=100)
@@ -31,6 +66,9 @@ class Menu(models.Model):
     description = models.TextField(blank=True, null=True)
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='menus')
     photo = models.ImageField(upload_to='menu_photos/', blank=True, null=True)
+    # Ukuran asli, diisi pipeline gambar (core/images.py) saat upload
+    photo_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -39,4 +77,53 @@ class Menu(models.Model):
     class Meta:
         db_table = 'menu'
         verbose_name = 'Menu'
-        verbose_name_plural = 'Menus'
\ No newline at end of file
+        verbose_name_plural = 'Menus'
+
+
+def bump_restaurant_version(restaurant_id):
+    """
+    Tandai restoran berubah (satu UPDATE, tanpa load objek)
+    """
+    if restaurant_id is None:
+        return
+    Restaurant.objects.filter(pk=restaurant_id).update(
+        version=F('version') + 1,
+        updated_at=timezone.now()
+    )
+
+
+def bump_restaurant_versions(restaurant_ids):
+    """
+    Versi banyak restoran sekaligus, untuk bulk import (bulk_create tidak memicu signal)
+    """
+    restaurant_ids = list(restaurant_ids)
+    for i in range(0, len(restaurant_ids), 500):
+        Restaurant.objects.filter(pk__in=restaurant_ids[i:i + 500]).update(
+            version=F('version') + 1,
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_save, sender=Menu)
+@receiver(post_delete, sender=Menu)
+def touch_restaurant_on_menu_change(sender, instance, **kwargs):
+    bump_restaurant_version(instance.restaurant_id)
+
+
+# Foto baru → EXIF dibuang; rendition thumb/card/hero + ukuran dibuat di background
+@receiver(pre_save, sender=Restaurant)
+@receiver(pre_save, sender=Menu)
+def process_photo_upload(sender, instance, **kwargs):
+    process_upload(instance, 'photo')
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_save, sender=Menu)
+def schedule_photo_renditions(sender, instance, **kwargs):
+    schedule_renditions(instance, 'photo')
+
+
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_delete, sender=Menu)
+def delete_photo_renditions(sender, instance, **kwargs):
+    discard_renditions(instance, 'photo')
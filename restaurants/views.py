@@ -1,9 +1,11 @@
 # restaurants/views.py
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Avg, Count
+from django.core.paginator import EmptyPage, PageNotAnInteger
+from django.db.models import Avg, Count, Prefetch
 from restaurants.models import Restaurant, Menu
-from reviews.models import Review
+from reviews.models import Review, ReviewReply
+from core.conditional import conditional_response, csrf_version, make_etag, set_conditional_headers
+from core.pagination import CountedPaginator, CursorPaginator
 from core.utils import track_user_activity
 
 def restaurant_detail(request, restaurant_id):
@@ -13,6 +15,14 @@ def restaurant_detail(request, restaurant_id):
     # Track restaurant view activity
     track_user_activity(request.user, 'view', restaurant=restaurant)
 
+    # Conditional GET: kalau versi restoran belum berubah, balas 304 tanpa query berat.
+    # Halaman berisi form review/reply → token CSRF ikut ETag
+    etag = make_etag('detail', restaurant.id, restaurant.version, restaurant.updated_at, request.user.pk,
+                     csrf_version(request))
+    not_modified = conditional_response(request, etag, restaurant.updated_at)
+    if not_modified is not None:
+        return not_modified
+
     # Anotasi rating rata-rata dan jumlah review
     avg_rating = Review.objects.filter(restaurant=restaurant).aggregate(Avg('rating'))['rating__avg']
     review_count = Review.objects.filter(restaurant=restaurant).count()
@@ -21,22 +31,31 @@ def restaurant_detail(request, restaurant_id):
     menus = Menu.objects.filter(restaurant=restaurant)
 
     # Daftar review
-    reviews_qs = Review.objects.filter(restaurant=restaurant).select_related('user').order_by('-created_at')
-    paginator = Paginator(reviews_qs, 10)  # 10 reviews per page
-    page_number = request.GET.get('page')
-    try:
-        reviews = paginator.page(page_number)
-    except PageNotAnInteger:
-        reviews = paginator.page(1)
-    except EmptyPage:
-        reviews = paginator.page(paginator.num_pages)
+    # Penulis + profil ikut di-join, reply diambil sekaligus (bukan per review di template)
+    reviews_qs = Review.objects.filter(restaurant=restaurant).select_related('user__profile').prefetch_related(
+        Prefetch('replies', queryset=ReviewReply.objects.select_related('user__profile'))
+    )
+    page_range = None
+    if 'page' in request.GET:
+        # Mode nomor halaman: total pakai review_count yang sudah dihitung di atas
+        paginator = CountedPaginator(reviews_qs.order_by('-created_at', '-id'), 10, count=review_count)
+        page_number = request.GET.get('page')
+        try:
+            reviews = paginator.page(page_number)
+        except PageNotAnInteger:
+            reviews = paginator.page(1)
+        except EmptyPage:
+            reviews = paginator.page(paginator.num_pages)
 
-    #Window nomor halaman untuk template
-    current_page = reviews.number
-    last_page = paginator.num_pages
-    start = max(current_page - 2, 1)
-    end = min(current_page + 2, last_page) + 1
-    page_range = range(start, end)
+        #Window nomor halaman untuk template
+        current_page = reviews.number
+        last_page = paginator.num_pages
+        start = max(current_page - 2, 1)
+        end = min(current_page + 2, last_page) + 1
+        page_range = range(start, end)
+    else:
+        # Mode cursor (default): tanpa OFFSET, cepat untuk halaman dalam
+        reviews = CursorPaginator(reviews_qs, 10, ordering=('-created_at', '-id')).page(request.GET.get('cursor'))
 
     # Cek apakah user sudah bookmark
     is_bookmarked = False
@@ -64,8 +83,10 @@ def restaurant_detail(request, restaurant_id):
         'review_count': review_count,
         'menus': menus,
         'reviews': reviews,
+        'page_range': page_range,
         'is_bookmarked': is_bookmarked,
         'restaurant_data': restaurant_data,  # 👈 Tambah ini
         'has_coordinate': has_coordinate,
     }
-    return render(request, 'restaurants/detail.html', context)
\ No newline at end of file
+    response = render(request, 'restaurants/detail.html', context)
+    return set_conditional_headers(response, etag, restaurant.updated_at)
\ No newline at end of file
@@ -1,28 +1,19 @@
-import os, math, csv, json
+import os, math, json
 from datetime import datetime
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 from django.db import transaction
 from django.conf import settings
-from restaurants.models import Restaurant
+from accounts.models import Profile
+from restaurants.models import Restaurant, bump_restaurant_versions
 from reviews.models import Review
+from core.importing import TableReader, TableReadError, chunked, pick
+from core.jobs import ImportJob
+from core.ledger import CHANGED, UNCHANGED, Ledger, content_hash
 from django.utils import timezone
 
-def read_table(path):
-    import pandas as pd
-    ext = os.path.splitext(path)[1].lower()
-    if ext in [".xlsx", ".xls"]:
-        return pd.read_excel(path)
-    for enc in ["utf-8-sig", "utf-8", "latin-1"]:
-        for sep in [None, ",", ";", "\t", "|"]:
-            try:
-                df = pd.read_csv(path, encoding=enc, sep=sep, engine="python",
-                                 on_bad_lines="skip", quoting=csv.QUOTE_MINIMAL)
-                if len(df) > 0 and len(df.columns) >= 2:
-                    return df
-            except Exception:
-                continue
-    raise RuntimeError("Gagal membaca file Reviews.")
+LEDGER_SOURCE = "reviews"
 
 def to_float(x):
     try:
@@ -33,38 +24,59 @@ def to_float(x):
 def parse_dt(x):
     if x is None or (isinstance(x, float) and math.isnan(x)):
         return None
+    if isinstance(x, datetime):
+        return x
     s = str(x).strip()
-    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%m/%d/%Y"):
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%m/%d/%Y", "%d/%m/%y %H.%M"):
         try:
             return datetime.strptime(s, fmt)
         except Exception:
             continue
     return None
 
-def pick(cols, *cands):
-    low = {str(c).lower().strip(): c for c in cols}
-    for c in cands:
-        if c in low: return low[c]
-    return None
+def to_rating(x):
+    v = to_float(x)
+    if v is None or math.isnan(v):
+        return None
+    v = int(round(v))
+    return v if 1 <= v <= 5 else None
 
 class Command(BaseCommand):
-    help = "Import Reviews + pakai mapping data/_resto_id_map.json agar resto_id di file nyambung ke Restaurant DB."
+    help = ("Import Reviews + pakai mapping data/_resto_id_map.json agar resto_id di file nyambung ke Restaurant DB. "
+            "Inkremental: baris yang tidak berubah sejak import terakhir dilewati.")
 
     def add_arguments(self, parser):
         parser.add_argument("--file", required=True, help="Path ke Reviews.csv/.xlsx")
-        parser.add_argument("--truncate", action="store_true", help="Hapus semua Review sebelum import")
+        parser.add_argument("--truncate", action="store_true", help="Hapus semua Review (dan ledger-nya) sebelum import")
         parser.add_argument("--user-prefix", default="user", help="Prefix username jika create user otomatis")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Jumlah review per bulk_create/transaksi")
+        parser.add_argument("--ledger-source", default=LEDGER_SOURCE,
+                            help="Namespace ledger (pisahkan kalau dataset lain punya review_id yang bentrok)")
+        parser.add_argument("--no-resume", action="store_true",
+                            help="Abaikan checkpoint, baca file dari awal (ledger tetap menyaring baris sama)")
 
-    @transaction.atomic
     def handle(self, *args, **opts):
         path = opts["file"]
-        if not os.path.exists(path):
-            self.stderr.write(self.style.ERROR(f"File not found: {path}"))
+        batch_size = max(1, opts["batch_size"])
+        try:
+            reader = TableReader(path)
+        except TableReadError as e:
+            self.stderr.write(self.style.ERROR(str(e)))
             return
 
+        ledger = Ledger(opts["ledger_source"])
         if opts["truncate"]:
             self.stdout.write(self.style.WARNING("Truncating Review table..."))
             Review.objects.all().delete()
+            ledger.clear()
+
+        job = ImportJob("import_reviews", opts["ledger_source"], reader, self.stdout,
+                        resume=not opts["no_resume"])
+        if job.finished:
+            self.stdout.write(self.style.SUCCESS(f"File belum berubah sejak import terakhir: {job.checkpoint.counts}"))
+            return
+        if job.offset:
+            self.stdout.write(self.style.WARNING(f"Resume dari baris {job.offset}"))
 
         # load mapping dari import_restos
         map_path = os.path.join(settings.BASE_DIR, "data", "_resto_id_map.json")
@@ -73,9 +85,9 @@ class Command(BaseCommand):
             with open(map_path, "r", encoding="utf-8") as f:
                 idmap = json.load(f)
 
-        df = read_table(path)
-        cols = df.columns
+        cols = reader.columns
 
+        key_col  = pick(cols, "review_id", "id")
         rid_col  = pick(cols, "resto_id", "restaurant_id", "id_resto")
         uid_col  = pick(cols, "user_id", "username", "user")
         text_col = pick(cols, "review_text", "comment", "review")
@@ -85,62 +97,123 @@ class Command(BaseCommand):
         if not rid_col:
             raise SystemExit("Butuh kolom resto_id/restaurant_id pada Reviews.")
 
-        created, skipped = 0, 0
+        idx = {c: cols.index(c) for c in (key_col, rid_col, uid_col, text_col, rate_col, time_col) if c is not None}
+        get = lambda row, col: row[idx[col]] if col is not None else None
 
-        for _, row in df.iterrows():
-            raw_rid = row.get(rid_col)
-            if raw_rid in [None, ""]:
-                skipped += 1
-                continue
-
-            # cari Restaurant.id di DB via mapping
-            key = str(int(float(raw_rid)))
-            resto_db = None
-            if key in idmap:
-                try:
-                    resto_db = Restaurant.objects.get(id=idmap[key])
-                except Restaurant.DoesNotExist:
-                    resto_db = None
+        # Resolve restoran sekali di depan: satu query untuk semua id yang ada
+        existing_resto_ids = set(Restaurant.objects.values_list("id", flat=True))
 
+        def resolve_resto(raw_rid):
+            try:
+                key = str(int(float(raw_rid)))
+            except (TypeError, ValueError):
+                return None
+            if key in idmap and idmap[key] in existing_resto_ids:
+                return idmap[key]
             # fallback (kalau mapping kosong): coba pakai id langsung
-            if resto_db is None:
-                try:
-                    resto_db = Restaurant.objects.get(id=int(float(raw_rid)))
-                except Exception:
-                    resto_db = None
-
-            if resto_db is None:
-                skipped += 1
-                continue
+            return int(key) if int(key) in existing_resto_ids else None
 
-            # user
-            raw_uid = row.get(uid_col) if uid_col else None
+        def to_username(raw_uid):
             if raw_uid is None or str(raw_uid).strip().lower() in ["", "nan"]:
-                username = "importer"
-            else:
+                return "importer"
+            try:
+                return f"{opts['user_prefix']}{int(float(raw_uid))}"[:150]
+            except Exception:
+                return f"{opts['user_prefix']}{str(raw_uid).strip()}"[:150]
+
+        def source_key(row, username, text):
+            # review_id dari file kalau ada; kalau tidak, identitas isi (resto + user + teks)
+            raw = get(row, key_col)
+            if raw is not None:
                 try:
-                    username = f"{opts['user_prefix']}{int(float(raw_uid))}"
-                except Exception:
-                    username = f"{opts['user_prefix']}{str(raw_uid).strip()}"
-            user, _ = User.objects.get_or_create(username=str(username)[:150])
-
-            rating = to_float(row.get(rate_col)) if rate_col else None
-            text = str(row.get(text_col) or "").strip()
-            ts = parse_dt(row.get(time_col)) if time_col else None
-
-            if ts and timezone.is_naive(ts):
-                ts = timezone.make_aware(ts)
-
-            # Hindari duplikat review untuk kombinasi user + resto
-            # Selalu buat review baru tanpa skip
-            Review.objects.create(
-                restaurant=resto_db,
-                user=user,
-                rating=rating,
-                comment=text,
-                created_at=ts or timezone.now()
-            )
-            created += 1
-
-
-        self.stdout.write(self.style.SUCCESS(f"Reviews imported: created={created}, skipped={skipped}"))
+                    return str(int(float(raw)))
+                except (TypeError, ValueError):
+                    return str(raw).strip()[:255]
+            return content_hash(get(row, rid_col), username, text)
+
+        # File di-stream per chunk: parse → bandingkan dengan ledger → tulis yang baru/berubah
+        user_ids = {}
+        touched_restos = set()
+        now = timezone.now()
+        for rows in job.chunks(batch_size):
+            parsed = {}
+            for row in rows:
+                resto_id = resolve_resto(get(row, rid_col))
+                if resto_id is None:
+                    job.reject(row, "restoran tidak ditemukan")
+                    continue
+                rating = to_rating(get(row, rate_col))
+                if rating is None:
+                    job.reject(row, "rating tidak valid")
+                    continue
+                text = get(row, text_col)
+                text = "" if text is None else str(text).strip()
+                ts = parse_dt(get(row, time_col)) if time_col else None
+                if ts and timezone.is_naive(ts):
+                    ts = timezone.make_aware(ts)
+                username = to_username(get(row, uid_col))
+                values = (resto_id, username, rating, text, ts)
+                # review_id dobel di file → baris terakhir menang
+                parsed[source_key(row, username, text)] = values + (content_hash(*values),)
+
+            status = ledger.classify({key: v[-1] for key, v in parsed.items()})
+            # Review yang sudah dihapus di aplikasi tapi berubah di sumber → dibuat ulang
+            changed_ids = {oid for st, oid in status.values() if st == CHANGED}
+            alive = set(Review.objects.filter(id__in=changed_ids).values_list("id", flat=True)) if changed_ids else set()
+
+            to_create, to_update = [], []
+            for key, (resto_id, username, rating, text, ts, h) in parsed.items():
+                st, object_id = status[key]
+                if st == UNCHANGED:
+                    continue
+                if st == CHANGED and object_id in alive:
+                    to_update.append((key, h, Review(id=object_id, restaurant_id=resto_id, rating=rating,
+                                                     comment=text, created_at=ts or now), username))
+                else:
+                    to_create.append((key, h, Review(restaurant_id=resto_id, rating=rating, comment=text,
+                                                     created_at=ts or now), username))
+
+            self._resolve_users({item[3] for item in to_create + to_update} - user_ids.keys(), user_ids)
+            for _, _, review, username in to_create + to_update:
+                review.user_id = user_ids[username]
+
+            # Tiap chunk satu transaksi: data + ledger + checkpoint commit bersama
+            with transaction.atomic():
+                Review.objects.bulk_create([item[2] for item in to_create], batch_size=batch_size)
+                if to_update:
+                    Review.objects.bulk_update([item[2] for item in to_update],
+                                               ["restaurant", "user", "rating", "comment", "created_at"],
+                                               batch_size=500)
+                ledger.record([(key, h, review.pk) for key, h, review, _ in to_create + to_update])
+                job.advance(len(rows), created=len(to_create), updated=len(to_update),
+                            unchanged=len(parsed) - len(to_create) - len(to_update))
+            touched_restos.update(item[2].restaurant_id for item in to_create + to_update)
+
+        job.finish()
+        # bulk_create tidak memicu signal → naikkan versi restoran yang kena (ETag)
+        bump_restaurant_versions(touched_restos)
+
+        counts, elapsed = job.counts, job.progress.elapsed
+        self.stdout.write(self.style.SUCCESS(
+            f"Reviews imported: created={counts.get('created', 0)}, updated={counts.get('updated', 0)}, "
+            f"unchanged={counts.get('unchanged', 0)}, rejected={job.rejected}, users={len(user_ids)} "
+            f"in {elapsed:.1f}s ({job.progress.rate:.0f} rows/s)"
+        ))
+
+    def _resolve_users(self, usernames, user_ids):
+        """
+        Lengkapi `user_ids` (username -> user_id) untuk nama-nama baru. User yang
+        belum ada dibuat dengan bulk_create (+ Profile, karena signal post_save tidak jalan).
+        """
+        names = sorted(usernames)
+        for chunk in chunked(names, 500):
+            user_ids.update(User.objects.filter(username__in=chunk).values_list("username", "id"))
+
+        missing = [name for name in names if name not in user_ids]
+        if missing:
+            # Akun hasil import tidak untuk login (password unusable)
+            password = make_password(None)
+            with transaction.atomic():
+                users = User.objects.bulk_create([User(username=name, password=password) for name in missing])
+                Profile.objects.bulk_create([Profile(user_id=u.pk) for u in users], ignore_conflicts=True)
+            user_ids.update((u.username, u.pk) for u in users)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0004_restaurant_restaurant_name_id_idx'),
+        ('reviews', '0003_alter_review_unique_together'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['restaurant', '-created_at', '-id'], name='review_resto_created_idx'),
+        ),
+    ]
@@ -1,6 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
-from restaurants.models import Restaurant
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from restaurants.models import Restaurant, bump_restaurant_version
+
+from core.images import discard_renditions, process_upload, schedule_renditions
 
 class Review(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -8,7 +13,11 @@ class Review(models.Model):
     rating = models.IntegerField(choices=[(i, i) for i in range(1, 6)])  # 1 to 5 stars
     comment = models.TextField()
     photo = models.ImageField(upload_to='review_photos/', blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Ukuran asli, diisi pipeline gambar (core/images.py) saat upload
+    photo_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # default (bukan auto_now_add) supaya bulk import bisa membawa timestamp aslinya
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     def __str__(self):
         return f"{self.user.username} - {self.restaurant.name} ({self.rating}⭐)"
@@ -17,7 +26,10 @@ class Review(models.Model):
         db_table = 'review'
         verbose_name = 'Review'
         verbose_name_plural = 'Reviews'
-    pass
+        indexes = [
+            # Keyset pagination review di halaman detail: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['restaurant', '-created_at', '-id'], name='review_resto_created_idx'),
+        ]
 
 
 class ReviewReply(models.Model):
@@ -33,4 +45,34 @@ class ReviewReply(models.Model):
         db_table = 'review_reply'
         verbose_name = 'Review Reply'
         verbose_name_plural = 'Review Replies'
-        ordering = ['created_at']
\ No newline at end of file
+        ordering = ['created_at']
+
+
+# Review/reply baru atau berubah → versi restoran naik, ETag halaman detail ikut berubah
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def touch_restaurant_on_review_change(sender, instance, **kwargs):
+    bump_restaurant_version(instance.restaurant_id)
+
+
+@receiver(post_save, sender=ReviewReply)
+@receiver(post_delete, sender=ReviewReply)
+def touch_restaurant_on_reply_change(sender, instance, **kwargs):
+    restaurant_id = Review.objects.filter(pk=instance.review_id).values_list('restaurant_id', flat=True).first()
+    bump_restaurant_version(restaurant_id)
+
+
+# Foto baru → EXIF dibuang; rendition + ukuran dibuat di background (core/images.py)
+@receiver(pre_save, sender=Review)
+def process_review_photo(sender, instance, **kwargs):
+    process_upload(instance, 'photo')
+
+
+@receiver(post_save, sender=Review)
+def schedule_review_renditions(sender, instance, **kwargs):
+    schedule_renditions(instance, 'photo')
+
+
+@receiver(post_delete, sender=Review)
+def delete_review_renditions(sender, instance, **kwargs):
+    discard_renditions(instance, 'photo')
@@ -2,7 +2,8 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db import IntegrityError
+from django.db import DatabaseError, IntegrityError
+from core.writes import run_write
 from restaurants.models import Restaurant
 from .models import Review, ReviewReply
 
@@ -25,17 +26,19 @@ def write_review(request, restaurant_id):
         if not rating or not comment:
             messages.error(request, 'Rating dan komentar wajib diisi.')
         else:
+            review = Review(
+                user = request.user,
+                restaurant = restaurant,
+                rating = int(rating),
+                comment = comment,
+                photo = photo
+            )
             try:
-                review = Review.objects.create(
-                    user = request.user,
-                    restaurant = restaurant,
-                    rating = int(rating),
-                    comment = comment,
-                    photo = photo
-                )
+                # Objek dibuat sekali: kalau di-retry, foto tidak di-upload ulang
+                run_write(review.save, op='review')
                 messages.success(request, 'Terima kasih atas ulasannya! 🎉')
                 return redirect('restaurants:detail', restaurant_id=restaurant.id)
-            except IntegrityError:
+            except (IntegrityError, DatabaseError):
                 messages.error(request, 'Gagal menyimpan ulasan. Coba lagi.')
 
     return render(request, 'reviews/write_review.html', {
@@ -57,7 +60,7 @@ def edit_review(request, review_id):
             try:
                 review.rating = int(rating)
                 review.comment = comment
-                review.save()
+                run_write(review.save, op='review')
                 messages.success(request, 'Ulasan berhasil diperbarui! ✅')
                 return redirect('restaurants:detail', restaurant_id=restaurant.id)
             except Exception as e:
@@ -80,7 +83,9 @@ def add_reply(request, review_id):
             messages.error(request, 'Reply tidak boleh kosong.')
         else:
             try:
-                ReviewReply.objects.create(
+                run_write(
+                    ReviewReply.objects.create,
+                    op='reply',
                     review=review,
                     user=request.user,
                     reply_text=reply_text